@@ -0,0 +1,135 @@
+# Backfill for the career director workbooks: rebuilds the WH (Weekly History) columns for a range of weeks from the
+# nightly rollup snapshots (rollup.py), for when a week was missed or a column came out wrong.
+# Nothing is queried from the database and the normal pipeline isn't re-run per week. Each week's numbers are read
+# from its snapshot once, then every director workbook is loaded once, all of its WH tables are rebuilt in one pass
+# (see wh_backfill.py), and it's saved once. MRF tables still show the latest Friday and are left alone.
+#
+# By default the workbook of every director in routing.toml (routing.py) is backfilled; --workbook limits it.
+#
+#   python backfill-CD-reports.py --start 2026-09-04 --end 2026-10-09
+#   python backfill-CD-reports.py --start 2026-09-04 --end 2026-10-09 --workbook BSAcc-MAcc --workbook MBA
+
+import sys
+import sqlite3
+import argparse
+import importlib.util
+import datetime as dt
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+# The shared modules are in placement_common/ at the repository root; those that keep state keep it in this folder
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from placement_common.paths import use_report_dir
+use_report_dir(__file__)
+from placement_common import rollup
+from placement_common.wh_backfill import backfill_weeks, pick_snapshots, rebuild_wh_table
+from placement_common.run_metrics import METRICS, stage
+from placement_common.safe_save import safe_save
+from placement_common.routing import current_routing
+
+BASE_DIR = Path(__file__).resolve().parent
+WORKBOOK_PREFIX = "WeeklyPlacement-"
+
+def load_update_module():
+    spec = importlib.util.spec_from_file_location("update_cd_reports", str(BASE_DIR / "update-CD-reports.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# {file label ("BSAcc-MAcc"): programs} of the director workbooks to backfill, from routing.toml. Without --workbook
+# that's every director whose workbook is in this folder.
+def director_workbooks(labels=None):
+    routed = {d.file_label: list(d.programs) for d in current_routing().directors.values()}
+    if labels:
+        unknown = [label for label in labels if label not in routed]
+        if unknown:
+            raise RuntimeError(f"Not a director workbook in routing.toml: {', '.join(unknown)} "
+                               f"(known: {', '.join(sorted(routed))})")
+        return {label: routed[label] for label in labels}
+    found = {label: programs for label, programs in routed.items()
+             if (BASE_DIR / f"{WORKBOOK_PREFIX}{label}.xlsx").exists()}
+    for label in sorted(set(routed) - set(found)):
+        print(f"[WARN] No {WORKBOOK_PREFIX}{label}.xlsx in {BASE_DIR}; skipped")
+    return found
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild WH columns of the director workbooks from rollup snapshots.")
+    parser.add_argument("--start", required=True, help="first week to rebuild, YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="last week to rebuild, YYYY-MM-DD")
+    parser.add_argument("--weekday", type=int, default=4, help="report weekday, 0=Monday (default: 4, Friday)")
+    parser.add_argument("--workbook", action="append", default=None,
+                        help="file label of a workbook to backfill, e.g. BSAcc-MAcc (repeatable; default: all)")
+    parser.add_argument("--rollup", default=str(rollup.ROLLUP_PATH), help="rollup file (default: ROLLUP_PATH)")
+    args = parser.parse_args(argv)
+    start, end = dt.date.fromisoformat(args.start), dt.date.fromisoformat(args.end)
+    if end < start:
+        raise RuntimeError(f"--end {end} is before --start {start}")
+
+    upd = load_update_module()
+    workbooks = director_workbooks(args.workbook)
+    if not workbooks:
+        raise FileNotFoundError(f"No director workbooks from routing.toml found in {BASE_DIR}")
+    if not Path(args.rollup).exists():
+        raise FileNotFoundError(f"Rollup not found at: {args.rollup}")
+    all_programs = sorted({p for programs in workbooks.values() for p in programs})
+
+    # Every week's numbers for every program involved, read once from the stored snapshots
+    weeks = backfill_weeks(start, end, args.weekday)
+    db = sqlite3.connect(args.rollup)
+    try:
+        with stage("query", "rollup_snapshots"):
+            snapshots = pick_snapshots(db, weeks, rollup.ROLLUP_MAX_AGE_DAYS)
+            data_by_week = {week: upd.rollup_program_data(db, snap, all_programs) for week, snap in snapshots.items()}
+    finally:
+        db.close()
+    for week in weeks:
+        if week not in snapshots:
+            print(f"[WARN] No rollup snapshot within {rollup.ROLLUP_MAX_AGE_DAYS} day(s) of {week}; skipped")
+    if not data_by_week:
+        raise RuntimeError(f"No rollup snapshots for any week between {start} and {end}.")
+
+    for label, programs in workbooks.items():
+        wb_path = BASE_DIR / f"{WORKBOOK_PREFIX}{label}.xlsx"
+        if not wb_path.exists():
+            raise FileNotFoundError(f"Workbook not found at: {wb_path}")
+        with stage("workbook_load", wb_path.name):
+            wb = load_workbook(wb_path, data_only=False)
+
+        rewritten = inserted = 0
+        for sheet_name, tbl_name, rows_for in upd.wh_tables(programs):
+            if sheet_name not in wb.sheetnames:
+                raise RuntimeError(f"Expected sheet '{sheet_name}' not found in {wb_path.name}.")
+            ws = wb[sheet_name]
+            tbl = upd.get_table(ws, tbl_name)
+            min_row, max_row, min_col, _ = upd.table_bounds(tbl.ref)
+            header_row = upd.detect_header_row(ws, min_row, max_row, min_col, upd.expected_header_for_table(ws, tbl_name))
+
+            def recompute(cols, buf):
+                for col in cols:
+                    upd.compute_totals_and_percent(ws, min_row, max_row, min_col, col, buf)
+
+            with stage("table_backfill", tbl_name):
+                r, i = rebuild_wh_table(
+                    ws, tbl, header_row, {week: rows_for(data) for week, data in data_by_week.items()},
+                    lambda s: s.lower() in upd.IGNORE_LABELS, recompute,
+                )
+            rewritten += r
+            inserted += i
+
+        with stage("workbook_save", wb_path.name):
+            safe_save(wb.save, wb_path)
+        print(f"Backfilled {len(data_by_week)} week(s) into {wb_path.name}: {inserted} column(s) added, {rewritten} rewritten")
+
+
+if __name__ == "__main__":
+    METRICS.start("career-director-backfill")
+    status = "error"
+    try:
+        main()
+        status = "ok"
+    except Exception as e:
+        sys.stderr.write(f"[ERROR] {e}\n")
+        sys.exit(1)
+    finally:
+        METRICS.write(status)
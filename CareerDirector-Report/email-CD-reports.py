@@ -4,12 +4,27 @@
 # It will also update the BCC data team box folder titled Career Director Reports
 
 import os
-import smtplib
+import sys
 import ssl
 from pathlib import Path
 import mimetypes
 from email.message import EmailMessage
-from create_program_reports import main as build_program_report
+# The shared modules are in placement_common/ at the repository root; those that keep state keep it in this folder
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from placement_common.paths import use_report_dir
+use_report_dir(__file__)
+# --dry-run reruns this script in a scratch directory against local stand-ins (dry_run.py)
+from placement_common import dry_run
+dry_run.dispatch(__file__)
+from create_program_reports import run_sharded, build_roster, chart_list, close_statements
+from placement_common.month_end_charts import render_charts, workbook_specs
+from roster import ROSTER_SHEETS
+from placement_common.cohorts import FT_GRAD_CLASS
+from placement_common.run_metrics import METRICS, stage, LOW_MEMORY
+from placement_common.streaming_mail import defer_attachment, pending_attachments, send_streamed
+from placement_common.email_digest import set_body_with_digest
+from placement_common.box_manifest import BoxManifest
+from placement_common.routing import current_routing
 from datetime import date
 from dotenv import load_dotenv
 from typing import Iterable
@@ -32,67 +47,8 @@ BCC_ADDRS = []
 # box folder upload email
 BOX_UPLOAD_EMAIL = os.getenv("BOX_UPLOAD_EMAIL")
 
-# Nested program dictionary:  
-# CAREER DIRECTOR -> (programs -> (list of programs), emails -> (list of emails))
-program_dict = {
-    "Name1": {
-        "programs": ("BSAcc", "MAcc"),
-        "emails": ("fake@fake.com", "fake2@fake.com"),
-    },
-    "Name2": {
-        "programs": ("BSEDM",),
-        "emails": ("fake@fake.com"),
-    },
-    "Name3": {
-        "programs": ("BSEnt", "BSHRM", "BSStrat"),
-        "emails": ("fake@fake.com"),
-    },
-    "Name4": {
-        "programs": ("BSFin",),
-        "emails": ("fake@fake.com"),
-    },
-    "Name5": {
-        "programs": ("BSGSCM", "BSMgt"),
-        "emails": ("fake@fake.com", "fake2@fake.com"),
-    },
-    "Name6": {
-        "programs": ("BSIS", "MISM"),
-        "emails": ("fake@fake.com", "fake2@fake.com"),
-    },
-    "Name7": {
-        "programs": ("BSMktg",),
-        "emails": ("fake@fake.com", "fake2@fake.com"),
-    },
-    "Name8": {
-        "programs": ("MBA",),
-        "emails": ("fake@fake.com", "fake2@fake.com"),
-    },
-    "Name9": {
-        "programs": ("MPA",),
-        "emails": ("fake@fake.com", "fake2@fake.com"),
-    },
-}
-
-# Formats the list of programs to appear nicely in the email subject line
-def program_to_subjectHeader(programs):
-    if not programs:
-        raise RuntimeError("No programs: check dictionary")
-    if len(programs) == 1:
-        return programs[0]
-    if len(programs) > 1:
-        return ", ".join(programs)
-
-# Formats the list of programs to appear nicely for each excel file name
-def program_to_filename(programs):
-    if not programs:
-        raise RuntimeError("No programs: check dictionary")
-    if len(programs) == 1:
-        return programs[0]
-    if len(programs) > 1:
-        return "-".join(programs)
-
 # This is where the message is built: set the subject and the content
-def build_message(filepath, to_addrs: Iterable[str], contact_name, subj_label, a):
+def build_message(filepath, to_addrs: Iterable[str], contact_name, subj_label, a, roster_path=None, charts=(), digest=()):
     msg = EmailMessage()
     msg["From"] = SENDER
     msg["To"] = ", ".join(to_addrs)
@@ -104,13 +60,13 @@ def build_message(filepath, to_addrs: Iterable[str], contact_name, subj_label, a
         body = (
 f"Good Morning {contact_name},\n\n"
 "Today is the last day of the month. The report has been updated with our current, month-end placement statistics.\n\n"
-"The first excel sheet tab contains the placement totals for the entire Class of 2026. "
+f"The first excel sheet tab contains the placement totals for the entire Class of {FT_GRAD_CLASS}. "
 "Each sheet after that contains data for your program or programs.\n"
 "The sheets include a 'Most Recent Friday' table, which shows the data as of the day and time you received this email.\n"
 "There is also a 'Weekly History' table, which provides a picture of how the placement numbers have been changing over the past couple of months.\n"
 "Each table shows how many students are in each placement category. The most important categories are bolded. At the bottom of each table, you can see the placement percentage\n"
 "If you have any questions, please contact the BCC Data Team. If there are any discrepancies in the data, please let us know.\n\n"
-"A visualization of this month end data will be sent out within the next business day. It will have a monthly placement historical data comparison.\n\n"
+f"{CHARTS_NOTE if charts else VISUALIZATION_NOTE}\n\n"
 "Sincerely,\n"
 "BCC Data Team"      
         )
@@ -119,7 +75,7 @@ f"Good Morning {contact_name},\n\n"
         body = (
 f"Good Morning {contact_name},\n\n"
 "Here are the updated placement and internship reports for your programs from the past week.\n\n"
-"The first excel sheet tab contains the placement totals for the entire Class of 2026. "
+f"The first excel sheet tab contains the placement totals for the entire Class of {FT_GRAD_CLASS}. "
 "Each sheet after that contains data for your program or programs.\n"
 "The sheets include a 'Most Recent Friday' table, which shows the data as of the day and time you received this email.\n"
 "There is also a 'Weekly History' table, which provides a picture of how the placement numbers have been changing over the past couple of months.\n"
@@ -128,10 +84,30 @@ f"Good Morning {contact_name},\n\n"
 "Sincerely,\n"
 "BCC Data Team"
     )
-    msg.set_content(body)
+    if roster_path:
+        body += "\n\nAlso attached: the students in your programs who are still actively seeking or haven't reported a status."
+    set_body_with_digest(msg, body, digest)
     attach_file(msg, filepath)
+    if roster_path:
+        attach_file(msg, roster_path)
+    for chart in charts:
+        attach_file(msg, chart)
     return msg
 
+# Month-end closing line: the charts are attached, or (if they couldn't be drawn) they follow by hand
+CHARTS_NOTE = "Placement trend charts for the MSB and your programs, drawn from the weekly history, are attached."
+VISUALIZATION_NOTE = ("A visualization of this month end data will be sent out within the next business day. "
+                      "It will have a monthly placement historical data comparison.")
+
+# Draws a director's month-end charts from their updated workbook. A chart problem shouldn't hold up the report.
+def month_end_charts(filepath, programs):
+    try:
+        with stage("charts", os.path.basename(filepath)):
+            return render_charts(workbook_specs(filepath, chart_list(programs)))
+    except Exception as e:
+        print(f"[WARN] Month-end charts skipped for {os.path.basename(filepath)}: {e}")
+        return []
+
 # Builds the BOX message
 def build_box(filepath):
     msg = EmailMessage()
@@ -150,7 +126,11 @@ def attach_file(msg, path):
     if not ctype:
         ctype = "application/octet-stream"
     maintype, subtype = ctype.split("/", 1)
-    with open(path, "rb") as f:
+    if LOW_MEMORY:
+        # Only the path is recorded here; the file is encoded in chunks while sending
+        defer_attachment(msg, path)
+        return
+    with stage("attachment_encode", os.path.basename(path)), open(path, "rb") as f:
         msg.add_attachment(
             f.read(),
             maintype=maintype,
@@ -165,7 +145,11 @@ def send(smtp, msg, to_addrs: Iterable[str]):
         if a and a not in seen:
             seen.add(a)
             all_rcpts.append(a)
-    smtp.send_message(msg, from_addr=SENDER, to_addrs=all_rcpts)
+    with stage("smtp_send", str(msg["Subject"] or "")):
+        if pending_attachments(msg):
+            send_streamed(smtp, msg, SENDER, all_rcpts)
+        else:
+            smtp.send_message(msg, from_addr=SENDER, to_addrs=all_rcpts)
 
 # The crontab runs this script every day. This checks if the script should run today, and how it should run depending on the day.
 def run_check(today, is_monthend):
@@ -180,7 +164,8 @@ def run_check(today, is_monthend):
         return None
     
 
-# Connects to the SMTP server -> parses through dictionary -> update the proper excel -> builds the emails -> sends the emails -> repeats for each career director
+# Updates every director's excel (sharded, see shard_runner.py) -> connects to the SMTP server -> builds and sends the emails
+# for each director whose excel was built. A failed build doesn't stop the others; the run fails at the end instead.
 def mainflow():
     if not APP_PASSWORD:
         raise RuntimeError("SMTP_PASS not set")
@@ -191,38 +176,78 @@ def mainflow():
     last_day = calendar.monthrange(today.year, today.month)[1]
     is_monthend = today.day == last_day
 
-    a = run_check(today, is_monthend)
+    with stage("schedule_check"):
+        a = dry_run.schedule(run_check(today, is_monthend))
     if a is None:
         print("Not Friday or month-end; exiting...")
         return
     
-    context = ssl.create_default_context()
-    with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as s:
-        s.ehlo()
-        s.starttls(context=context)
-        s.ehlo()
-        s.login(SENDER, APP_PASSWORD)
-
-        for contact_name, data in program_dict.items():
-            programs = data["programs"]
-            subj_label = program_to_subjectHeader(programs)
-            file_label = program_to_filename(programs)
-            emails = data["emails"]
+    # Directors, programs and emails from routing.toml (re-read if it was edited since the last run)
+    directors = current_routing().directors
 
-            filename = OUTPATH_TEMPLATE.format(file_label=file_label)
-            os.environ["OUTPUT_PATH"] = filename
+    # Build every workbook first, from one shared data snapshot
+    jobs = {name: director.programs for name, director in directors.items()}
+    with stage("update_reports", f"{len(jobs)} directors"):
+        results = {r["name"]: r for r in run_sharded(jobs)}
+    close_statements()
 
-            build_program_report(programs)
+    # Box uploads are skipped for workbooks Box already has (box_manifest.py)
+    box = BoxManifest()
 
-            message = build_message(filename, emails, contact_name, subj_label, a)
-            box_msg = build_box(filename)
+    context = ssl.create_default_context()
+    with dry_run.smtp_connect(SMTP_SERVER, SMTP_PORT) as s:
+        with stage("smtp_connect", SMTP_SERVER):
+            s.ehlo()
+            s.starttls(context=context)
+            s.ehlo()
+            s.login(SENDER, APP_PASSWORD)
+
+        for contact_name, director in directors.items():
+            if not results[contact_name]["ok"]:
+                print(f"[WARN] Skipped {contact_name}: {results[contact_name]['error']}")
+                continue
+            programs = director.programs
+            subj_label = director.subject_label
+            file_label = director.file_label
+            emails = director.emails
+
+            filename = OUTPATH_TEMPLATE.format(file_label=file_label)
 
-            send(s, box_msg, [BOX_UPLOAD_EMAIL])
+            # The roster is optional: if it can't be built, the director still gets the report
+            roster = None
+            if ROSTER_SHEETS:
+                try:
+                    roster = build_roster(programs)
+                except Exception as e:
+                    print(f"[WARN] No roster for {contact_name}: {e}")
+
+            charts = month_end_charts(filename, programs) if a in (1, 2) else []
+            digest = results[contact_name]["value"][2]
+            message = build_message(filename, emails, contact_name, subj_label, a, roster, charts, digest)
+
+            if box.unchanged(BOX_UPLOAD_EMAIL, filename):
+                print(f"Box already has {os.path.basename(filename)}; upload skipped")
+            else:
+                send(s, build_box(filename), [BOX_UPLOAD_EMAIL])
+                box.record(BOX_UPLOAD_EMAIL, filename)
             human_envelope = list(emails) + CC_ADDRS + BCC_ADDRS
             send(s, message, human_envelope)
             
             print(f"Email sent to {contact_name}! And Box Updated")
 
+    print(box.summary_line())
+
+    close_statements()
+    failed = [name for name, r in results.items() if not r["ok"]]
+    if failed:
+        raise RuntimeError(f"Reports not built for: {', '.join(failed)}")
+
 
 if __name__=="__main__":
-    mainflow()
+    METRICS.start("career-director")
+    status = "error"
+    try:
+        mainflow()
+        status = "ok"
+    finally:
+        METRICS.write(status)
@@ -0,0 +1,84 @@
+# "Still seeking" rosters for the career directors (ROSTER_SHEETS=1).
+# The counts say how many students still need help placing; the roster says who. For each director, every full time
+# cohort student in their programs whose job search status is "Actively seeking" or has no information is listed in
+# Roster-<programs>.xlsx, which is attached to the director's email (never to the Box upload).
+#
+# Big programs (MBA, BSAcc) can have a lot of these students, so nothing here holds the whole list:
+#  - the rows come through a streaming cursor (statements.stream), a batch at a time;
+#  - they go straight into a write-only workbook, which writes each row out as it's appended.
+# openpyxl can't add a write-only sheet to a workbook it loaded, so the roster is its own file instead of a sheet in
+# WeeklyPlacement-<programs>.xlsx.
+#
+# ROSTER_COLUMNS adds view columns after the student key (e.g. "first_name,last_name,email"); the local mirror only has
+# the report columns, so leave it empty there.
+
+import os
+from pathlib import Path
+from typing import List, Sequence
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+from placement_common.cohorts import compile_query, full_time_where, placeholders
+from placement_common.query_profiler import env_flag
+
+ROSTER_SHEETS = env_flag("ROSTER_SHEETS")
+ROSTER_COLUMNS = [c.strip() for c in os.getenv("ROSTER_COLUMNS", "").split(",") if c.strip()]
+ROSTER_BATCH_SIZE = int(os.getenv("ROSTER_BATCH_SIZE", "500"))
+
+ROSTER_SHEET = "Still Seeking"
+HEADER_FONT = Font(bold=True)
+
+# Everyone in the full time cohort who is actively seeking or hasn't reported (same "no info" values as the summary)
+SQL_ROSTER_TEMPLATE = """
+SELECT
+    {KEY} AS student_key,{EXTRA}
+    program,
+    class_of,
+    COALESCE(job_search_status, 'Not Reported') AS job_search_status
+FROM msmdatabase.bcc_student_view
+{COHORT}  AND program IN {IN_LIST}
+  AND COALESCE(job_search_status, '') IN ('Actively seeking', 'Not Reported', 'No Recent Information Available', '')
+ORDER BY program, job_search_status, class_of, {KEY};
+"""
+
+def roster_query(programs: Sequence[str], key_column: str, extra_columns: Sequence[str] = ()):
+    extra = "".join(f"\n    {c}," for c in extra_columns)
+    return compile_query(SQL_ROSTER_TEMPLATE, full_time_where(), "SQL_ROSTER",
+                         KEY=key_column, EXTRA=extra, IN_LIST=placeholders(len(programs)))
+
+def roster_path(base_dir: Path, file_label: str) -> Path:
+    return Path(base_dir) / f"Roster-{file_label}.xlsx"
+
+def _header(ws, labels: List[str]) -> List[WriteOnlyCell]:
+    cells = []
+    for label in labels:
+        cell = WriteOnlyCell(ws, value=label)
+        cell.font = HEADER_FONT
+        cells.append(cell)
+    return cells
+
+# Streams the roster for the given programs into a write-only workbook at path. Returns how many students were listed.
+def write_roster(statements, programs: Sequence[str], path: Path, key_column: str, title: str = "") -> int:
+    path = Path(path)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(ROSTER_SHEET)
+    ws.freeze_panes = "A3"
+    for col, width in enumerate([14] + [18] * len(ROSTER_COLUMNS) + [10, 10, 32], start=1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+
+    ws.append([title or f"Still seeking: {', '.join(programs)}"])
+    ws.append(_header(ws, ["Student"] + list(ROSTER_COLUMNS) + ["Program", "Class", "Status"]))
+    count = 0
+    for row in statements.stream(roster_query(programs, key_column, ROSTER_COLUMNS), tuple(programs), ROSTER_BATCH_SIZE):
+        ws.append(list(row))
+        count += 1
+    if count == 0:
+        ws.append(["No students are actively seeking or missing information."])
+
+    tmp = path.with_name(path.name + ".tmp")
+    wb.save(tmp)
+    os.replace(tmp, path)
+    return count
@@ -0,0 +1,108 @@
+# Sharded builds of the director workbooks (SHARD_WORKERS=N).
+# The email script used to build one director's workbook after another, and the first bad template (a missing sheet
+# or table raises RuntimeError in main()) stopped every report after it. With many schools and hundreds of programs
+# that's both slow and fragile. Here the directors are split into shards balanced by program count, and every shard
+# runs in its own forked worker process:
+#  - every worker reads the same data snapshot, taken once by the parent before forking (copy-on-write, nothing pickled);
+#  - each director is built inside its own try/except, so a failure is recorded and the shard moves on;
+#  - a worker that dies outright only fails the directors of its own shard;
+#  - progress is printed per shard as each director finishes.
+# Workers don't touch fingerprints.json; they send their fingerprints back and the parent saves the successful ones.
+#
+# Needs the "fork" start method (Linux). Without it, and for SHARD_WORKERS <= 1, the shards run one after another in
+# this process, with the same per-director failure isolation.
+
+import os
+import sys
+import time
+import traceback
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Sequence
+
+from placement_common.run_metrics import METRICS
+
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "0"))
+
+# How many shards to cut the directors into (0: one per worker)
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0"))
+
+# Set by run_shards() right before the pool forks; the workers read it instead of having it pickled
+_JOB: Dict = {}
+
+def parallel_available(workers: int = SHARD_WORKERS) -> bool:
+    return workers > 1 and "fork" in mp.get_all_start_methods()
+
+# Splits the jobs ({name: programs}) into shards with about the same number of programs each.
+# Largest jobs are placed first, each into the lightest shard so far; the order within a shard follows the input.
+def partition(jobs: Dict[str, Sequence[str]], shard_count: int) -> List[List[str]]:
+    shard_count = max(1, min(shard_count, len(jobs)))
+    loads = [0] * shard_count
+    placed: Dict[str, int] = {}
+    for name in sorted(jobs, key=lambda n: -len(jobs[n])):
+        target = loads.index(min(loads))
+        placed[name] = target
+        loads[target] += max(1, len(jobs[name]))
+    return [[name for name in jobs if placed[name] == i] for i in range(shard_count)]
+
+# Builds every job of one shard. Returns one result dict per job; never raises for a failed job.
+def _run_shard(index: int) -> List[Dict]:
+    names: List[str] = _JOB["shards"][index]
+    build: Callable[[str], object] = _JOB["build"]
+    label = f"[shard {index + 1}/{len(_JOB['shards'])}]"
+    results = []
+    for done, name in enumerate(names, start=1):
+        first_stage = len(METRICS.stages)
+        started = time.perf_counter()
+        result = {"name": name, "shard": index, "ok": False, "error": None, "value": None}
+        try:
+            result["value"] = build(name)
+            result["ok"] = True
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+            traceback.print_exc(file=sys.stderr)
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        result["stages"] = METRICS.stages[first_stage:]
+        results.append(result)
+        status = "ok" if result["ok"] else f"FAILED ({result['error']})"
+        print(f"{label} {done}/{len(names)} {name}: {status}", flush=True)
+    return results
+
+# Runs build(name) for every job, sharded across worker processes. Returns the results in the jobs' order.
+def run_shards(jobs: Dict[str, Sequence[str]], build: Callable[[str], object],
+               workers: int = SHARD_WORKERS, shard_count: int = SHARD_COUNT) -> List[Dict]:
+    if not jobs:
+        return []
+    parallel = parallel_available(workers)
+    shards = partition(jobs, shard_count or (workers if parallel else 1))
+    _JOB.update(shards=shards, build=build)
+    by_name: Dict[str, Dict] = {}
+    try:
+        if parallel:
+            ctx = mp.get_context("fork")
+            with ProcessPoolExecutor(max_workers=min(workers, len(shards)), mp_context=ctx) as pool:
+                futures = [pool.submit(_run_shard, i) for i in range(len(shards))]
+                for i, future in enumerate(futures):
+                    try:
+                        shard_results = future.result()
+                    except Exception as e:
+                        # The worker itself died; only this shard's jobs are lost
+                        shard_results = [{"name": name, "shard": i, "ok": False, "value": None, "seconds": 0.0,
+                                          "error": f"shard worker failed: {type(e).__name__}: {e}", "stages": []}
+                                         for name in shards[i]]
+                    for result in shard_results:
+                        METRICS.stages.extend(result.pop("stages"))
+                        by_name[result["name"]] = result
+        else:
+            for i in range(len(shards)):
+                for result in _run_shard(i):
+                    result.pop("stages")
+                    by_name[result["name"]] = result
+    finally:
+        _JOB.clear()
+    return [by_name[name] for name in jobs]
+
+def summary_line(results: List[Dict]) -> str:
+    failed = [r["name"] for r in results if not r["ok"]]
+    shards = len({r["shard"] for r in results})
+    return f"{len(results) - len(failed)}/{len(results)} built in {shards} shard(s); failed: {', '.join(failed) or 'none'}"
@@ -0,0 +1,170 @@
+# Per-student status snapshots and week-over-week movement counts.
+# The workbooks only show how many students are in each status, not who moved where. Each run now stores a compact
+# snapshot -- one (student key, program code, status code) row per student, per kind (full time / internship) -- and
+# diffs it against the previous run's snapshot:
+#   "Actively seeking -> Accepted an offer: 12" per program.
+# The diff is a hash join: the previous snapshot is loaded into a dict keyed by student (one pass), then the current
+# rows probe it (one pass). Only the latest snapshot before today is read, never the whole history, and snapshots older
+# than the last STATUS_SNAPSHOT_KEEP runs are pruned.
+# Students new to the cohort come from "(new)", students who left it go to "(left)".
+#
+# Status and program names are stored once each in a code table, so a snapshot row is three small values.
+
+import os
+import sqlite3
+import datetime as dt
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from placement_common.cohorts import compile_query, full_time_where, internship_where
+from placement_common.paths import REPORT_DIR
+from placement_common.student_mirror import KEY_COLUMN
+
+STATUS_SNAPSHOT_PATH = Path(os.getenv("STATUS_SNAPSHOT_PATH", str(REPORT_DIR / "status_snapshots.sqlite3")))
+
+# How many run dates to keep (the diff only needs the last one; the rest is slack for reruns and audits)
+STATUS_SNAPSHOT_KEEP = int(os.getenv("STATUS_SNAPSHOT_KEEP", "8"))
+
+# Unique key for a student row: the view's key column live (KEY_COLUMN, from MIRROR_KEY_COLUMN), "student_key" in the
+# local mirror
+MIRROR_KEY_COLUMN = "student_key"
+
+KIND_FT = "Full Time"
+KIND_INT = "Internship"
+
+NEW_STUDENT = "(new)"
+LEFT_STUDENT = "(left)"
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS codes (
+    code INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS student_status (
+    snapshot_date TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    student_key TEXT NOT NULL,
+    program INTEGER NOT NULL,
+    status INTEGER NOT NULL,
+    PRIMARY KEY (snapshot_date, kind, student_key)
+) WITHOUT ROWID;
+"""
+
+SQL_STUDENT_FT_TEMPLATE = """
+SELECT {KEY} AS student_key, program, COALESCE(job_search_status, 'Not Reported') AS job_search_status
+FROM msmdatabase.bcc_student_view
+{COHORT};
+"""
+
+SQL_STUDENT_INT_TEMPLATE = """
+SELECT {KEY} AS student_key, program, COALESCE(internship_search_status, 'Not Reported') AS internship_search_status
+FROM msmdatabase.bcc_student_view
+{COHORT};
+"""
+
+# One movement count: (kind, from status, to status, students)
+class Movement(NamedTuple):
+    kind: str
+    from_status: str
+    to_status: str
+    count: int
+
+# Movements per program, and the snapshot they were measured against (None on the first run)
+class StatusDeltas(NamedTuple):
+    since: Optional[dt.date]
+    by_program: Dict[str, List[Movement]]
+
+def student_queries(key_column: str = KEY_COLUMN):
+    return {
+        KIND_FT: compile_query(SQL_STUDENT_FT_TEMPLATE, full_time_where(), "SQL_STUDENT_FT", KEY=key_column),
+        KIND_INT: compile_query(SQL_STUDENT_INT_TEMPLATE, internship_where(), "SQL_STUDENT_INT", KEY=key_column),
+    }
+
+def open_snapshot_db(path: Path = STATUS_SNAPSHOT_PATH) -> sqlite3.Connection:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(str(path))
+    db.executescript(SCHEMA_SQL)
+    return db
+
+class _Codes:
+    """name <-> small integer code, backed by the codes table"""
+
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+        self.by_name = {name: code for code, name in db.execute("SELECT code, name FROM codes")}
+        self.by_code = {code: name for name, code in self.by_name.items()}
+
+    def code(self, name: str) -> int:
+        code = self.by_name.get(name)
+        if code is None:
+            code = self.db.execute("INSERT INTO codes (name) VALUES (?)", (name,)).lastrowid
+            self.by_name[name] = code
+            self.by_code[code] = name
+        return code
+
+# Latest snapshot strictly before the given day (reruns on the same day diff against the same previous run)
+def previous_snapshot(db: sqlite3.Connection, before: dt.date) -> Optional[dt.date]:
+    row = db.execute(
+        "SELECT MAX(snapshot_date) FROM student_status WHERE snapshot_date < ?", (before.isoformat(),)
+    ).fetchone()
+    return dt.date.fromisoformat(row[0]) if row and row[0] else None
+
+# Hash join of one kind's previous and current rows -> Counter[(program, from, to)]
+def diff_kind(previous: Iterable[Tuple[str, int, int]], current: Iterable[Tuple[str, int, int]],
+              codes: _Codes) -> Counter:
+    before = {key: (program, status) for key, program, status in previous}
+    moved: Counter = Counter()
+    for key, program, status in current:
+        old = before.pop(key, None)
+        if old is None:
+            moved[(program, None, status)] += 1
+        elif old[1] != status:
+            moved[(program, old[1], status)] += 1
+    for program, status in before.values():
+        moved[(program, status, None)] += 1
+    name = lambda c, missing: missing if c is None else codes.by_code[c]
+    return Counter({
+        (codes.by_code[p], name(f, NEW_STUDENT), name(t, LEFT_STUDENT)): n for (p, f, t), n in moved.items()
+    })
+
+# Stores today's snapshot (replacing a same-day one) and returns the movements since the previous run
+def record_and_diff(db: sqlite3.Connection, today: dt.date, rows_by_kind: Dict[str, List[Tuple]]) -> StatusDeltas:
+    day = today.isoformat()
+    since = previous_snapshot(db, today)
+    by_program: Dict[str, List[Movement]] = {}
+    with db:
+        codes = _Codes(db)
+        db.execute("DELETE FROM student_status WHERE snapshot_date = ?", (day,))
+        for kind, rows in rows_by_kind.items():
+            current = [(str(key), codes.code(str(program)), codes.code(str(status))) for key, program, status in rows]
+            db.executemany(
+                "INSERT OR REPLACE INTO student_status (snapshot_date, kind, student_key, program, status) VALUES (?, ?, ?, ?, ?)",
+                [(day, kind) + r for r in current],
+            )
+            if since is None:
+                continue
+            previous = db.execute(
+                "SELECT student_key, program, status FROM student_status WHERE snapshot_date = ? AND kind = ?",
+                (since.isoformat(), kind),
+            )
+            for (program, frm, to), n in sorted(diff_kind(previous, current, codes).items()):
+                by_program.setdefault(program, []).append(Movement(kind, frm, to, n))
+        # Keep only the last STATUS_SNAPSHOT_KEEP run dates
+        db.execute(
+            "DELETE FROM student_status WHERE snapshot_date NOT IN "
+            "(SELECT DISTINCT snapshot_date FROM student_status ORDER BY snapshot_date DESC LIMIT ?)",
+            (STATUS_SNAPSHOT_KEEP,),
+        )
+    return StatusDeltas(since, by_program)
+
+# Pulls the per-student statuses through the run's statements, then records and diffs them
+def student_deltas(statements, today: dt.date, key_column: str = KEY_COLUMN,
+                   path: Path = STATUS_SNAPSHOT_PATH) -> StatusDeltas:
+    rows_by_kind = {kind: statements.fetch(q) for kind, q in student_queries(key_column).items()}
+    db = open_snapshot_db(path)
+    try:
+        return record_and_diff(db, today, rows_by_kind)
+    finally:
+        db.close()
@@ -1,14 +1,39 @@
 import os
+import gc
+import sys
+import argparse
 from pathlib import Path
+from typing import Dict, List, NamedTuple
 from dotenv import load_dotenv
 import mysql.connector
 from openpyxl import load_workbook
+from openpyxl.styles import Font
 from openpyxl.worksheet.table import Table, TableColumn
 from openpyxl.worksheet.worksheet import Worksheet
 from openpyxl.utils import get_column_letter, column_index_from_string
-from openpyxl.styles import Alignment, Border, Side
 from datetime import date
 import re
+# The shared modules are in placement_common/ at the repository root; those that keep state keep it in this folder
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from placement_common.paths import use_report_dir
+use_report_dir(__file__)
+from placement_common.cohorts import PreparedStatements, compile_query, full_time_where, internship_where, FT_GRAD_CLASS, cohort_for, parse_cohorts
+from placement_common.cohort_batch import fetch_batch
+from placement_common.query_profiler import QueryProfiler, env_flag
+from placement_common.student_mirror import open_mirror
+from placement_common.change_detection import ChangeTracker, save_scopes
+from placement_common import rollup
+from placement_common.run_metrics import METRICS, stage, LOW_MEMORY
+from placement_common.cell_writes import CellWriteBuffer
+import shard_runner
+from roster import roster_path, write_roster
+from status_snapshots import StatusDeltas, student_deltas, KEY_COLUMN, MIRROR_KEY_COLUMN
+from placement_common.email_digest import DigestRow, digest_rows, digest_values, save_digest
+from placement_common.anomaly_guard import check_workbook
+from placement_common.wh_backfill import parse_week_label
+from placement_common.routing import current_routing
+from placement_common.safe_save import safe_save
+from placement_common.mrf_diff import CHANGES_SHEET_ENABLED, load_schema, mrf_deltas, previous_mrf, save_schema, write_changes_sheet
 
 
 # =========================
@@ -27,16 +52,38 @@ DB_NAME = os.environ["DB_NAME"]
 FILEPATH_TEMPLATE = os.getenv("OUTPUT_PATH", str(BASE_DIR / "WeeklyPlacement-{file_label}.xlsx"))
 
 # Run data formatted correctly for column headers
-RUN_DATE_LABEL = date.today().strftime("%m/%d/%Y")
+RUN_DATE = date.today()
+RUN_DATE_LABEL = RUN_DATE.strftime("%m/%d/%Y")
 
 # Percent inputs (must match SQL/Excel labels exactly)
 STATUS_ACCEPTED = "Accepted an offer"     
 STATUS_SEEKING = "Actively seeking"        
 STATUS_NOT_REPORTED = "Not Reported"       
 
-# Stylistic Variables
-RIGHT_ALIGN = Alignment(horizontal="right")
-THIN_BORDER = Border(bottom=Side(style="thin", color="000000"))
+# The overall sheet every director's workbook has (tables Class1..Class4), named after the graduating class
+def class_sheet(grad_class=FT_GRAD_CLASS):
+    return f"{grad_class} MSB Overall"
+
+CLASS_SHEET = class_sheet()
+
+# Graduating classes for a batch run (--cohorts on the command line wins). Empty means the normal single-cohort run.
+COHORTS = os.getenv("COHORTS", "").strip()
+
+# Week-over-week student movements (status_snapshots.py) go on this sheet, rebuilt every run
+STATUS_SHEET = "Status Changes"
+HEADER_FONT = Font(bold=True)
+
+# Stylistic Variables (RIGHT_ALIGN, THIN_BORDER, "0.00%") live in cell_writes.py, shared by every table update
+
+# Where the data comes from: "mysql" (the live view), "mirror" (the local copy kept by student_mirror.py)
+# or "rollup" (the nightly precomputed counts kept by rollup.py)
+PLACEMENT_SOURCE = os.getenv("PLACEMENT_SOURCE", "mysql").strip().lower()
+
+# Per-workbook fingerprints from the last run, used to skip MRF rewrites for tables whose numbers didn't move
+FINGERPRINT_PATH = BASE_DIR / "fingerprints.json"
+
+# Where QUERY_PROFILE=1 writes its per-run query profiles
+PROFILE_DIR = BASE_DIR / "profiles"
 
 # Rows that the script knows to avoid, as they use a different calculation for their field
 IGNORE_LABELS = {"total", "class size", "% placed", "placement %"}  
@@ -46,78 +93,57 @@ IGNORE_LABELS = {"total", "class size", "% placed", "placement %"}
 # 2) SQL Queries
 # =========================
 
-SQL_TOTAL_FULL = """
+SQL_TOTAL_FULL_TEMPLATE = """
 SELECT
     COALESCE(job_search_status, 'Not Reported') AS job_search_status,
     COUNT(*) AS count
 FROM msmdatabase.bcc_student_view
-WHERE ((class_of = 2026 and enroll_status IN ("Enrolled", "Graduated")) or (class_of IN (2024, 2025) and enroll_status = "Enrolled"))
-  AND program NOT IN ('EMBA','EMPA','StratMnr')
-  AND enroll_status IN ('Enrolled','Graduated')
-  AND record_status = 'A'
-  AND semester_byu NOT IN (20265, 20275, 20285)
-GROUP BY COALESCE(job_search_status, 'Not Reported')
+{COHORT}GROUP BY COALESCE(job_search_status, 'Not Reported')
 ORDER BY job_search_status;
 """
 
-SQL_TOTAL_INT = """
+SQL_TOTAL_INT_TEMPLATE = """
 SELECT
     COALESCE(internship_search_status, 'Not Reported') AS internship_search_status,
     COUNT(*) AS count
 FROM msmdatabase.bcc_student_view
-WHERE class_of IN ('2027', '2028', '2029')
-  AND program NOT IN ('EMBA','EMPA','StratMnr')
-  AND enroll_status IN ('Enrolled','Graduated')
-  AND record_status = 'A'
-  AND semester_byu NOT IN (20265, 20275, 20285)
-GROUP BY COALESCE(internship_search_status, 'Not Reported')
+{COHORT}GROUP BY COALESCE(internship_search_status, 'Not Reported')
 ORDER BY internship_search_status;
 """
 
-SQL_BY_PROGRAM_FULL = """
+SQL_BY_PROGRAM_FULL_TEMPLATE = """
 SELECT
     COALESCE(job_search_status, 'Not Reported') AS job_search_status,
     COUNT(*) AS count
 FROM msmdatabase.bcc_student_view
-WHERE ((class_of = 2026 and enroll_status IN ("Enrolled", "Graduated")) or (class_of IN (2024, 2025) and enroll_status = "Enrolled"))
-  AND program NOT IN ('EMBA','EMPA','StratMnr')
-  AND program = %s
-  AND enroll_status IN ('Enrolled','Graduated')
-  AND record_status = 'A'
-  AND semester_byu NOT IN (20265, 20275, 20285)
+{COHORT}  AND program = %s
 GROUP BY COALESCE(job_search_status, 'Not Reported')
 ORDER BY job_search_status;
 """
 
-SQL_BY_PROGRAM_INT = """
+SQL_BY_PROGRAM_INT_TEMPLATE = """
 SELECT
     COALESCE(internship_search_status, 'Not Reported') AS internship_search_status,
     COUNT(*) AS count
 FROM msmdatabase.bcc_student_view
-WHERE class_of IN ('2027', '2028', '2029')
-  AND program NOT IN ('EMBA','EMPA','StratMnr')
-  AND program = %s
-  AND enroll_status IN ('Enrolled','Graduated')
-  AND record_status = 'A'
-  AND semester_byu NOT IN (20265, 20275, 20285)
+{COHORT}  AND program = %s
 GROUP BY COALESCE(internship_search_status, 'Not Reported')
 ORDER BY internship_search_status;
 """
 
-SQL_BSFIN_INT = """
-SELECT
-    COALESCE(internship_search_status, 'Not Reported') AS internship_search_status,
-    COUNT(*) AS count
-FROM msmdatabase.bcc_student_view
-WHERE class_of = %s
-  AND program NOT IN ('EMBA','EMPA','StratMnr')
-  AND program = 'BSFin'
-  AND enroll_status IN ('Enrolled','Graduated')
-  AND record_status = 'A'
-  AND semester_byu NOT IN (20265, 20275, 20285)
-GROUP BY COALESCE(internship_search_status, 'Not Reported')
-ORDER BY internship_search_status;
-"""
+# Compiled once at import (cohort filters live in cohorts.py); per-program queries take the program as the last parameter
+SQL_TOTAL_FULL = compile_query(SQL_TOTAL_FULL_TEMPLATE, full_time_where(), "SQL_TOTAL_FULL")
+SQL_TOTAL_INT = compile_query(SQL_TOTAL_INT_TEMPLATE, internship_where(), "SQL_TOTAL_INT")
+SQL_BY_PROGRAM_FULL = compile_query(SQL_BY_PROGRAM_FULL_TEMPLATE, full_time_where(), "SQL_BY_PROGRAM_FULL")
+SQL_BY_PROGRAM_INT = compile_query(SQL_BY_PROGRAM_INT_TEMPLATE, internship_where(), "SQL_BY_PROGRAM_INT")
+
+# BSFin wants its internship numbers split by class: the two classes after the graduating class.
+# Every class compiles to the same SQL text, so they share one prepared statement.
+def bsfin_int_classes(grad_class=FT_GRAD_CLASS):
+    return (grad_class + 1, grad_class + 2)
+
+BSFIN_INT_CLASSES = bsfin_int_classes()
+SQL_BSFIN_INT = {c: compile_query(SQL_BY_PROGRAM_INT_TEMPLATE, internship_where((c,)), "SQL_BSFIN_INT") for c in BSFIN_INT_CLASSES}
 
 # =========================
 # 3) SMALL Functions
@@ -125,24 +151,10 @@ ORDER BY internship_search_status;
 
 # 4 tables per sheet: 1: MRF FT,  2: WH FT,  3: MRF INT,  4: WH INT
 # Class sheet uses 'Class1'..'Class4'
-# MBA/MPA use underscores because excel doesn't like them; others do not.
 # BSFin wants a special internship report ran, so they have two extra tables
+# The names are compiled from routing.toml (routing.py), so this is a lookup
 def table_names(programs):
-    """
-    4 tables per sheet:
-      1: MRF FT,  2: WH FT,  3: MRF INT,  4: WH INT
-    Class sheet uses 'Class1'..'Class4'
-    MBA/MPA use underscores; others do not.
-    """
-    tbl_nms = {"Class": ("Class1", "Class2", "Class3", "Class4")}
-    for program in programs:
-        if program in ("MPA", "MBA"):
-            tbl_nms[program] = (f"{program}_1", f"{program}_2", f"{program}_3", f"{program}_4")
-        elif program == "BSFin":
-            tbl_nms[program] = (f"{program}1", f"{program}2", f"{program}3", f"{program}4", f"{program}5", f"{program}6")
-        else:
-            tbl_nms[program] = (f"{program}1", f"{program}2", f"{program}3", f"{program}4")
-    return tbl_nms
+    return current_routing().table_names(programs)
 
 # Turns a program title (i.e BSacc) into its corresponding file name
 def program_to_filename(programs):
@@ -150,10 +162,42 @@ def program_to_filename(programs):
         raise RuntimeError("No programs provided.")
     return programs[0] if len(programs) == 1 else "-".join(programs)
 
-# Executes the SQL queries
-def fetch_rows(cur, sql, params=()):
-    cur.execute(sql, params)
-    return list(cur.fetchall())
+# Executes the SQL queries through the prepared statements (timed as a "query" stage)
+def fetch_rows(statements, query, params=()):
+    detail = f"{query.name}:{params[0]}" if len(params) == 1 else query.name
+    with stage("query", detail):
+        return statements.fetch(query, params)
+
+# One connection (and its prepared statements) is kept for every director build in the same run,
+# so each statement is only prepared once instead of once per director.
+_STATEMENTS = None
+
+def get_statements():
+    global _STATEMENTS
+    if _STATEMENTS is not None and _STATEMENTS.is_connected():
+        return _STATEMENTS
+    with stage("db_connect", PLACEMENT_SOURCE):
+        if PLACEMENT_SOURCE == "mirror":
+            _STATEMENTS = open_mirror()
+        else:
+            conn = mysql.connector.connect(
+                host=DB_HOST, user=DB_USER, password=DB_PASSWORD, database=DB_NAME, autocommit=False
+            )
+            _STATEMENTS = PreparedStatements(conn)
+    if env_flag("QUERY_PROFILE"):
+        _STATEMENTS = QueryProfiler(_STATEMENTS, explain=env_flag("QUERY_PROFILE_EXPLAIN"))
+    return _STATEMENTS
+
+# Closes the shared connection once the run is finished (and writes the query profile for the whole run, if on)
+def close_statements():
+    global _STATEMENTS
+    if _STATEMENTS is None:
+        return
+    if isinstance(_STATEMENTS, QueryProfiler):
+        _STATEMENTS.write_profile(PROFILE_DIR)
+    _STATEMENTS.close()
+    _STATEMENTS.conn.close()
+    _STATEMENTS = None
 
 # Connects to a specific table on a worksheet in excel
 def get_table(ws: Worksheet, name: str) -> Table:
@@ -200,19 +244,22 @@ def detect_header_row(ws: Worksheet, min_row: int, max_row: int, min_col: int, e
     return min_row  #fallback
 
 # For MRF: set the single data column header to run date.
-# For WH: append a rightmost column with run date if force_append=True.
-def ensure_header(ws: Worksheet, header_row: int, data_cols, header_label: str, force_append: bool=False):
+# For WH: append a rightmost column with run date if force_append=True. A WH table whose last column already has
+# this header (a rerun on the same day) keeps it, and it gets rewritten. The header is written through buf.
+def ensure_header(buf: CellWriteBuffer, header_row: int, data_cols, header_label: str, force_append: bool=False):
     if force_append:
+        if parse_week_label(buf.get(header_row, data_cols[-1])) == parse_week_label(header_label):
+            return data_cols
         new_col_idx = data_cols[-1] + 1
-        ws.cell(row=header_row, column=new_col_idx, value=header_label)
+        buf.value(header_row, new_col_idx, header_label)
         return data_cols + [new_col_idx]
 
     if len(data_cols) == 1:
-        ws.cell(row=header_row, column=data_cols[0], value=header_label)
+        buf.value(header_row, data_cols[0], header_label)
         return data_cols
 
     new_col_idx = data_cols[-1] + 1
-    ws.cell(row=header_row, column=new_col_idx, value=header_label)
+    buf.value(header_row, new_col_idx, header_label)
     return data_cols + [new_col_idx]
 
 # Ensures that the metadata of each table matches what actually now exists in the excel.
@@ -257,14 +304,14 @@ def set_table_ref(ws: Worksheet, tbl: Table, min_row: int, max_row: int, min_col
         raise RuntimeError(f"Table metadata columns={len(tc_list)} but width={width} for {tbl.ref}")
 
 # Ran this once to change a cell value. Now it acts as a security check to ensure the labels haven't been changed.
-def relabel_total_row_to_class_size(ws: Worksheet, label_col, min_row, max_row):
+def relabel_total_row_to_class_size(ws: Worksheet, label_col, min_row, max_row, buf: CellWriteBuffer):
     for r in range(min_row, max_row + 1):
-        v = ws.cell(row=r, column=label_col).value
+        v = buf.get(r, label_col)
         if isinstance(v, str) and v.strip().lower() == "total":
-            ws.cell(row=r, column=label_col, value="Class Size")
+            buf.value(r, label_col, "Class Size")
             return r
     for r in range(min_row, max_row + 1):
-        v = ws.cell(row=r, column=label_col).value
+        v = buf.get(r, label_col)
         if isinstance(v, str) and v.strip() == "Class Size":
             return r
     return max_row - 1
@@ -278,11 +325,6 @@ def find_percent_row(ws: Worksheet, label_col, min_row, max_row):
     # else, assume last row
     return max_row
 
-# If a cell doesn't have a value, put in a '-' character
-def write_dash(cell):
-    cell.value = "-"
-    cell.alignment = RIGHT_ALIGN
-
 # Converts each cell into an interager if it wasn't already
 def to_int(v):
     try:
@@ -299,64 +341,71 @@ def placement_percent(accepted: int, seeking: int, not_reported: int) -> float:
         return 0.0
     return round((accepted or 0) * 100.0 / denom, 2)
 
-# Format each percentage correctly
-def write_percent(cell, pct: float):
-    cell.value = pct / 100.0
-    cell.number_format = "0.00%"
-
 # =========================
 # 4) EXCEL UPDATERS (MRF/WH)
 # =========================
 
-# Updates all of the Most Recent Friday tables
-def update_mrf_table(ws: Worksheet, tbl_name: str, sql_rows):
-    """
-    MRF: two columns total (Status | value). Overwrite the single data column with RUN_DATE_LABEL,
-    fill values, then recompute Class Size and % Placed for that column.
-    """
+# Sets the MRF header to RUN_DATE_LABEL and syncs the table metadata. Returns (header_row, data_cols).
+# Called on its own when a table's numbers didn't change, so the table still shows the date it was checked.
+def refresh_mrf_header(ws: Worksheet, tbl_name: str, buf: CellWriteBuffer):
     tbl = get_table(ws, tbl_name)
     min_row, max_row, min_col, max_col = table_bounds(tbl.ref)
 
     header_expected = expected_header_for_table(ws, tbl_name)
     header_row = detect_header_row(ws, min_row, max_row, min_col, header_expected)
 
-    label_col = min_col
     data_cols = list(range(min_col + 1, max_col + 1))
     if len(data_cols) != 1:
         raise RuntimeError(f"MRF table '{tbl_name}' should have exactly 1 data column; found {len(data_cols)}.")
 
     # header
-    ensure_header(ws, header_row, data_cols, RUN_DATE_LABEL)
+    ensure_header(buf, header_row, data_cols, RUN_DATE_LABEL)
     # sync tableColumns name for that data column (keeps metadata tidy)
     tc_list = getattr(getattr(tbl, "tableColumns", None), "tableColumn", None) or getattr(tbl, "tableColumns", None)
     if tc_list:
         idx = data_cols[0] - min_col
-        tc_list[idx].name = str(ws.cell(row=header_row, column=data_cols[0]).value or f"Column{idx+1}").strip()
+        tc_list[idx].name = str(buf.get(header_row, data_cols[0]) or f"Column{idx+1}").strip()
+    return header_row, data_cols
+
+# Updates all of the Most Recent Friday tables
+def update_mrf_table(ws: Worksheet, tbl_name: str, sql_rows):
+    """
+    MRF: two columns total (Status | value). Overwrite the single data column with RUN_DATE_LABEL,
+    fill values, then recompute Class Size and % Placed for that column.
+    """
+    tbl = get_table(ws, tbl_name)
+    min_row, max_row, min_col, max_col = table_bounds(tbl.ref)
+
+    label_col = min_col
 
     # map SQL to dict
     sql_map = {str(r[0]).strip(): int(r[1]) for r in sql_rows}
 
-    # fill
-    for r in range(header_row + 1, max_row + 1):
-        label = ws.cell(row=r, column=label_col).value
-        if not label:
-            continue
-        s = str(label).strip()
-        if s.lower() in IGNORE_LABELS:
-            continue
-        if s in sql_map:
-            ws.cell(row=r, column=data_cols[0], value=int(sql_map[s]))
-        else:
-            write_dash(ws.cell(row=r, column=data_cols[0]))
-
-    # totals + % placed for this column
-    compute_totals_and_percent(ws, min_row, max_row, min_col, data_cols[-1])
+    with CellWriteBuffer(ws) as buf:
+        header_row, data_cols = refresh_mrf_header(ws, tbl_name, buf)
+
+        # fill
+        for r in range(header_row + 1, max_row + 1):
+            label = ws.cell(row=r, column=label_col).value
+            if not label:
+                continue
+            s = str(label).strip()
+            if s.lower() in IGNORE_LABELS:
+                continue
+            if s in sql_map:
+                buf.value(r, data_cols[0], int(sql_map[s]))
+            else:
+                buf.dash(r, data_cols[0])
+
+        # totals + % placed for this column
+        compute_totals_and_percent(ws, min_row, max_row, min_col, data_cols[-1], buf)
 
 # Updates each of the Weekly History tables
 def update_wh_table(ws: Worksheet, tbl_name: str, sql_rows):
     """
     WH: append a new column at the right, label it RUN_DATE_LABEL, fill,
     draw a thin line above Class Size, and compute totals/% placed for that new column.
+    On a rerun the same day, the column already labeled RUN_DATE_LABEL is overwritten instead.
     """
     tbl = get_table(ws, tbl_name)
     min_row, max_row, min_col, max_col = table_bounds(tbl.ref)
@@ -367,46 +416,48 @@ def update_wh_table(ws: Worksheet, tbl_name: str, sql_rows):
     label_col = min_col
     existing_data_cols = list(range(min_col + 1, max_col + 1))
 
-    # add header at right
-    new_cols = ensure_header(ws, header_row, existing_data_cols, RUN_DATE_LABEL, force_append=True)
-    newest_col = new_cols[-1]
-
-    # widen the table safely (preserves metadata)
-    set_table_ref(ws, tbl, min_row, max_row, min_col, newest_col)
-
     # map results
     sql_map = {str(r[0]).strip(): int(r[1]) for r in sql_rows}
 
-    # fill
-    for r in range(header_row + 1, max_row + 1):
-        label = ws.cell(row=r, column=label_col).value
-        if not label:
-            continue
-        s = str(label).strip()
-        if s.lower() in IGNORE_LABELS:
-            continue
-        if s in sql_map:
-            ws.cell(row=r, column=newest_col, value=int(sql_map[s]))
-        else:
-            write_dash(ws.cell(row=r, column=newest_col))
-
-    # thin border above Class Size for visual separation
-    total_row = relabel_total_row_to_class_size(ws, label_col, min_row, max_row)
-    ws.cell(row=total_row - 1, column=newest_col).border = THIN_BORDER
-
-    # totals + % placed for newest column
-    compute_totals_and_percent(ws, min_row, max_row, min_col, newest_col)
+    with CellWriteBuffer(ws) as buf:
+        # add header at right (or reuse today's)
+        new_cols = ensure_header(buf, header_row, existing_data_cols, RUN_DATE_LABEL, force_append=True)
+        newest_col = new_cols[-1]
+
+        # fill
+        for r in range(header_row + 1, max_row + 1):
+            label = ws.cell(row=r, column=label_col).value
+            if not label:
+                continue
+            s = str(label).strip()
+            if s.lower() in IGNORE_LABELS:
+                continue
+            if s in sql_map:
+                buf.value(r, newest_col, int(sql_map[s]))
+            else:
+                buf.dash(r, newest_col)
+
+        # thin border above Class Size for visual separation
+        total_row = relabel_total_row_to_class_size(ws, label_col, min_row, max_row, buf)
+        buf.border(total_row - 1, newest_col)
+
+        # totals + % placed for newest column
+        compute_totals_and_percent(ws, min_row, max_row, min_col, newest_col, buf)
+
+    # widen the table safely (preserves metadata); after the flush, so the new header names its metadata column
+    set_table_ref(ws, tbl, min_row, max_row, min_col, newest_col)
 
 # Calculates the special fields, such as % Placed and Class Size
-def compute_totals_and_percent(ws: Worksheet, min_row: int, max_row: int, min_col: int, col: int):
+def compute_totals_and_percent(ws: Worksheet, min_row: int, max_row: int, min_col: int, col: int, buf: CellWriteBuffer):
     """
     Total = sum of numeric rows (exclude 'Class Size' and '% Placed')
     % Placed = Accepted an offer / (Accepted an offer + Actively seeking + Not Reported)
+    Values are read and written through buf, which already holds this update's counts.
     """
     label_col = min_col
 
     # locate special rows
-    total_row = relabel_total_row_to_class_size(ws, label_col, min_row, max_row)
+    total_row = relabel_total_row_to_class_size(ws, label_col, min_row, max_row, buf)
     pct_row   = find_percent_row(ws, label_col, min_row, max_row)
 
     # collect status rows
@@ -423,87 +474,275 @@ def compute_totals_and_percent(ws: Worksheet, min_row: int, max_row: int, min_co
     # total
     total = 0
     for s, rr in status_to_row.items():
-        total += to_int(ws.cell(row=rr, column=col).value)
-    ws.cell(row=total_row, column=col, value=total)
+        total += to_int(buf.get(rr, col))
+    buf.value(total_row, col, total)
 
     # percent placed
-    acc = to_int(ws.cell(row=status_to_row.get(STATUS_ACCEPTED, 0), column=col).value if STATUS_ACCEPTED in status_to_row else 0)
-    seek = to_int(ws.cell(row=status_to_row.get(STATUS_SEEKING, 0), column=col).value if STATUS_SEEKING in status_to_row else 0)
-    nr  = to_int(ws.cell(row=status_to_row.get(STATUS_NOT_REPORTED, 0), column=col).value if STATUS_NOT_REPORTED in status_to_row else 0)
+    acc = to_int(buf.get(status_to_row[STATUS_ACCEPTED], col) if STATUS_ACCEPTED in status_to_row else 0)
+    seek = to_int(buf.get(status_to_row[STATUS_SEEKING], col) if STATUS_SEEKING in status_to_row else 0)
+    nr  = to_int(buf.get(status_to_row[STATUS_NOT_REPORTED], col) if STATUS_NOT_REPORTED in status_to_row else 0)
 
     pct = placement_percent(acc, seek, nr)
-    write_percent(ws.cell(row=pct_row, column=col), pct)
+    buf.percent(pct_row, col, pct)
+
+# Updates one MRF/WH pair. If the numbers didn't change since the last run, the MRF table only gets its date refreshed;
+# the WH table always gets its new column.
+def update_table_pair(ws: Worksheet, mrf_name, wh_name, sql_rows, changed=True):
+    with stage("table_update", mrf_name):
+        if changed:
+            update_mrf_table(ws, mrf_name, sql_rows)
+        else:
+            with CellWriteBuffer(ws) as buf:
+                refresh_mrf_header(ws, mrf_name, buf)
+    with stage("table_update", wh_name):
+        update_wh_table(ws, wh_name, sql_rows)
 
 # Updates the correct sheet with the correct information
-def update_sheet_with_ft_int(ws: Worksheet, table_tuple, ft_rows, int_rows):
+def update_sheet_with_ft_int(ws: Worksheet, table_tuple, ft_rows, int_rows, changed=(True, True)):
     """
     Update 4 tables on a sheet:
       0: MRF FT (ft_rows)
       1: WH  FT (ft_rows)
       2: MRF INT (int_rows)
       3: WH  INT (int_rows)
+    changed = (ft_changed, int_changed) from the change tracker.
     """
     t1, t2, t3, t4 = table_tuple
-    update_mrf_table(ws, t1, ft_rows)
-    update_wh_table(ws, t2, ft_rows)
-    update_mrf_table(ws, t3, int_rows)
-    update_wh_table(ws, t4, int_rows)
+    update_table_pair(ws, t1, t2, ft_rows, changed[0])
+    update_table_pair(ws, t3, t4, int_rows, changed[1])
 
 # Special update case for the BSFin program
-def update_bsfin_with_ft_int(ws: Worksheet, table_tuple, ft_rows, int_2027_rows, int_2028_rows):
+def update_bsfin_with_ft_int(ws: Worksheet, table_tuple, ft_rows, int_first_rows, int_second_rows, changed=(True, True, True)):
     """
-    Update 4 tables on a sheet:
+    Update 6 tables on a sheet:
       0: MRF FT (ft_rows)
       1: WH  FT (ft_rows)
-      2: MRF INT (int_rows)
-      3: WH  INT (int_rows)
+      2: MRF INT first class, e.g. 2027 (int_first_rows)
+      3: WH  INT first class (int_first_rows)
+      4: MRF INT second class, e.g. 2028 (int_second_rows)
+      5: WH  INT second class (int_second_rows)
+    changed = (ft_changed, int_first_changed, int_second_changed) from the change tracker.
     """
     t1, t2, t3, t4, t5, t6 = table_tuple
-    update_mrf_table(ws, t1, ft_rows)
-    update_wh_table(ws, t2, ft_rows)
-    update_mrf_table(ws, t3, int_2027_rows)
-    update_wh_table(ws, t4, int_2027_rows)
-    update_mrf_table(ws, t5, int_2028_rows)
-    update_wh_table(ws, t6, int_2028_rows)
+    update_table_pair(ws, t1, t2, ft_rows, changed[0])
+    update_table_pair(ws, t3, t4, int_first_rows, changed[1])
+    update_table_pair(ws, t5, t6, int_second_rows, changed[2])
+
+# Rebuilds the "Status Changes" sheet: how many students of each program moved from one status to another since the last run
+def update_status_sheet(wb, programs, deltas: StatusDeltas):
+    if STATUS_SHEET in wb.sheetnames:
+        del wb[STATUS_SHEET]
+    ws = wb.create_sheet(STATUS_SHEET)
+    headers = ("Program", "Search", "From", "To", "Students")
+    with CellWriteBuffer(ws) as buf:
+        if deltas.since is None:
+            buf.value(1, 1, f"Status changes as of {RUN_DATE_LABEL}: no earlier snapshot yet, movements start with the next run")
+        else:
+            buf.value(1, 1, f"Status changes from {deltas.since:%m/%d/%Y} to {RUN_DATE_LABEL}")
+        for c, h in enumerate(headers, start=1):
+            buf.value(3, c, h)
+            buf.border(3, c)
+        r = 4
+        for program in programs:
+            for m in deltas.by_program.get(program, []):
+                for c, v in enumerate((program, m.kind, m.from_status, m.to_status, m.count), start=1):
+                    buf.value(r, c, v)
+                r += 1
+        if r == 4 and deltas.since is not None:
+            buf.value(r, 1, "No status changes")
+    ws.cell(row=1, column=1).font = HEADER_FONT
+    for c in range(1, len(headers) + 1):
+        ws.cell(row=3, column=c).font = HEADER_FONT
+    for letter, width in zip("ABCDE", (12, 12, 34, 34, 10)):
+        ws.column_dimensions[letter].width = width
+
+# Every MRF table in a director's workbook with the data-snapshot rows that feed it, as (sheet, table, rows(data)).
+# Used by the Changes sheet.
+def mrf_tables(programs, grad_class=FT_GRAD_CLASS):
+    tbls = table_names(programs)
+    sheet = class_sheet(grad_class)
+    first, second = bsfin_int_classes(grad_class)
+    tables = [
+        (sheet, tbls["Class"][0], lambda d: d["total_ft"]),
+        (sheet, tbls["Class"][2], lambda d: d["total_int"]),
+    ]
+    for p in programs:
+        tables.append((p, tbls[p][0], lambda d, p=p: d["byprog_ft"][p]))
+        if p == "BSFin":
+            tables.append((p, tbls[p][2], lambda d: d["bsfin_int"].get(first, [])))
+            tables.append((p, tbls[p][4], lambda d: d["bsfin_int"].get(second, [])))
+        else:
+            tables.append((p, tbls[p][2], lambda d, p=p: d["byprog_int"][p]))
+    return tables
+
+# Every WH table in a director's workbook with the data-snapshot rows that feed it, as (sheet, table, rows(data)).
+# Used by the backfill.
+def wh_tables(programs, grad_class=FT_GRAD_CLASS):
+    tbls = table_names(programs)
+    sheet = class_sheet(grad_class)
+    first, second = bsfin_int_classes(grad_class)
+    tables = [
+        (sheet, tbls["Class"][1], lambda d: d["total_ft"]),
+        (sheet, tbls["Class"][3], lambda d: d["total_int"]),
+    ]
+    for p in programs:
+        tables.append((p, tbls[p][1], lambda d, p=p: d["byprog_ft"][p]))
+        if p == "BSFin":
+            tables.append((p, tbls[p][3], lambda d: d["bsfin_int"].get(first, [])))
+            tables.append((p, tbls[p][5], lambda d: d["bsfin_int"].get(second, [])))
+        else:
+            tables.append((p, tbls[p][3], lambda d, p=p: d["byprog_int"][p]))
+    return tables
+
+# The month-end charts for a director (month_end_charts.py): MSB-wide, then one per program, full time and internship % Placed.
+# BSFin's internship line is its first internship class.
+def chart_list(programs, grad_class=FT_GRAD_CLASS):
+    tbls = table_names(programs)
+    sheet = class_sheet(grad_class)
+    charts = [("MSB", "MSB Placement Trend", [("Full Time", (sheet, tbls["Class"][1])), ("Internships", (sheet, tbls["Class"][3]))])]
+    for p in programs:
+        charts.append((p, f"{p} Placement Trend", [("Full Time", (p, tbls[p][1])), ("Internships", (p, tbls[p][3]))]))
+    return charts
 
 # =========================
-# MAIN: Connect to DB -> Query DB -> Access Workbook -> Update Tables
+# 5) DATA SNAPSHOT: every number a director's workbook needs, in one dict
 # =========================
 
-def main(programs):
-    # DB
-    conn = mysql.connector.connect(
-        host=DB_HOST, user=DB_USER, password=DB_PASSWORD, database=DB_NAME, autocommit=False
-    )
-    cur = conn.cursor()
-
-    # totals
-    total_ft = fetch_rows(cur, SQL_TOTAL_FULL)
-    total_int = fetch_rows(cur, SQL_TOTAL_INT)
+# Runs the report queries (live view or mirror). BSFin's per-class internship numbers are only pulled when BSFin is in the workbook.
+def query_program_data(cur, programs):
+    return {
+        "total_ft": fetch_rows(cur, SQL_TOTAL_FULL),
+        "total_int": fetch_rows(cur, SQL_TOTAL_INT),
+        "byprog_ft": {p: fetch_rows(cur, SQL_BY_PROGRAM_FULL, (p,)) for p in programs},
+        "byprog_int": {p: fetch_rows(cur, SQL_BY_PROGRAM_INT, (p,)) for p in programs},
+        "bsfin_int": {c: fetch_rows(cur, SQL_BSFIN_INT[c], ("BSFin",)) for c in BSFIN_INT_CLASSES} if "BSFin" in programs else {},
+    }
+
+# Reads the same numbers out of a nightly rollup snapshot
+def rollup_program_data(db, snapshot_date, programs):
+    return {
+        "total_ft": rollup.full_time_counts(db, snapshot_date),
+        "total_int": rollup.internship_counts(db, snapshot_date),
+        "byprog_ft": {p: rollup.full_time_counts(db, snapshot_date, [p]) for p in programs},
+        "byprog_int": {p: rollup.internship_counts(db, snapshot_date, [p]) for p in programs},
+        "bsfin_int": {c: rollup.internship_counts(db, snapshot_date, ["BSFin"], [c]) for c in BSFIN_INT_CLASSES} if "BSFin" in programs else {},
+    }
+
+# The same numbers for one cohort of a batch run (see cohort_batch.py)
+def batch_program_data(batch, grad_class, programs):
+    return {
+        "total_ft": batch.full_time_counts(grad_class),
+        "total_int": batch.internship_counts(grad_class),
+        "byprog_ft": {p: batch.full_time_counts(grad_class, [p]) for p in programs},
+        "byprog_int": {p: batch.internship_counts(grad_class, [p]) for p in programs},
+        "bsfin_int": {c: batch.internship_counts(grad_class, ["BSFin"], [c]) for c in bsfin_int_classes(grad_class)} if "BSFin" in programs else {},
+    }
+
+# Streams the "still seeking" roster for one director into Roster-<programs>.xlsx (see roster.py). Returns its path.
+def build_roster(programs):
+    fileLbl = program_to_filename(programs)
+    path = roster_path(BASE_DIR, fileLbl)
+    key_column = MIRROR_KEY_COLUMN if PLACEMENT_SOURCE == "mirror" else KEY_COLUMN
+    with stage("roster", fileLbl):
+        count = write_roster(get_statements(), programs, path, key_column,
+                             f"Still seeking as of {RUN_DATE_LABEL}: {', '.join(programs)}")
+    print(f"Roster: {path} ({count} students)")
+    return str(path)
+
+# Student-level movements since the last run. Taken once per run (the snapshot store is shared by every director);
+# None with the rollup, which has no per-student rows.
+_DELTAS = None
+
+def status_deltas():
+    global _DELTAS
+    if PLACEMENT_SOURCE == "rollup":
+        return None
+    if _DELTAS is None:
+        key_column = MIRROR_KEY_COLUMN if PLACEMENT_SOURCE == "mirror" else KEY_COLUMN
+        with stage("query", "student_status"):
+            _DELTAS = student_deltas(get_statements(), RUN_DATE, key_column)
+    return _DELTAS
+
+# Picks the data source from PLACEMENT_SOURCE
+def fetch_program_data(programs):
+    if PLACEMENT_SOURCE == "rollup":
+        with stage("db_connect", PLACEMENT_SOURCE):
+            db, snapshot_date = rollup.open_for_run(RUN_DATE)
+        try:
+            return rollup_program_data(db, snapshot_date, programs)
+        finally:
+            db.close()
+    # reuses the open connection from an earlier director build, if there is one
+    data = query_program_data(get_statements(), programs)
+    data["deltas"] = status_deltas()
+    return data
 
-    # per-program
-    byProg_ft = {p: fetch_rows(cur, SQL_BY_PROGRAM_FULL, (p,)) for p in programs}
-    byProg_int = {p: fetch_rows(cur, SQL_BY_PROGRAM_INT, (p,)) for p in programs}
-    BSFin_int_2027 = fetch_rows(cur, SQL_BSFIN_INT, ("2027",))
-    BSFin_int_2028 = fetch_rows(cur, SQL_BSFIN_INT, ("2028",))
+# =========================
+# MAIN: Connect to DB -> Query DB -> Access Workbook -> Update Tables
+# =========================
 
-    cur.close()
-    conn.close()
+# The workbook for a director and graduating class: the usual file for FT_GRAD_CLASS, classof<year>/ for the others
+def workbook_path(programs, grad_class=FT_GRAD_CLASS):
+    fileLbl = program_to_filename(programs)
+    if grad_class == FT_GRAD_CLASS:
+        return FILEPATH_TEMPLATE.format(file_label=fileLbl)
+    return str(BASE_DIR / f"classof{grad_class}" / f"WeeklyPlacement-{fileLbl}.xlsx")
+
+# The email digest's inputs: the class totals, then each of the director's programs
+def report_digest_values(data, programs) -> Dict:
+    groups = [("MSB", data["total_ft"], data["total_int"])]
+    groups += [(p, data["byprog_ft"][p], data["byprog_int"][p]) for p in programs]
+    return digest_values(groups)
+
+# What one workbook build hands back: its change tracker and its email digest (rows, and the values behind them)
+class BuildResult(NamedTuple):
+    tracker: ChangeTracker
+    digest: List[DigestRow]
+    digest_values: Dict
+
+# data is passed in by batch and sharded runs; otherwise it's pulled from PLACEMENT_SOURCE.
+# With defer_fingerprints neither the tracker nor the digest is saved here; the caller saves them (run_sharded does,
+# from the parent process).
+def main(programs, grad_class=FT_GRAD_CLASS, data=None, defer_fingerprints=False):
+    # DB, mirror or rollup
+    if data is None:
+        data = fetch_program_data(programs)
+    total_ft, total_int = data["total_ft"], data["total_int"]
+    byProg_ft, byProg_int = data["byprog_ft"], data["byprog_int"]
+    int_first, int_second = bsfin_int_classes(grad_class)
+    BSFin_int_first, BSFin_int_second = data["bsfin_int"].get(int_first, []), data["bsfin_int"].get(int_second, [])
 
     # workbook
     fileLbl = program_to_filename(programs)
-    wb_path = FILEPATH_TEMPLATE.format(file_label=fileLbl)
-    wb = load_workbook(wb_path, data_only=False)
+    wb_path = workbook_path(programs, grad_class)
+    if grad_class != FT_GRAD_CLASS and not os.path.exists(wb_path):
+        raise FileNotFoundError(f"Workbook for the class of {grad_class} not found at: {wb_path}")
+    # The default cohort keeps its usual fingerprints; the others get their own
+    scope = fileLbl if grad_class == FT_GRAD_CLASS else f"{fileLbl}:classof{grad_class}"
+
+    # CHANGES_SHEET=1: the MRF values about to be overwritten, streamed from the file on disk (mrf_diff.py)
+    if CHANGES_SHEET_ENABLED:
+        with stage("mrf_diff", fileLbl):
+            schema = load_schema(scope)
+            previous = previous_mrf(wb_path, schema)
+
+    with stage("workbook_load", os.path.basename(wb_path)):
+        wb = load_workbook(wb_path, data_only=False)
+    # Stop here, before anything is written, if this run's counts are far off the weekly history (anomaly_guard.py)
+    with stage("anomaly_guard", fileLbl):
+        check_workbook(wb, wh_tables(programs, grad_class), data, RUN_DATE, os.path.basename(wb_path))
+    tracker = ChangeTracker(FINGERPRINT_PATH, scope)
 
     # tables
     tbls = table_names(programs)
 
     # totals sheet (exact name confirmed earlier)
-    class_ws_name = "2026 MSB Overall"
-    if class_ws_name not in wb.sheetnames:
-        raise RuntimeError(f"Expected sheet '{class_ws_name}' not found.")
-    class_ws = wb[class_ws_name]
-    update_sheet_with_ft_int(class_ws, tbls["Class"], total_ft, total_int)
+    sheet = class_sheet(grad_class)
+    if sheet not in wb.sheetnames:
+        raise RuntimeError(f"Expected sheet '{sheet}' not found.")
+    class_ws = wb[sheet]
+    update_sheet_with_ft_int(class_ws, tbls["Class"], total_ft, total_int,
+                             (tracker.changed("Class:FT", total_ft), tracker.changed("Class:INT", total_int)))
 
     # program sheets
     for program in programs:
@@ -511,14 +750,123 @@ def main(programs):
             raise RuntimeError(f"Expected program sheet '{program}' not found.")
         elif program == "BSFin":
             ws = wb[program]
-            update_bsfin_with_ft_int(ws, tbls[program], byProg_ft[program], BSFin_int_2027, BSFin_int_2028)
+            changed = (
+                tracker.changed(f"{program}:FT", byProg_ft[program]),
+                tracker.changed(f"{program}:INT{int_first}", BSFin_int_first),
+                tracker.changed(f"{program}:INT{int_second}", BSFin_int_second),
+            )
+            update_bsfin_with_ft_int(ws, tbls[program], byProg_ft[program], BSFin_int_first, BSFin_int_second, changed)
         else:
             ws = wb[program]
-            update_sheet_with_ft_int(ws, tbls[program], byProg_ft[program], byProg_int[program])
-
-    wb.save(wb_path)
+            changed = (
+                tracker.changed(f"{program}:FT", byProg_ft[program]),
+                tracker.changed(f"{program}:INT", byProg_int[program]),
+            )
+            update_sheet_with_ft_int(ws, tbls[program], byProg_ft[program], byProg_int[program], changed)
+
+    # student movements since the last run (default cohort only; batch runs don't snapshot students)
+    if data.get("deltas") is not None and grad_class == FT_GRAD_CLASS:
+        with stage("table_update", STATUS_SHEET):
+            update_status_sheet(wb, programs, data["deltas"])
+
+    if CHANGES_SHEET_ENABLED:
+        write_changes_sheet(wb, mrf_deltas(previous, mrf_tables(programs, grad_class), data), RUN_DATE_LABEL, bool(schema))
+
+    with stage("workbook_save", os.path.basename(wb_path)):
+        safe_save(wb.save, wb_path)
+    if CHANGES_SHEET_ENABLED:
+        save_schema(scope, wb, mrf_tables(programs, grad_class))
+    if LOW_MEMORY:
+        # One workbook per director in the same process; free this one before the next is loaded
+        wb.close()
+        del wb
+        gc.collect()
+    # Email digest, compared with the last report
+    values = report_digest_values(data, programs)
+    digest = digest_rows(tracker.scope, RUN_DATE, values)
+    # Only remember this run's numbers once the workbook is safely saved
+    if not defer_fingerprints:
+        tracker.save()
+        save_digest(RUN_DATE, {tracker.scope: values})
     print(f"Updated: {wb_path}")
+    print(tracker.summary_line())
+    return BuildResult(tracker, digest, values)
+
+# Batch run: one grouped query for every requested graduating class, then every director workbook for each class
+def run_cohorts(program_groups, grad_classes):
+    if PLACEMENT_SOURCE == "rollup":
+        raise RuntimeError("The rollup only stores the default cohort; batch runs need PLACEMENT_SOURCE=mysql or mirror.")
+    if PLACEMENT_SOURCE == "mirror" and any(g != FT_GRAD_CLASS for g in grad_classes):
+        print("[WARN] The mirror only holds the classes of the default cohort; other classes may come out short.")
+    for g in grad_classes:
+        for programs in program_groups:
+            if not os.path.exists(workbook_path(programs, g)):
+                raise FileNotFoundError(f"Workbook for the class of {g} not found at: {workbook_path(programs, g)}")
+
+    with stage("query", f"SQL_BATCH:{','.join(map(str, grad_classes))}"):
+        batch = fetch_batch(get_statements(), [cohort_for(g) for g in grad_classes])
+    all_programs = sorted({p for programs in program_groups for p in programs})
+    for g in grad_classes:
+        data = batch_program_data(batch, g, all_programs)
+        for programs in program_groups:
+            main(programs, g, data)
+
+# Every number the given directors' workbooks need, taken once: the nightly rollup, or one grouped query (cohort_batch.py)
+def shared_snapshot(programs):
+    if PLACEMENT_SOURCE == "rollup":
+        return fetch_program_data(programs)
+    with stage("query", "SQL_BATCH"):
+        batch = fetch_batch(get_statements(), [cohort_for(FT_GRAD_CLASS)])
+    data = batch_program_data(batch, FT_GRAD_CLASS, programs)
+    data["deltas"] = status_deltas()
+    return data
+
+# Builds every director's workbook ({name: programs}) from one shared snapshot, sharded across SHARD_WORKERS processes.
+# A director whose build fails is reported in the results instead of stopping the others. Returns shard_runner results;
+# a successful result's value is (scope, fingerprints, digest rows, digest values).
+def run_sharded(jobs):
+    all_programs = sorted({p for programs in jobs.values() for p in programs})
+    data = shared_snapshot(all_programs)
+    # The workers are forked; they must not share the parent's DB connection
+    close_statements()
+
+    def build(name):
+        tracker, digest, values = main(list(jobs[name]), data=data, defer_fingerprints=True)
+        return tracker.scope, tracker.current, digest, values
+
+    results = shard_runner.run_shards(jobs, build)
+    built = [r["value"] for r in results if r["ok"]]
+    save_scopes(FINGERPRINT_PATH, {scope: current for scope, current, _, _ in built})
+    save_digest(RUN_DATE, {scope: values for scope, _, _, values in built})
+    print(shard_runner.summary_line(results))
+    return results
 
 if __name__ == "__main__":
-    # example
-    main(["BSFin"])
+    parser = argparse.ArgumentParser(description="Update career director workbooks.")
+    parser.add_argument("--programs", action="append", default=None,
+                        help="programs of one workbook, e.g. BSAcc,MAcc (repeatable; default: BSFin)")
+    parser.add_argument("--cohorts", default=COHORTS, help="graduating classes for a batch run, e.g. 2026,2027 (default: COHORTS)")
+    parser.add_argument("--sharded", action="store_true",
+                        help="build the workbooks from one snapshot in SHARD_WORKERS processes, isolating failures")
+    args = parser.parse_args()
+    groups = [p.split(",") for p in args.programs] if args.programs else [["BSFin"]]
+
+    METRICS.start("career-director-update")
+    status = "error"
+    try:
+        if args.cohorts:
+            run_cohorts(groups, parse_cohorts(args.cohorts))
+        elif args.sharded:
+            results = run_sharded({program_to_filename(programs): programs for programs in groups})
+            if not all(r["ok"] for r in results):
+                raise RuntimeError(shard_runner.summary_line(results))
+        else:
+            for programs in groups:
+                main(programs)
+        status = "ok"
+    except Exception as e:
+        sys.stderr.write(f"[ERROR] {e}\n")
+        sys.exit(1)
+    finally:
+        close_statements()
+        METRICS.write(status)
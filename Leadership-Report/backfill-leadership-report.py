@@ -0,0 +1,104 @@
+# Backfill for the leadership workbook: rebuilds the WH (Weekly History) columns for a range of weeks from the nightly
+# rollup snapshots (rollup.py), for when a week was missed or a column came out wrong.
+# Nothing is queried from the database and the normal pipeline isn't re-run per week. Each week's numbers are read
+# from its snapshot, the workbook is loaded once, every WH table is rebuilt in one pass (see wh_backfill.py), and the
+# workbook is saved once. MRF tables and the summary sheet still show the latest Friday and are left alone.
+#
+#   python backfill-leadership-report.py --start 2026-09-04 --end 2026-10-09
+#   python backfill-leadership-report.py --start 2026-09-04 --end 2026-10-09 --weekday 4 --rollup /path/rollup.sqlite3
+
+import os
+import sys
+import sqlite3
+import argparse
+import importlib.util
+import datetime as dt
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+# The shared modules are in placement_common/ at the repository root; those that keep state keep it in this folder
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from placement_common.paths import use_report_dir
+use_report_dir(__file__)
+from placement_common import rollup
+from placement_common.wh_backfill import backfill_weeks, pick_snapshots, rebuild_wh_table
+from placement_common.run_metrics import METRICS, stage
+from placement_common.safe_save import safe_save
+
+BASE_DIR = Path(__file__).resolve().parent
+
+def load_update_module():
+    spec = importlib.util.spec_from_file_location("update_leadership_report", str(BASE_DIR / "update-leadership-report.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild WH columns of the leadership workbook from rollup snapshots.")
+    parser.add_argument("--start", required=True, help="first week to rebuild, YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="last week to rebuild, YYYY-MM-DD")
+    parser.add_argument("--weekday", type=int, default=4, help="report weekday, 0=Monday (default: 4, Friday)")
+    parser.add_argument("--rollup", default=str(rollup.ROLLUP_PATH), help="rollup file (default: ROLLUP_PATH)")
+    args = parser.parse_args(argv)
+    start, end = dt.date.fromisoformat(args.start), dt.date.fromisoformat(args.end)
+    if end < start:
+        raise RuntimeError(f"--end {end} is before --start {start}")
+
+    upd = load_update_module()
+    template_path = os.path.join(str(BASE_DIR), "weekly_placement_report.xlsx")
+    if not os.path.exists(template_path):
+        raise FileNotFoundError(f"Template not found at: {template_path}")
+    if not Path(args.rollup).exists():
+        raise FileNotFoundError(f"Rollup not found at: {args.rollup}")
+
+    # Every week's numbers, straight from the stored snapshots
+    weeks = backfill_weeks(start, end, args.weekday)
+    db = sqlite3.connect(args.rollup)
+    try:
+        with stage("query", "rollup_snapshots"):
+            snapshots = pick_snapshots(db, weeks, rollup.ROLLUP_MAX_AGE_DAYS)
+            data_by_week = {week: upd.rollup_report_data(db, snap) for week, snap in snapshots.items()}
+    finally:
+        db.close()
+    for week in weeks:
+        if week not in snapshots:
+            print(f"[WARN] No rollup snapshot within {rollup.ROLLUP_MAX_AGE_DAYS} day(s) of {week}; skipped")
+    if not data_by_week:
+        raise RuntimeError(f"No rollup snapshots for any week between {start} and {end}.")
+
+    with stage("workbook_load", os.path.basename(template_path)):
+        wb = load_workbook(template_path, data_only=False)
+
+    rewritten = inserted = 0
+    for sheet_name, tbl_name, rows_for in upd.wh_tables():
+        ws = wb[sheet_name]
+        tbl = upd.get_table(ws, tbl_name)
+        min_row, max_row, min_col, _ = upd.table_bounds(tbl.ref)
+        header_row = upd.detect_header_row(ws, min_row, max_row, min_col,
+                                           expected_first_header=upd.expected_header_for_table(ws, tbl_name))
+        with stage("table_backfill", tbl_name):
+            r, i = rebuild_wh_table(
+                ws, tbl, header_row, {week: rows_for(data) for week, data in data_by_week.items()},
+                upd.is_ignored_label,
+                lambda cols, buf: upd.compute_totals_and_placement(ws, min_row, max_row, min_col, cols, buf),
+            )
+        rewritten += r
+        inserted += i
+
+    with stage("workbook_save", os.path.basename(template_path)):
+        safe_save(wb.save, template_path)
+    print(f"Backfilled {len(data_by_week)} week(s) into {template_path}: {inserted} column(s) added, {rewritten} rewritten")
+
+
+if __name__ == "__main__":
+    METRICS.start("leadership-backfill")
+    status = "error"
+    try:
+        main()
+        status = "ok"
+    except Exception as e:
+        sys.stderr.write(f"[ERROR] {e}\n")
+        sys.exit(1)
+    finally:
+        METRICS.write(status)
@@ -0,0 +1,121 @@
+# Columnar exports of the report numbers for the BI team (BI_EXPORT).
+# BI used to open weekly_placement_report.xlsx with openpyxl just to get numbers this script had in memory a moment
+# earlier. With BI_EXPORT set, every run also writes them as three tidy tables next to the workbook, one row per
+# observation, each carrying the run date and the graduating class:
+#   placement_summary      run_date, class_of, program, offers_accepted, still_seeking, no_info, not_seeking,
+#                          intl_all, total, pct_placed           (the summary sheet)
+#   placement_totals       run_date, class_of, search, status, students      (MSB full time / internship counts)
+#   placement_by_program   run_date, class_of, program, search, status, students
+# search is "full_time" or "internship"; pct_placed is 0-100, same formula as the workbook.
+#
+# BI_EXPORT=off (default; 0/false/no or unset) writes nothing. BI_EXPORT=parquet (1/true/yes/on mean the same) writes
+# .parquet when pyarrow is installed and falls back to .csv (with a warning) when it isn't; BI_EXPORT=csv always writes
+# .csv. Any other value is reported with a warning when the export would run, and the export is skipped -- a typo
+# here never holds up the workbook or the email. Files are written to a temp name and moved into place, so a reader
+# never sees half a file, and the other format's file is removed so nothing stale is left.
+
+import os
+import csv
+import datetime as dt
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from placement_common.statuses import SUMMARY_FIELDS, STATUS_ACCEPTED, STATUS_SEEKING, STATUS_NOT_REPORTED, placed_percent
+
+# BI_EXPORT values -> the format asked for (None: off)
+EXPORT_SETTINGS = {
+    "parquet": "parquet", "1": "parquet", "true": "parquet", "yes": "parquet", "on": "parquet",
+    "csv": "csv",
+    "off": None, "0": None, "false": None, "no": None, "": None,
+}
+
+def parse_setting(raw: str) -> Optional[str]:
+    key = raw.strip().lower()
+    if key not in EXPORT_SETTINGS:
+        raise RuntimeError(f"BI_EXPORT must be parquet, csv or off, not '{raw}'")
+    return EXPORT_SETTINGS[key]
+
+BI_EXPORT = os.getenv("BI_EXPORT", "off")
+
+SUMMARY_COLUMNS = ("run_date", "class_of", "program", "offers_accepted", "still_seeking", "no_info", "not_seeking",
+                   "intl_all", "total", "pct_placed")
+COUNT_COLUMNS = ("run_date", "class_of", "search", "status", "students")
+PROGRAM_COUNT_COLUMNS = ("run_date", "class_of", "program", "search", "status", "students")
+
+SEARCH_FT = "full_time"
+SEARCH_INT = "internship"
+
+# {table name: (columns, rows)} for one data snapshot
+def export_tables(data: Dict, programs: Sequence[str], run_date: dt.date, grad_class: int) -> Dict[str, Tuple[Sequence[str], List[Tuple]]]:
+    summary = []
+    for r in data["summary"]:
+        d = dict(zip(SUMMARY_FIELDS, (int(v or 0) for v in r[1:])))
+        pct = placed_percent({STATUS_ACCEPTED: d["offer_accepted"], STATUS_SEEKING: d["still_seeking"],
+                              STATUS_NOT_REPORTED: d["no_info"]})
+        summary.append((run_date, grad_class, str(r[0]), d["offer_accepted"], d["still_seeking"], d["no_info"],
+                        d["not_seeking"], d["intl_all"], d["total"], pct))
+
+    totals = [(run_date, grad_class, SEARCH_FT, str(s).strip(), int(n or 0)) for s, n in data["total_ft"]]
+    totals += [(run_date, grad_class, SEARCH_INT, str(s).strip(), int(n or 0)) for s, n in data["total_int"]]
+
+    by_program = []
+    for prog in programs:
+        by_program += [(run_date, grad_class, prog, SEARCH_FT, str(s).strip(), int(n or 0)) for s, n in data["byprog_ft"].get(prog, [])]
+        by_program += [(run_date, grad_class, prog, SEARCH_INT, str(s).strip(), int(n or 0)) for s, n in data["byprog_int"].get(prog, [])]
+
+    return {
+        "placement_summary": (SUMMARY_COLUMNS, summary),
+        "placement_totals": (COUNT_COLUMNS, totals),
+        "placement_by_program": (PROGRAM_COUNT_COLUMNS, by_program),
+    }
+
+def _write_parquet(path: Path, columns: Sequence[str], rows: List[Tuple]):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.table({c: [r[i] for r in rows] for i, c in enumerate(columns)})
+    tmp = path.with_name(path.name + ".tmp")
+    pq.write_table(table, str(tmp))
+    os.replace(tmp, path)
+
+def _write_csv(path: Path, columns: Sequence[str], rows: List[Tuple]):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    os.replace(tmp, path)
+
+# Which format this run writes: "parquet", "csv", or None for off (raw: a BI_EXPORT value)
+def export_format(raw: str = BI_EXPORT) -> Optional[str]:
+    try:
+        setting = parse_setting(raw)
+    except RuntimeError as e:
+        print(f"[WARN] {e}; BI export skipped")
+        return None
+    if setting != "parquet":
+        return setting
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        print("[WARN] pyarrow is not installed; BI exports written as CSV")
+        return "csv"
+    return "parquet"
+
+# Writes the export tables for one data snapshot into out_dir. Returns the paths written.
+def write_exports(data: Dict, out_dir: Path, programs: Sequence[str], run_date: dt.date, grad_class: int,
+                  fmt: Optional[str] = None) -> List[str]:
+    fmt = fmt or export_format()
+    if fmt is None:
+        return []
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for name, (columns, rows) in export_tables(data, programs, run_date, grad_class).items():
+        path = out_dir / f"{name}.{fmt}"
+        (_write_parquet if fmt == "parquet" else _write_csv)(path, columns, rows)
+        stale = out_dir / f"{name}.{'csv' if fmt == 'parquet' else 'parquet'}"
+        if stale.exists():
+            stale.unlink()
+        written.append(str(path))
+    return written
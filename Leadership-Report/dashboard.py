@@ -0,0 +1,119 @@
+# Static HTML/JSON dashboard written next to the leadership workbook (DASHBOARD=1).
+# Most readers only want a percentage or two, and the xlsx keeps growing every week. The dashboard is a handful of
+# small static pages built from the same data snapshot the update script writes into the workbook:
+#   index.html              summary: every program's % placed and status breakdown (same columns as the summary sheet)
+#   totals.html             MSB full time and internship status counts
+#   programs/<program>.html one program's full time and internship status counts
+# Every page also has a .json twin with its numbers, for anything that wants to read them.
+#
+# It's incremental: each page's input is fingerprinted (change_detection.fingerprint) and recorded in manifest.json,
+# and a page is only rewritten when its numbers changed or its file is missing. The index (which carries the run date)
+# is always rewritten. No scripts or external assets, so it can be served straight from the Pi or uploaded to Box.
+
+import os
+import json
+import html
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from placement_common.change_detection import fingerprint
+from placement_common.statuses import SUMMARY_FIELDS, STATUS_ACCEPTED, STATUS_SEEKING, STATUS_NOT_REPORTED, placed_percent
+
+STYLE = """
+body { font-family: Arial, Helvetica, sans-serif; margin: 2em; color: #222; }
+table { border-collapse: collapse; margin-bottom: 1.5em; }
+th, td { border-bottom: 1px solid #ccc; padding: 4px 10px; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+th { background: #002e5d; color: #fff; }
+.big { font-size: 2em; font-weight: bold; }
+nav a { margin-right: 1em; }
+"""
+
+def _counts(rows: Sequence[Tuple]) -> Dict[str, int]:
+    return {str(status).strip(): int(count or 0) for status, count in rows}
+
+def _page(title: str, body: str, depth: int = 0) -> str:
+    up = "../" * depth
+    return (
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+        f"<title>{html.escape(title)}</title><style>{STYLE}</style></head><body>\n"
+        f"<nav><a href=\"{up}index.html\">Summary</a><a href=\"{up}totals.html\">MSB Totals</a></nav>\n"
+        f"<h1>{html.escape(title)}</h1>\n{body}\n</body></html>\n"
+    )
+
+def _table(headers: Sequence[str], rows: Sequence[Sequence]) -> str:
+    head = "".join(f"<th>{html.escape(str(h))}</th>" for h in headers)
+    body = "".join("<tr>" + "".join(f"<td>{c}</td>" for c in row) + "</tr>\n" for row in rows)
+    return f"<table><tr>{head}</tr>\n{body}</table>"
+
+def _status_section(title: str, rows: Sequence[Tuple]) -> str:
+    counts = _counts(rows)
+    table_rows = [(html.escape(s), n) for s, n in sorted(counts.items())] + [("<b>Class Size</b>", f"<b>{sum(counts.values())}</b>")]
+    return (
+        f"<h2>{html.escape(title)}</h2>\n<p class=\"big\">{placed_percent(counts):.2f}% placed</p>\n"
+        + _table(("Status", "Students"), table_rows)
+    )
+
+def _write(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+# Writes the dashboard for one data snapshot into out_dir. Returns (pages written, pages unchanged).
+def write_dashboard(data: Dict, out_dir: Path, programs: Sequence[str], run_label: str) -> Tuple[int, int]:
+    out_dir = Path(out_dir)
+    manifest_path = out_dir / "manifest.json"
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest: Dict[str, str] = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    by_prog = {str(r[0]): dict(zip(SUMMARY_FIELDS, (int(v or 0) for v in r[1:]))) for r in data["summary"]}
+    summary_rows: List[Sequence] = []
+    for prog in programs:
+        d = by_prog.get(prog, dict.fromkeys(SUMMARY_FIELDS, 0))
+        pct = placed_percent({STATUS_ACCEPTED: d["offer_accepted"], STATUS_SEEKING: d["still_seeking"],
+                              STATUS_NOT_REPORTED: d["no_info"]})
+        summary_rows.append((f"<a href=\"programs/{html.escape(prog)}.html\">{html.escape(prog)}</a>", f"{pct:.2f}%",
+                             d["offer_accepted"], d["still_seeking"], d["intl_all"], d["no_info"], d["not_seeking"], d["total"]))
+
+    # page -> (input rows for the fingerprint, html, json payload)
+    pages: Dict[str, Tuple[List, str, Dict]] = {
+        "totals": (
+            [("FT:" + s, n) for s, n in data["total_ft"]] + [("INT:" + s, n) for s, n in data["total_int"]],
+            _page("MSB Totals", _status_section("Full Time", data["total_ft"]) + _status_section("Internships", data["total_int"])),
+            {"full_time": _counts(data["total_ft"]), "internships": _counts(data["total_int"])},
+        ),
+    }
+    for prog in programs:
+        ft, itn = data["byprog_ft"].get(prog, []), data["byprog_int"].get(prog, [])
+        pages[f"programs/{prog}"] = (
+            [("FT:" + s, n) for s, n in ft] + [("INT:" + s, n) for s, n in itn],
+            _page(prog, _status_section("Full Time", ft) + _status_section("Internships", itn), depth=1),
+            {"program": prog, "full_time": _counts(ft), "internships": _counts(itn)},
+        )
+
+    written = unchanged = 0
+    for name, (rows, page_html, payload) in pages.items():
+        fp = fingerprint(rows)
+        if manifest.get(name) == fp and (out_dir / f"{name}.html").exists():
+            unchanged += 1
+            continue
+        _write(out_dir / f"{name}.html", page_html)
+        _write(out_dir / f"{name}.json", json.dumps(payload, indent=2, sort_keys=True))
+        manifest[name] = fp
+        written += 1
+
+    # The index carries the run date, so it's always rewritten
+    headers = ("Program", "% Placed", "Offers Accepted", "Still Seeking", "Int'l", "No Info*", "Not Seeking", "Total")
+    index_body = (
+        f"<p>Updated {html.escape(run_label)}</p>\n" + _table(headers, summary_rows)
+        + "<p>* No Info: not reported or no recent information.</p>"
+    )
+    _write(out_dir / "index.html", _page("Weekly Placement Summary", index_body))
+    _write(out_dir / "index.json", json.dumps({"updated": run_label, "summary": by_prog}, indent=2, sort_keys=True))
+    _write(manifest_path, json.dumps(manifest, indent=2, sort_keys=True))
+    return written + 1, unchanged
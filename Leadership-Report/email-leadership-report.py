@@ -4,13 +4,27 @@
 # It will also update the BCC data team box folder titled Weekly Reports
 
 import os
+import sys
 from pathlib import Path
-import smtplib, ssl, mimetypes
+import ssl, mimetypes
 from email.message import EmailMessage
 from datetime import date
 import calendar
 
-from update_overall_report import main as create_reports
+# The shared modules are in placement_common/ at the repository root; those that keep state keep it in this folder
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from placement_common.paths import use_report_dir
+use_report_dir(__file__)
+# --dry-run reruns this script in a scratch directory against local stand-ins (dry_run.py)
+from placement_common import dry_run
+dry_run.dispatch(__file__)
+from update_overall_report import main as create_reports, chart_list
+from placement_common.month_end_charts import render_charts, workbook_specs
+from placement_common.email_digest import set_body_with_digest
+from placement_common.box_manifest import BoxManifest
+from placement_common.cohorts import FT_GRAD_CLASS
+from placement_common.run_metrics import METRICS, stage, LOW_MEMORY
+from placement_common.streaming_mail import defer_attachment, pending_attachments, send_streamed
 
 
 # SMTP: Secure Mail Transfer Protocol. Creating a connection to the gmail SMTP server allows us to send emails from the Pi
@@ -41,7 +55,7 @@ BASE_DIR = Path(__file__).resolve().parent
 OUTPATH1 = os.getenv("OUTPUT_PATH", str(BASE_DIR / "weekly_placement_report.xlsx")) # report that needs to be updated
 
 # This function creates the email packet that will be sent every WEEK. This is where you create a subject and set the content/body of the email
-def build_weekly_message(filepath):
+def build_weekly_message(filepath, digest=()):
     msg = EmailMessage()
     msg["Subject"] = f"Weekly Placement Report {date.today():%m-%d-%Y}"
     msg["From"] = SENDER
@@ -49,7 +63,7 @@ def build_weekly_message(filepath):
     if CC_ADDRS:
         msg["Cc"] = ", ".join(CC_ADDRS)
 
-    msg.set_content("""
+    set_body_with_digest(msg, f"""
 Good Morning Everyone,  
         
 This is the Weekly Placement Report that will automatically be sent out every week on Friday at 10am.
@@ -59,7 +73,7 @@ It provides current, weekly updates so you can track how the BCC or a particular
 The excel file contains 5 pages:
                     
   - SUMMARY: An overview of each programs placement data in a combined table. This allows us to spot trends in the BCC as a whole
-  - TOTAL: The placement data for every student in the 2026 class in one table. The second table will add a new column every week with the new numbers so we can see the week to week change.
+  - TOTAL: The placement data for every student in the {FT_GRAD_CLASS} class in one table. The second table will add a new column every week with the new numbers so we can see the week to week change.
   - BY PROGRAM: Breaks the data out for each individual program. It also provides the week to week comparison for each program
   - TOTAL - Internship: The internship placement data in one table. The second table will add a new column every week with the new numbers so we can see the week to week change.
   - BY PROGRAM - Internship: Breaks the internship data out for each individual program. It also provides the week to week comparison for each program
@@ -69,13 +83,12 @@ If you notice any discrepencies in the data, please contact the data team.
             
 Sincerely,
 BCC Data Team
-"""
-    )
+""", digest)
     attach_file(msg, filepath)
     return msg
 
 # This function creates the email packet that will be sent at MONTH END. This is where you create a subject and set the content/body of the email
-def build_monthly_message(filepath):
+def build_monthly_message(filepath, charts=(), digest=()):
     msg = EmailMessage()
     msg["Subject"] = f"Month End Placement Report {date.today():%m-%d-%Y}"
     msg["From"] = SENDER
@@ -83,7 +96,7 @@ def build_monthly_message(filepath):
     if CC_ADDRS:
         msg["Cc"] = ", ".join(CC_ADDRS)
 
-    msg.set_content("""
+    set_body_with_digest(msg, f"""
 Good Morning Everyone,  
         
 Today is the last day of the month. The report has been updated with our current, month-end placement statistics.
@@ -93,7 +106,7 @@ It provides current, weekly and monthly updates so you can track how the BCC or
 The excel file contains 5 pages:
                     
   - SUMMARY: An overview of each programs placement data in a combined table. This allows us to spot trends in the BCC as a whole
-  - TOTAL: MSB Class of 2026 placement infromation. The second table will add a new column every week with the new numbers so we can see the week to week change.
+  - TOTAL: MSB Class of {FT_GRAD_CLASS} placement infromation. The second table will add a new column every week with the new numbers so we can see the week to week change.
   - BY PROGRAM: Breaks placement data out for each program. It also provides the week to week comparison for each program
   - TOTAL - Internship: MSB internship placement data in one table. The second table will add a new column every week with the new numbers so we can see the week to week change.
   - BY PROGRAM - Internship: Breaks internship data out for each program. It also provides the week to week comparison for each program
@@ -101,15 +114,30 @@ The excel file contains 5 pages:
             
 If you notice any discrepencies in the data, please contact the data team.
                     
-A visualization of this month end data will be sent out within the next business day. It will have a monthly placement historical data comparison.
+{CHARTS_NOTE if charts else VISUALIZATION_NOTE}
             
 Sincerely,
 BCC Data Team
-"""
-    )
+""", digest)
     attach_file(msg, filepath)
+    for chart in charts:
+        attach_file(msg, chart)
     return msg
 
+# Closing line of the month-end email: the charts are attached, or (if they couldn't be drawn) they follow by hand
+CHARTS_NOTE = "Placement trend charts for the MSB and each program, drawn from the weekly history, are attached."
+VISUALIZATION_NOTE = ("A visualization of this month end data will be sent out within the next business day. "
+                      "It will have a monthly placement historical data comparison.")
+
+# Draws the month-end charts from the updated workbook. A chart problem shouldn't hold up the report, so it only warns.
+def month_end_charts(filepath):
+    try:
+        with stage("charts", os.path.basename(filepath)):
+            return render_charts(workbook_specs(filepath, chart_list()))
+    except Exception as e:
+        print(f"[WARN] Month-end charts skipped: {e}")
+        return []
+
 # Creates an email that is sent to the main BOX folder. The BOX will upload the attached file.
 def build_box_main(filepath):
     msg = EmailMessage()
@@ -125,7 +153,11 @@ def attach_file(msg, path):
     if not ctype:
         ctype = "application/octet-stream"
     maintype, subtype = ctype.split("/", 1)
-    with open(path, "rb") as f:
+    if LOW_MEMORY:
+        # Only the path is recorded here; the file is encoded in chunks while sending
+        defer_attachment(msg, path)
+        return
+    with stage("attachment_encode", os.path.basename(path)), open(path, "rb") as f:
         msg.add_attachment(
             f.read(),
             maintype=maintype,
@@ -140,7 +172,11 @@ def send(smtp, msg, to_addrs):
         if a and a not in seen:
             seen.add(a)
             all_rcpts.append(a)
-    smtp.send_message(msg, from_addr=SENDER, to_addrs=all_rcpts)
+    with stage("smtp_send", str(msg["Subject"] or "")):
+        if pending_attachments(msg):
+            send_streamed(smtp, msg, SENDER, all_rcpts)
+        else:
+            smtp.send_message(msg, from_addr=SENDER, to_addrs=all_rcpts)
 
 # The crontab runs this script every day. This checks if the script should run today, and how it should run depending on the day.
 def run_check(today, is_monthend):
@@ -164,38 +200,54 @@ def mainflow():
     last_day = calendar.monthrange(today.year, today.month)[1]
     is_monthend = today.day == last_day
 
-    a = run_check(today, is_monthend)
+    with stage("schedule_check"):
+        a = dry_run.schedule(run_check(today, is_monthend))
     if a is None:
         print("Not Friday or month-end; exiting...")
         return
 
-    create_reports()
+    with stage("update_reports"):
+        digest = create_reports()
 
     if a == 0:
-        message = build_weekly_message(OUTPATH1)
+        message = build_weekly_message(OUTPATH1, digest)
         box_upload_email = MAIN_BOX_UPLOAD_EMAIL
     elif a in (1,2):
-        message = build_monthly_message(OUTPATH1)
+        message = build_monthly_message(OUTPATH1, month_end_charts(OUTPATH1), digest)
         box_upload_email = MONTHEND_BOX_UPLOAD_EMAIL
 
-    main_box_msg = build_box_main(OUTPATH1)
-    main_box_msg["To"] = box_upload_email
+    # Box already has this exact workbook (e.g. a rerun): don't upload it again
+    box = BoxManifest()
+    main_box_msg = None
+    if not box.unchanged(box_upload_email, OUTPATH1):
+        main_box_msg = build_box_main(OUTPATH1)
+        main_box_msg["To"] = box_upload_email
 
 
     context = ssl.create_default_context()
-    with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as s:
-        s.ehlo()
-        s.starttls(context=context)
-        s.ehlo()
-        s.login(SENDER, APP_PASSWORD)
+    with dry_run.smtp_connect(SMTP_SERVER, SMTP_PORT) as s:
+        with stage("smtp_connect", SMTP_SERVER):
+            s.ehlo()
+            s.starttls(context=context)
+            s.ehlo()
+            s.login(SENDER, APP_PASSWORD)
 
-        send(s, main_box_msg, [box_upload_email])
+        if main_box_msg is not None:
+            send(s, main_box_msg, [box_upload_email])
+            box.record(box_upload_email, OUTPATH1)
 
         human_envelope = TO_ADDRS + CC_ADDRS + BCC_ADDRS
         send(s, message, human_envelope)
 
-    print("Email sent! And Box Uploaded")
+    print("Email sent! And Box Uploaded" if main_box_msg is not None else "Email sent! Box already up to date")
+    print(box.summary_line())
     
 
 if __name__=="__main__":
-    mainflow()
+    METRICS.start("leadership")
+    status = "error"
+    try:
+        mainflow()
+        status = "ok"
+    finally:
+        METRICS.write(status)
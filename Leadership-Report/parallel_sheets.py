@@ -0,0 +1,191 @@
+# Multiprocess sheet rendering for the leadership workbook (RENDER_WORKERS=N, N > 1).
+# The five sheets don't depend on each other, so instead of updating them one after another in one openpyxl object
+# graph, the parent loads the workbook once and forks one worker per sheet. The forked workers get the loaded workbook
+# for free (copy-on-write). Each worker updates its own sheet from the data snapshot and renders that sheet's
+# <sheetData> XML. The parent then writes the xlsx once, dropping each rendered part into its sheet, and writes
+# everything else (tables, styles, workbook parts) itself as usual.
+#
+# Two things have to be stitched back together:
+#  - cell styles: a worker may create styles the parent doesn't have yet (a right-aligned dash, a "0.00%" cell).
+#    Styles that existed when the worker forked keep their index. Newer ones are sent back as style objects,
+#    registered in the parent, and their s="..." ids in the rendered XML are remapped.
+#  - tables: WH tables get a new column in the worker, so the worker's Table objects replace the parent's.
+# openpyxl writes strings inline, so there's no shared-strings table to merge.
+#
+# Needs the "fork" start method (Linux, so the Pi is fine). Without it, and for RENDER_WORKERS <= 1, the caller
+# updates the sheets serially as before.
+#
+# This leans on openpyxl internals (the workbook's style lists, WorksheetWriter, ExcelWriter), which can change in any
+# release. It's only used on the openpyxl releases in TESTED_OPENPYXL, where tests/test_parallel_sheets.py checks that
+# both paths write the same workbook (every cell, style and table ref). On any other release, or if those internals
+# have moved, RENDER_WORKERS is ignored with a warning and the sheets are updated serially.
+
+import os
+import re
+import datetime
+import multiprocessing as mp
+from io import BytesIO
+from zipfile import ZipFile, ZIP_DEFLATED
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Sequence
+
+import openpyxl
+from openpyxl.workbook.workbook import Workbook
+try:
+    from openpyxl.writer.excel import ExcelWriter
+    from openpyxl.worksheet._writer import WorksheetWriter
+    from openpyxl.worksheet.dimensions import SheetDimension
+    from openpyxl.drawing.spreadsheet_drawing import SpreadsheetDrawing
+    from openpyxl.styles.cell_style import StyleArray
+    from openpyxl.styles.numbers import BUILTIN_FORMATS_MAX_SIZE
+    _WRITER_INTERNALS = True
+except ImportError:
+    ExcelWriter = WorksheetWriter = object
+    _WRITER_INTERNALS = False
+
+from placement_common.run_metrics import METRICS
+
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "0"))
+
+# openpyxl releases (major.minor) the parallel path has been checked against
+TESTED_OPENPYXL = ("3.1",)
+
+_STYLE_ATTR = re.compile(rb'(\ss=")(\d+)(")')
+_EMPTY_SHEET_DATA = re.compile(rb"<sheetData\s*/>|<sheetData>\s*</sheetData>")
+
+# Set by render_sheets() right before the pool forks; the workers read it instead of having it pickled
+_JOB: Dict = {}
+
+def openpyxl_tested(version: str = openpyxl.__version__) -> bool:
+    return _WRITER_INTERNALS and ".".join(version.split(".")[:2]) in TESTED_OPENPYXL
+
+def parallel_available(workers: int = RENDER_WORKERS) -> bool:
+    if workers <= 1 or "fork" not in mp.get_all_start_methods():
+        return False
+    if not openpyxl_tested():
+        print(f"[WARN] RENDER_WORKERS ignored: parallel rendering isn't tested with openpyxl {openpyxl.__version__}; "
+              "updating the sheets serially")
+        return False
+    return True
+
+# A style as plain objects (font, fill, border, number format, protection, alignment, flags), valid in any workbook
+def _style_parts(wb: Workbook, sa: "StyleArray") -> tuple:
+    num_fmt = sa.numFmtId
+    if num_fmt >= BUILTIN_FORMATS_MAX_SIZE:
+        num_fmt = wb._number_formats[num_fmt - BUILTIN_FORMATS_MAX_SIZE]
+    return (
+        wb._fonts[sa.fontId], wb._fills[sa.fillId], wb._borders[sa.borderId], num_fmt,
+        wb._protections[sa.protectionId], wb._alignments[sa.alignmentId],
+        sa.pivotButton, sa.quotePrefix, sa.xfId,
+    )
+
+# Registers a style from _style_parts in wb and returns its cell style index there
+def _register_style(wb: Workbook, parts: tuple) -> int:
+    font, fill, border, num_fmt, protection, alignment, pivot, quote, xf_id = parts
+    if isinstance(num_fmt, str):
+        num_fmt = wb._number_formats.add(num_fmt) + BUILTIN_FORMATS_MAX_SIZE
+    sa = StyleArray([
+        wb._fonts.add(font), wb._fills.add(fill), wb._borders.add(border), num_fmt,
+        wb._protections.add(protection), wb._alignments.add(alignment), pivot, quote, xf_id,
+    ])
+    return wb._cell_styles.add(sa)
+
+# Worker: update one sheet in the forked workbook and render its <sheetData>
+def _render_sheet(sheet_name: str) -> Dict:
+    wb: Workbook = _JOB["wb"]
+    base_styles: int = _JOB["base_styles"]
+    first_stage = len(METRICS.stages)
+
+    _JOB["update"](wb, sheet_name)
+    ws = wb[sheet_name]
+
+    writer = WorksheetWriter(ws, out=BytesIO())
+    writer.write_rows()
+    xml = writer.read()
+    if ws._comments or ws._hyperlinks:
+        raise RuntimeError(f"Sheet '{sheet_name}' has comments or hyperlinks; render it with RENDER_WORKERS=0")
+    start = xml.index(b"<sheetData")
+    end = xml.rindex(b"</worksheet>")
+
+    return {
+        "sheet": sheet_name,
+        "sheet_data": xml[start:end],
+        "dimension": ws.calculate_dimension(),
+        "new_styles": {i: _style_parts(wb, wb._cell_styles[i]) for i in range(base_styles, len(wb._cell_styles))},
+        "tables": {name: ws.tables[name] for name in ws.tables},
+        "stages": METRICS.stages[first_stage:],
+    }
+
+# Runs update(wb, sheet_name) for every sheet in worker processes. Returns the rendered parts by sheet name.
+def render_sheets(wb: Workbook, sheet_names: Sequence[str], update: Callable[[Workbook, str], None],
+                  workers: int = RENDER_WORKERS) -> Dict[str, Dict]:
+    _JOB.update(wb=wb, update=update, base_styles=len(wb._cell_styles))
+    try:
+        ctx = mp.get_context("fork")
+        with ProcessPoolExecutor(max_workers=min(workers, len(sheet_names)), mp_context=ctx) as pool:
+            parts = list(pool.map(_render_sheet, sheet_names))
+    finally:
+        _JOB.clear()
+
+    rendered = {}
+    for part in parts:
+        METRICS.stages.extend(part.pop("stages"))
+        rendered[part["sheet"]] = part
+    return rendered
+
+# Sheet writer that takes its <sheetData> from a rendered part instead of walking the cells
+class _RenderedSheetWriter(WorksheetWriter):
+    def __init__(self, ws, part: Dict, out=None):
+        self.part = part
+        super().__init__(ws, out=out)
+
+    def write_dimensions(self):
+        self.xf.send(SheetDimension(self.part["dimension"]).to_tree())
+
+    def write_rows(self):
+        xf = self.xf.send(True)
+        with xf.element("sheetData"):
+            pass
+        self.xf.send(None)
+
+    def xml(self) -> bytes:
+        xml, n = _EMPTY_SHEET_DATA.subn(lambda _: self.part["sheet_data"], self.read(), count=1)
+        if n != 1:
+            raise RuntimeError(f"Could not place rendered sheet data for '{self.ws.title}'")
+        return xml
+
+class _AssemblingWriter(ExcelWriter):
+    def __init__(self, workbook, archive, rendered: Dict[str, Dict]):
+        super().__init__(workbook, archive)
+        self.rendered = rendered
+
+    def write_worksheet(self, ws):
+        part = self.rendered.get(ws.title)
+        if part is None:
+            return super().write_worksheet(ws)
+        ws._drawing = SpreadsheetDrawing()
+        ws._drawing.charts = ws._charts
+        ws._drawing.images = ws._images
+        writer = _RenderedSheetWriter(ws, part, out=BytesIO())
+        writer.write()
+        ws._rels = writer._rels
+        self._archive.writestr(ws.path[1:], writer.xml())
+        self.manifest.append(ws)
+
+# Remaps the workers' new styles into wb, swaps in their tables, and writes the xlsx to path
+def save_rendered(wb: Workbook, path: str, rendered: Dict[str, Dict]):
+    for part in rendered.values():
+        ws = wb[part["sheet"]]
+        remap = {old: _register_style(wb, parts) for old, parts in part["new_styles"].items()}
+        remap = {old: new for old, new in remap.items() if old != new}
+        if remap:
+            part["sheet_data"] = _STYLE_ATTR.sub(
+                lambda m: m.group(1) + str(remap.get(int(m.group(2)), int(m.group(2)))).encode() + m.group(3),
+                part["sheet_data"],
+            )
+        for name, tbl in part["tables"].items():
+            ws.tables[name] = tbl
+
+    archive = ZipFile(path, "w", ZIP_DEFLATED, allowZip64=True)
+    wb.properties.modified = datetime.datetime.now(tz=datetime.timezone.utc).replace(tzinfo=None)
+    _AssemblingWriter(wb, archive, rendered).save()
@@ -4,19 +4,42 @@
 # That all sounds pretty straightforward -- it's not. I'll explain it the best I can.
 
 import os
+import gc
 import sys
 import re
+import argparse
 import datetime as dt
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple
 from datetime import date
 import mysql.connector
 from openpyxl import load_workbook
 from openpyxl.worksheet.worksheet import Worksheet
 from openpyxl.worksheet.table import Table, TableColumn
 from openpyxl.utils import get_column_letter, column_index_from_string
-from openpyxl.styles import Alignment, Border, Side
 from pathlib import Path
 from dotenv import load_dotenv
+# The shared modules are in placement_common/ at the repository root; those that keep state keep it in this folder
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from placement_common.paths import use_report_dir
+use_report_dir(__file__)
+from placement_common.cohorts import (CohortQuery, PreparedStatements, compile_query, full_time_where, internship_where,
+                                     placeholders, FT_GRAD_CLASS, cohort_for, parse_cohorts)
+from placement_common.cohort_batch import CohortBatch, fetch_batch
+from placement_common.query_profiler import QueryProfiler, env_flag
+from placement_common.student_mirror import open_mirror
+from placement_common.change_detection import ChangeTracker
+from placement_common import rollup
+from placement_common.run_metrics import METRICS, stage, LOW_MEMORY
+from placement_common.cell_writes import CellWriteBuffer
+from parallel_sheets import parallel_available, render_sheets, save_rendered
+from dashboard import write_dashboard
+from bi_export import write_exports
+from placement_common.anomaly_guard import check_workbook
+from placement_common.wh_backfill import parse_week_label
+from placement_common.email_digest import digest_rows, digest_values, save_digest
+from placement_common.routing import current_routing
+from placement_common.safe_save import safe_save
+from placement_common.mrf_diff import CHANGES_SHEET_ENABLED, load_schema, mrf_deltas, previous_mrf, save_schema, write_changes_sheet
 
 # ----------------------------
 # 1) Global Variables
@@ -30,11 +53,11 @@ DB_USER = os.environ["DB_USER"]
 DB_PASSWORD = os.environ["DB_PASSWORD"]
 DB_NAME = os.environ["DB_NAME"]
 
+# Programs and table names come from routing.toml (routing.py). use_routing() resolves them again at the start of every
+# run, so an edited routing.toml is picked up without a restart, like the career director reports.
 # Program list (order matters and will be used for summary/program outputs)
-PROGRAMS = [
-    "BSAcc", "BSEDM", "BSEnt", "BSFin", "BSGSCM", "BSHRM",
-    "BSIS", "BSMgt", "BSMktg", "BSStrat", "MAcc", "MBA", "MISM", "MPA",
-]
+ROUTING = None
+PROGRAMS: List[str] = []
 
 # Gets today's date to use as column names
 RUN_DATE = dt.date.today()
@@ -59,6 +82,23 @@ TABLE_TOTAL_FT_WH = "FT_total_wh"
 TABLE_TOTAL_INT_MRF = "INT_total_mrf"
 TABLE_TOTAL_INT_WH = "INT_total_wh"
 
+# Where the data comes from: "mysql" (the live view), "mirror" (the local copy kept by student_mirror.py)
+# or "rollup" (the nightly precomputed counts kept by rollup.py)
+PLACEMENT_SOURCE = os.getenv("PLACEMENT_SOURCE", "mysql").strip().lower()
+
+# Per-program fingerprints from the last run, used to skip MRF rewrites for programs whose numbers didn't move
+FINGERPRINT_PATH = BASE_DIR / "fingerprints.json"
+
+# Where QUERY_PROFILE=1 writes its per-run query profiles
+PROFILE_DIR = BASE_DIR / "profiles"
+
+# Graduating classes for a batch run (--cohorts on the command line wins). Empty means the normal single-cohort run.
+COHORTS = os.getenv("COHORTS", "").strip()
+
+# DASHBOARD=1 also writes the static HTML/JSON dashboard (dashboard.py) here after every successful update
+DASHBOARD = env_flag("DASHBOARD")
+DASHBOARD_DIR = Path(os.getenv("DASHBOARD_DIR", str(BASE_DIR / "dashboard")))
+
 # Rows that the script knows to avoid, as they use a different calculation for their field
 IGNORE_LABELS = {"total", "class size", "% placed", "placement %"}
 
@@ -73,32 +113,26 @@ def is_ignored_label(s: str) -> bool:
     return s.strip().lower() in IGNORE_LABELS
 
 # Changed labels from Total to CLass Size for clarity. Use it as a safety net now to ensure it doesn't get edited
-def relabel_total_row(ws: Worksheet, min_row: int, max_row: int, min_col: int, new_label: str = "Class Size"):
-    """Rename the first-column label of the 'total' row to new_label."""
+def relabel_total_row(ws: Worksheet, min_row: int, max_row: int, min_col: int, buf: CellWriteBuffer, new_label: str = "Class Size"):
+    """Rename the first-column label of the 'total' row to new_label (written through buf)."""
     total_row_idx, _ = find_total_and_placement_rows(ws, min_row, max_row, min_col)
-    ws.cell(row=total_row_idx, column=min_col, value=new_label)
+    buf.value(total_row_idx, min_col, new_label)
 
-# Helpers that creates the By Program table names. Excel doesn't like MBA and MPA apparently so they are done a little different
+# Helpers that look up the By Program table names (the naming rules are in routing.toml)
 # Full Time Placement Tables
 def byprog_full_names(prog: str) -> Tuple[str, str]:
     """Return (most_recent_table_name, history_table_name) for Full-Time sheet."""
-    if prog in ("MBA", "MPA"):
-        return f"{prog}_1", f"{prog}_2"
-    return f"{prog}1", f"{prog}2"
+    return ROUTING.tables[prog][0], ROUTING.tables[prog][1]
 
 # Internship Placement Tables
 def byprog_int_names(prog: str) -> Tuple[str, str]:
     """Return (most_recent_table_name, history_table_name) for Internships sheet."""
-    return f"{prog}_int1", f"{prog}_int2"
+    return ROUTING.internship_tables[prog]
 
 # ----------------------------
 # 2) SQL
 # ----------------------------
 
-# It builds a comma-separated list of SQL parameter placeholders wrapped in parentheses. It'll allow us to query for each program separetly at the same time.
-def build_program_in_clause(placeholders: int) -> str:
-    return "(" + ",".join(["%s"] * placeholders) + ")"
-
 # Creates the summary sheet: compares each program to each other
 SQL_SUMMARY_TEMPLATE = """
 SELECT
@@ -110,82 +144,76 @@ SELECT
     SUM(CASE WHEN is_international = 1 AND (work_authorization NOT IN ('U.S. Permanent Resident', 'U.S. Citizen') OR work_authorization IS NULL) THEN 1 ELSE 0 END) AS intl_all,
     COUNT(*) AS total
 FROM msmdatabase.bcc_student_view
-WHERE ((class_of = 2026 and enroll_status IN ("Enrolled", "Graduated")) or (class_of IN (2024, 2025) and enroll_status = "Enrolled"))
-  AND program NOT IN ('EMBA','EMPA','StratMnr')
-  AND program IN {IN_LIST}
-  AND enroll_status IN ('Enrolled','Graduated')
-  AND record_status = 'A'
-  AND semester_byu NOT IN (20265, 20275, 20285)
+{COHORT}  AND program IN {IN_LIST}
 GROUP BY program
 ORDER BY program;
 """
 
 # Creates the second sheet that has full time MSB class totals split up by job_search_status
-SQL_TOTAL_FULL = """
+SQL_TOTAL_FULL_TEMPLATE = """
 SELECT
     COALESCE(job_search_status, 'Not Reported') AS job_search_status,
     COUNT(*) AS count
 FROM msmdatabase.bcc_student_view
-WHERE ((class_of = 2026 and enroll_status IN ("Enrolled", "Graduated")) or (class_of IN (2024, 2025) and enroll_status = "Enrolled"))
-  AND program NOT IN ('EMBA','EMPA','StratMnr')
-  AND enroll_status IN ('Enrolled','Graduated')
-  AND record_status = 'A'
-  AND semester_byu NOT IN (20265, 20275, 20285)
-GROUP BY COALESCE(job_search_status, 'Not Reported')
+{COHORT}GROUP BY COALESCE(job_search_status, 'Not Reported')
 ORDER BY job_search_status;
 """
 
 # Creates the fourth sheet that has internship MSB class totals split up by job_search_status
-SQL_TOTAL_INT = """
+SQL_TOTAL_INT_TEMPLATE = """
 SELECT
     COALESCE(internship_search_status, 'Not Reported') AS internship_search_status,
     COUNT(*) AS count
 FROM msmdatabase.bcc_student_view
-WHERE class_of IN ('2027', '2028', '2029')
-  AND program NOT IN ('EMBA','EMPA','StratMnr')
-  AND enroll_status IN ('Enrolled','Graduated')
-  AND record_status = 'A'
-  AND semester_byu NOT IN (20265, 20275, 20285)
-GROUP BY COALESCE(internship_search_status, 'Not Reported')
+{COHORT}GROUP BY COALESCE(internship_search_status, 'Not Reported')
 ORDER BY internship_search_status;
 """
 
 # gets each program's full time job search status
-SQL_BY_PROGRAM_FULL = """
+SQL_BY_PROGRAM_FULL_TEMPLATE = """
 SELECT
     COALESCE(job_search_status, 'Not Reported') AS job_search_status,
     COUNT(*) AS count
 FROM msmdatabase.bcc_student_view
-WHERE ((class_of = 2026 and enroll_status IN ("Enrolled", "Graduated")) or (class_of IN (2024, 2025) and enroll_status = "Enrolled"))
-  AND program NOT IN ('EMBA','EMPA','StratMnr')
-  AND program = %s
-  AND enroll_status IN ('Enrolled','Graduated')
-  AND record_status = 'A'
-  AND semester_byu NOT IN (20265, 20275, 20285)
+{COHORT}  AND program = %s
 GROUP BY COALESCE(job_search_status, 'Not Reported')
 ORDER BY job_search_status;
 """
 
 # gets each program's internship job search status
-SQL_BY_PROGRAM_INT = """
+SQL_BY_PROGRAM_INT_TEMPLATE = """
 SELECT
     COALESCE(internship_search_status, 'Not Reported') AS internship_search_status,
     COUNT(*) AS count
 FROM msmdatabase.bcc_student_view
-WHERE class_of IN ('2027', '2028', '2029')
-  AND program NOT IN ('EMBA','EMPA','StratMnr')
-  AND program = %s
-  AND enroll_status IN ('Enrolled','Graduated')
-  AND record_status = 'A'
-  AND semester_byu NOT IN (20265, 20275, 20285)
+{COHORT}  AND program = %s
 GROUP BY COALESCE(internship_search_status, 'Not Reported')
 ORDER BY internship_search_status;
 """
 
-# This executes each SQL query using the connection to the DB
-def fetch_rows(cursor, sql: str, params: Tuple = ()) -> List[Tuple]:
-    cursor.execute(sql, params)
-    return list(cursor.fetchall())
+# Compiled once at import: each query carries its cohort parameters, and the per-program queries take the program as the last parameter.
+# SQL_SUMMARY lists the programs, so it's compiled by use_routing() instead.
+SQL_SUMMARY = None
+SQL_TOTAL_FULL = compile_query(SQL_TOTAL_FULL_TEMPLATE, full_time_where(), "SQL_TOTAL_FULL")
+SQL_TOTAL_INT = compile_query(SQL_TOTAL_INT_TEMPLATE, internship_where(), "SQL_TOTAL_INT")
+SQL_BY_PROGRAM_FULL = compile_query(SQL_BY_PROGRAM_FULL_TEMPLATE, full_time_where(), "SQL_BY_PROGRAM_FULL")
+SQL_BY_PROGRAM_INT = compile_query(SQL_BY_PROGRAM_INT_TEMPLATE, internship_where(), "SQL_BY_PROGRAM_INT")
+
+# Resolves the routing for a run (routing.toml is only re-read if it changed) and compiles the SQL that lists the programs.
+# Also called at import, for callers that use the helpers without running main() (the backfill, chart_list()).
+def use_routing():
+    global ROUTING, PROGRAMS, SQL_SUMMARY
+    ROUTING = current_routing()
+    PROGRAMS = list(ROUTING.programs)
+    SQL_SUMMARY = compile_query(SQL_SUMMARY_TEMPLATE, full_time_where(), "SQL_SUMMARY", IN_LIST=placeholders(len(PROGRAMS)))
+
+use_routing()
+
+# This executes each SQL query through the run's prepared statements (timed as a "query" stage)
+def fetch_rows(statements: PreparedStatements, query: CohortQuery, params: Tuple = ()) -> List[Tuple]:
+    detail = f"{query.name}:{params[0]}" if len(params) == 1 else query.name
+    with stage("query", detail):
+        return statements.fetch(query, params)
 
 # ----------------------------
 # 3) Excel Functions 
@@ -305,43 +333,35 @@ def placement_percent(accepted: float, seeking: float, not_reported: float) -> f
         return 0.0
     return round((accepted or 0) * 100.0 / denom, 2)
 
-# Formats the percents the same way across the board: with two decimals
-def write_percent(cell, value: float):
-    cell.value = value / 100.0
-    cell.number_format = "0.00%"
-
 # Sets the data column's headers to the current date
-def ensure_header(ws: Worksheet, header_row: int, label_col: int, data_cols: List[int], header_label: str, force_append: bool=False):
+def ensure_header(buf: CellWriteBuffer, header_row: int, label_col: int, data_cols: List[int], header_label: str, force_append: bool=False):
     """
     For MRF: set the single data column header to run date label.
     For WH: add a new column at right with the run date header and return new data_cols list including it.
+    A WH table whose last column already has this header (a rerun on the same day) keeps it; it gets rewritten.
+    The header is written through buf, with the rest of the table update.
     """
     if force_append:
+        if parse_week_label(buf.get(header_row, data_cols[-1])) == parse_week_label(header_label):
+            return data_cols
         new_col_idx = data_cols[-1] + 1
-        ws.cell(row=header_row, column=new_col_idx, value=header_label)
+        buf.value(header_row, new_col_idx, header_label)
         return data_cols + [new_col_idx]
     
     # MRF (exactly one data column)
     if len(data_cols) == 1:
-        ws.cell(row=header_row, column=data_cols[0], value=header_label)
+        buf.value(header_row, data_cols[0], header_label)
         return data_cols
 
     # WH (append new column)
     new_col_idx = data_cols[-1] + 1
-    ws.cell(row=header_row, column=new_col_idx, value=header_label)
+    buf.value(header_row, new_col_idx, header_label)
 
     return data_cols + [new_col_idx]
 
-# Combines most of the functions to update the MRF (Most Recent Friday) tables
-def update_mrf_table(
-    ws: Worksheet, tbl_name: str, results: List[Tuple[str, int]], status_field: str
-):
-    """
-    Replace counts for the single latest column and set its header to RUN_DATE_LABEL.
-    - status_field is 'job_search_status' or 'internship_search_status' (only used for error messages).
-    """
-    right_align = Alignment(horizontal='right')
-    print(tbl_name)
+# Sets the MRF table's single data column header to RUN_DATE_LABEL (and keeps the table metadata in sync).
+# Used on its own when a program's numbers didn't change, so the table still shows the date it was checked.
+def refresh_mrf_header(ws: Worksheet, tbl_name: str, buf: CellWriteBuffer) -> Tuple[int, int, int, int, List[int]]:
     tbl = get_table(ws, tbl_name)
     min_row, max_row, min_col, max_col = table_bounds(tbl.ref)
     header_expected = expected_header_for_table(ws, tbl_name)
@@ -354,47 +374,62 @@ def update_mrf_table(
         raise RuntimeError(f"MRF table '{tbl_name}' should have exactly 1 data column; found {len(data_cols)}.")
 
     # Update header to run date
-    ensure_header(ws, header_row, label_col, data_cols, RUN_DATE_LABEL)
+    ensure_header(buf, header_row, label_col, data_cols, RUN_DATE_LABEL)
     # Updates Metadata so that it matches new Column name
     tc_container = getattr(tbl, "tableColumns", None)
     tc_list = getattr(tc_container, "tableColumn", None) or tc_container
     idx = data_cols[0] - min_col
-    tc_list[idx].name = str(ws.cell(row=header_row, column=data_cols[0]).value or f"Column{idx+1}").strip()
+    tc_list[idx].name = str(buf.get(header_row, data_cols[0]) or f"Column{idx+1}").strip()
+    return min_row, max_row, min_col, header_row, data_cols
 
+# Combines most of the functions to update the MRF (Most Recent Friday) tables
+def update_mrf_table(
+    ws: Worksheet, tbl_name: str, results: List[Tuple[str, int]], status_field: str
+):
+    """
+    Replace counts for the single latest column and set its header to RUN_DATE_LABEL.
+    - status_field is 'job_search_status' or 'internship_search_status' (only used for error messages).
+    """
+    print(tbl_name)
     # Map of status->count from SQL
     sql_map: Dict[str, int] = {r[0]: int(r[1]) for r in results}
 
-    # Find Total/Placement rows
-    total_row_idx, placement_row_idx = find_total_and_placement_rows(ws, min_row, max_row, min_col)
-    relabel_total_row(ws, min_row, max_row, min_col, new_label="Class Size")
-
-    # Walk data rows, write counts; collect which statuses exist
-    seen = set()
-    for r in range(header_row + 1, max_row + 1):
-        label = ws.cell(row=r, column=label_col).value
-        if label is None:
-            continue
-        lstr = str(label).strip()
-        if is_ignored_label(lstr):
-            continue
-        if lstr in sql_map:
-            ws.cell(row=r, column=data_cols[0], value=int(sql_map[lstr]))
-            seen.add(lstr)
-        else:
-            ws.cell(row=r, column=data_cols[0], value='-').alignment = right_align
-            
-    # Recompute totals and placement for the single column
-    compute_totals_and_placement(ws, min_row, max_row, min_col, [data_cols[0]])
+    with CellWriteBuffer(ws) as buf:
+        min_row, max_row, min_col, header_row, data_cols = refresh_mrf_header(ws, tbl_name, buf)
+        label_col = min_col
+
+        # Find Total/Placement rows
+        total_row_idx, placement_row_idx = find_total_and_placement_rows(ws, min_row, max_row, min_col)
+        relabel_total_row(ws, min_row, max_row, min_col, buf, new_label="Class Size")
+
+        # Walk data rows, write counts; collect which statuses exist
+        seen = set()
+        for r in range(header_row + 1, max_row + 1):
+            label = ws.cell(row=r, column=label_col).value
+            if label is None:
+                continue
+            lstr = str(label).strip()
+            if is_ignored_label(lstr):
+                continue
+            if lstr in sql_map:
+                buf.value(r, data_cols[0], int(sql_map[lstr]))
+                seen.add(lstr)
+            else:
+                buf.dash(r, data_cols[0])
+
+        # Recompute totals and placement for the single column
+        compute_totals_and_placement(ws, min_row, max_row, min_col, [data_cols[0]], buf)
 
 # Combines all the functions to update the WH tables (Weekly History) tables
 def update_wh_table(
-    ws: Worksheet, tbl_name: str, results: List[Tuple[str, int]], status_field: str
+    ws: Worksheet, tbl_name: str, results: List[Tuple[str, int]], status_field: str, recompute_all: bool = True
 ):
     """
     Append a new column to the right for WH tables, labeled with RUN_DATE_LABEL, and populate counts.
+    On a rerun the same day, the column already labeled RUN_DATE_LABEL is overwritten instead.
     Insert any new statuses above the Total row; zero-fill older columns for those new rows.
+    - recompute_all=False only recomputes totals for the new column (used when the program's numbers didn't change).
     """
-    right_align = Alignment(horizontal='right')
     tbl = get_table(ws, tbl_name)
     min_row, max_row, min_col, max_col = table_bounds(tbl.ref)
     header_expected = expected_header_for_table(ws, tbl_name)
@@ -402,54 +437,61 @@ def update_wh_table(
     label_col = min_col
     existing_data_cols = list(range(min_col + 1, max_col + 1))
 
-    # Add new column header
-    new_data_cols = ensure_header(ws, header_row, label_col, existing_data_cols, RUN_DATE_LABEL, force_append=True)
-    if len(new_data_cols) == len(existing_data_cols):
-        # Should not happen for WH; defensive
-        raise RuntimeError(f"WH table '{tbl_name}' did not get a new column appended.")
-
-    newest_col = new_data_cols[-1]
-    # Expand the table to include the new column
-    set_table_ref(ws, tbl, min_row, max_row, min_col, newest_col)
-
     # Map SQL results
     sql_map: Dict[str, int] = {r[0]: int(r[1]) for r in results}
 
     # Find Total/Placement rows
     total_row_idx, placement_row_idx = find_total_and_placement_rows(ws, min_row, max_row, min_col)
-    relabel_total_row(ws, min_row, max_row, min_col, new_label="Class Size")
-
-    # Format Line above Total
-    newest_col = new_data_cols[-1]
-    row_idx = total_row_idx - 1
-    thin_border = Border(bottom=Side(style="thin", color="000000"))
-    cell = ws.cell(row=row_idx, column=newest_col)
-    cell.border = thin_border
-
-    # Fill existing statuses
-    seen = set()
-    for r in range(header_row + 1, max_row + 1):
-        label = ws.cell(row=r, column=label_col).value
-        if label is None:
-            continue
-        lstr = str(label).strip()
-        if is_ignored_label(lstr):
-            continue
-        if lstr in sql_map:
-            ws.cell(row=r, column=newest_col, value=int(sql_map[lstr]))
-            seen.add(lstr)
-        else:
-            ws.cell(row=r, column=newest_col, value='-').alignment = right_align
 
-    # Recompute totals and placement for ALL columns (safer)
-    compute_totals_and_placement(ws, min_row, max_row, min_col, new_data_cols)
+    with CellWriteBuffer(ws) as buf:
+        # Add new column header (or reuse today's)
+        new_data_cols = ensure_header(buf, header_row, label_col, existing_data_cols, RUN_DATE_LABEL, force_append=True)
+        newest_col = new_data_cols[-1]
+        relabel_total_row(ws, min_row, max_row, min_col, buf, new_label="Class Size")
+
+        # Format Line above Total
+        buf.border(total_row_idx - 1, newest_col)
+
+        # Fill existing statuses
+        seen = set()
+        for r in range(header_row + 1, max_row + 1):
+            label = ws.cell(row=r, column=label_col).value
+            if label is None:
+                continue
+            lstr = str(label).strip()
+            if is_ignored_label(lstr):
+                continue
+            if lstr in sql_map:
+                buf.value(r, newest_col, int(sql_map[lstr]))
+                seen.add(lstr)
+            else:
+                buf.dash(r, newest_col)
+
+        # Recompute totals and placement for ALL columns (safer), or just the new one if nothing changed
+        compute_totals_and_placement(ws, min_row, max_row, min_col, new_data_cols if recompute_all else [newest_col], buf)
+
+    # Expand the table to include the new column (after the flush, so the new header names its metadata column)
+    set_table_ref(ws, tbl, min_row, max_row, min_col, newest_col)
+
+# Updates an MRF/WH pair. If the numbers didn't change since the last run, the MRF table only gets its date refreshed
+# and the WH table gets its new column without recomputing the older ones.
+def update_table_pair(ws: Worksheet, mrf_name: str, wh_name: str, results: List[Tuple[str, int]], status_field: str, changed: bool = True):
+    with stage("table_update", mrf_name):
+        if changed:
+            update_mrf_table(ws, mrf_name, results, status_field)
+        else:
+            with CellWriteBuffer(ws) as buf:
+                refresh_mrf_header(ws, mrf_name, buf)
+    with stage("table_update", wh_name):
+        update_wh_table(ws, wh_name, results, status_field, recompute_all=changed)
 
 # Totals all of the data to get class size AND creates the placement percentage. These are the special functions that INGORE labels made sure to skip
-def compute_totals_and_placement(ws: Worksheet, min_row: int, max_row: int, min_col: int, data_cols: List[int]):
+def compute_totals_and_placement(ws: Worksheet, min_row: int, max_row: int, min_col: int, data_cols: List[int], buf: CellWriteBuffer):
     """
     For each data column in data_cols:
     - Write Total = sum of all numeric rows (excluding 'Total' and '% Placed')
     - Write Placement % = Accepted / (Accepted + Seeking + Not Reported)
+    Reads and writes go through buf, so counts written earlier in the same table update are included.
     """
     label_col = min_col
     total_row_idx, placement_row_idx = find_total_and_placement_rows(ws, min_row, max_row, min_col)
@@ -469,20 +511,20 @@ def compute_totals_and_placement(ws: Worksheet, min_row: int, max_row: int, min_
         # Total
         running = 0
         for lbl, row_idx in status_to_row.items():
-            val = to_int(ws.cell(row=row_idx, column=col).value)
+            val = to_int(buf.get(row_idx, col))
             try:
                 running += int(val or 0)
             except Exception:
                 running += 0
-        ws.cell(row=total_row_idx, column=col, value=running)
+        buf.value(total_row_idx, col, running)
 
         # Placement %
-        acc_val = to_int(ws.cell(row=status_to_row.get(STATUS_ACCEPTED, 0), column=col).value if STATUS_ACCEPTED in status_to_row else 0)
-        seek_val = to_int(ws.cell(row=status_to_row.get(STATUS_SEEKING, 0), column=col).value if STATUS_SEEKING in status_to_row else 0)
-        nr_val = to_int(ws.cell(row=status_to_row.get(STATUS_NOT_REPORTED, 0), column=col).value if STATUS_NOT_REPORTED in status_to_row else 0)
+        acc_val = to_int(buf.get(status_to_row[STATUS_ACCEPTED], col) if STATUS_ACCEPTED in status_to_row else 0)
+        seek_val = to_int(buf.get(status_to_row[STATUS_SEEKING], col) if STATUS_SEEKING in status_to_row else 0)
+        nr_val = to_int(buf.get(status_to_row[STATUS_NOT_REPORTED], col) if STATUS_NOT_REPORTED in status_to_row else 0)
 
         pct = placement_percent(acc_val or 0, seek_val or 0, nr_val or 0)
-        write_percent(ws.cell(row=placement_row_idx, column=col), pct)
+        buf.percent(placement_row_idx, col, pct)
 
 # for counting totals and creating placement percentage: ensure they are ints and no data cells are skipped
 def to_int(v):
@@ -541,6 +583,7 @@ def update_summary_sheet(ws: Worksheet, rows: List[Tuple]):
         raise RuntimeError(f"Summary headers missing or mismatched: {missing_headers}")
 
     # Write rows in PROGRAMS order
+    buf = CellWriteBuffer(ws)
     r = header_row + 1
     for prog in PROGRAMS:
         data = by_prog.get(prog, {
@@ -557,99 +600,307 @@ def update_summary_sheet(ws: Worksheet, rows: List[Tuple]):
         pct_null = round((data["no_info"] * 100.0 / data["total"]), 2) if data["total"] else 0.0
 
         # Write
-        ws.cell(row=r, column=headers["program"], value=prog)
-        write_percent(ws.cell(row=r, column=headers["% placed"]), pct_placed)
-        ws.cell(row=r, column=headers["offers accepted"], value=data["offer_accepted"])
-        ws.cell(row=r, column=headers["still seeking"], value=data["still_seeking"])
-        ws.cell(row=r, column=headers["int'l"], value=data["intl_all"])
-        ws.cell(row=r, column=headers["no info*"], value=data["no_info"])
-        ws.cell(row=r, column=headers["not seeking"], value=data["not_seeking"])
-        ws.cell(row=r, column=headers["total"], value=data["total"])
-        write_percent(ws.cell(row=r, column=headers["% ns**"]), pct_ns)
-        write_percent(ws.cell(row=r, column=headers["% null"]), pct_null)
+        buf.value(r, headers["program"], prog)
+        buf.percent(r, headers["% placed"], pct_placed)
+        buf.value(r, headers["offers accepted"], data["offer_accepted"])
+        buf.value(r, headers["still seeking"], data["still_seeking"])
+        buf.value(r, headers["int'l"], data["intl_all"])
+        buf.value(r, headers["no info*"], data["no_info"])
+        buf.value(r, headers["not seeking"], data["not_seeking"])
+        buf.value(r, headers["total"], data["total"])
+        buf.percent(r, headers["% ns**"], pct_ns)
+        buf.percent(r, headers["% null"], pct_null)
 
         r += 1
+    buf.flush()
 
 # ----------------------------
-# 5) Main workflow: connect to DB -> run SQL queries -> open Excel workbook -> update each of the sheets -> save and create a copy for history
+# 4) Data snapshot: every number the workbook needs, in one dict
 # ----------------------------
 
-def main():
-    template_path = os.path.join(os.path.dirname(__file__), "weekly_placement_report.xlsx")
-
-    if not os.path.exists(template_path):
-        raise FileNotFoundError(f"Template not found at: {template_path}")
-
-    # Connect DB
-    conn = mysql.connector.connect(
-        host=DB_HOST, user=DB_USER, password=DB_PASSWORD, database=DB_NAME, autocommit=False
-    )
-    cur = conn.cursor()
-
-    # Build and run summary SQL with IN clause for PROGRAMS
-    in_clause = build_program_in_clause(len(PROGRAMS))
-    sql_summary = SQL_SUMMARY_TEMPLATE.format(IN_LIST=in_clause)
-    summary_rows = fetch_rows(cur, sql_summary, tuple(PROGRAMS))
+# Runs the report queries (against the live view or the mirror)
+def query_report_data(cur) -> Dict:
+    data = {
+        "summary": fetch_rows(cur, SQL_SUMMARY, tuple(PROGRAMS)),
+        "total_ft": fetch_rows(cur, SQL_TOTAL_FULL),
+        "total_int": fetch_rows(cur, SQL_TOTAL_INT),
+        "byprog_ft": {},
+        "byprog_int": {},
+    }
+    for prog in PROGRAMS:
+        data["byprog_ft"][prog] = fetch_rows(cur, SQL_BY_PROGRAM_FULL, (prog,))
+        data["byprog_int"][prog] = fetch_rows(cur, SQL_BY_PROGRAM_INT, (prog,))
+    return data
+
+# Reads the same numbers out of a nightly rollup snapshot
+def rollup_report_data(db, snapshot_date: date) -> Dict:
+    return {
+        "summary": rollup.summary_rows(db, snapshot_date, PROGRAMS),
+        "total_ft": rollup.full_time_counts(db, snapshot_date),
+        "total_int": rollup.internship_counts(db, snapshot_date),
+        "byprog_ft": {p: rollup.full_time_counts(db, snapshot_date, [p]) for p in PROGRAMS},
+        "byprog_int": {p: rollup.internship_counts(db, snapshot_date, [p]) for p in PROGRAMS},
+    }
 
-    # Totals
-    total_ft_rows = fetch_rows(cur, SQL_TOTAL_FULL)
-    total_int_rows = fetch_rows(cur, SQL_TOTAL_INT)
+# The same numbers for one cohort of a batch run (see cohort_batch.py)
+def batch_report_data(batch: CohortBatch, grad_class: int) -> Dict:
+    return {
+        "summary": batch.summary_rows(grad_class, PROGRAMS),
+        "total_ft": batch.full_time_counts(grad_class),
+        "total_int": batch.internship_counts(grad_class),
+        "byprog_ft": {p: batch.full_time_counts(grad_class, [p]) for p in PROGRAMS},
+        "byprog_int": {p: batch.internship_counts(grad_class, [p]) for p in PROGRAMS},
+    }
 
-    # Per-program buckets
-    byprog_ft: Dict[str, List[Tuple[str, int]]] = {}
-    byprog_int: Dict[str, List[Tuple[str, int]]] = {}
+# Connects to the live view or the mirror, per PLACEMENT_SOURCE (wrapped in the profiler with QUERY_PROFILE=1)
+def open_statements():
+    with stage("db_connect", PLACEMENT_SOURCE):
+        if PLACEMENT_SOURCE == "mirror":
+            cur = open_mirror()
+        else:
+            conn = mysql.connector.connect(
+                host=DB_HOST, user=DB_USER, password=DB_PASSWORD, database=DB_NAME, autocommit=False
+            )
+            cur = PreparedStatements(conn)
+    if env_flag("QUERY_PROFILE"):
+        cur = QueryProfiler(cur, explain=env_flag("QUERY_PROFILE_EXPLAIN"))
+    return cur
+
+# Picks the data source from PLACEMENT_SOURCE and returns the snapshot
+def fetch_report_data() -> Dict:
+    if PLACEMENT_SOURCE == "rollup":
+        with stage("db_connect", PLACEMENT_SOURCE):
+            db, snapshot_date = rollup.open_for_run(RUN_DATE)
+        try:
+            return rollup_report_data(db, snapshot_date)
+        finally:
+            db.close()
+
+    # Connect DB (or open the local mirror)
+    cur = open_statements()
+    try:
+        data = query_report_data(cur)
+        if isinstance(cur, QueryProfiler):
+            cur.write_profile(PROFILE_DIR)
+    finally:
+        cur.close()
+        cur.conn.close()
+    return data
+
+# The sheets in the order they're updated
+SHEET_ORDER = [SHEET_SUMMARY_FT, SHEET_TOTAL_FT, SHEET_BYPROG_FT, SHEET_TOTAL_INT, SHEET_BYPROG_INT]
+
+# Which tables' numbers changed since the last run, by change-tracker key. Worked out up front so the sheets can be
+# updated in any order (or in separate processes) without touching the tracker.
+def change_flags(tracker: ChangeTracker, data: Dict) -> Dict[str, bool]:
+    changed = {"FT:total": tracker.changed("FT:total", data["total_ft"])}
     for prog in PROGRAMS:
-        byprog_ft[prog] = fetch_rows(cur, SQL_BY_PROGRAM_FULL, (prog,))
-        byprog_int[prog] = fetch_rows(cur, SQL_BY_PROGRAM_INT, (prog,))
-
-    cur.close()
-    conn.close()
+        changed[f"FT:{prog}"] = tracker.changed(f"FT:{prog}", data["byprog_ft"][prog])
+    changed["INT:total"] = tracker.changed("INT:total", data["total_int"])
+    for prog in PROGRAMS:
+        changed[f"INT:{prog}"] = tracker.changed(f"INT:{prog}", data["byprog_int"][prog])
+    return changed
 
-    # Open workbook
-    wb = load_workbook(template_path, data_only=False)
+# Updates one sheet from the data snapshot
+def update_sheet(wb, sheet_name: str, data: Dict, changed: Dict[str, bool]):
+    ws = wb[sheet_name]
 
     # 1) Summary – Full Time
-    ws = wb[SHEET_SUMMARY_FT]
-    update_summary_sheet(ws, summary_rows)
-    print("Updated Summary - Full Time")
+    if sheet_name == SHEET_SUMMARY_FT:
+        with stage("table_update", TABLE_SUMMARY):
+            update_summary_sheet(ws, data["summary"])
 
     # 2) Total – Full Time (MRF replace & WH append)
-    ws_ft_total = wb[SHEET_TOTAL_FT]
-    update_mrf_table(ws_ft_total, TABLE_TOTAL_FT_MRF, total_ft_rows, "job_search_status")
-    update_wh_table(ws_ft_total, TABLE_TOTAL_FT_WH, total_ft_rows, "job_search_status")
-    print("Updated Total - Full Time")
+    elif sheet_name == SHEET_TOTAL_FT:
+        update_table_pair(ws, TABLE_TOTAL_FT_MRF, TABLE_TOTAL_FT_WH, data["total_ft"], "job_search_status",
+                          changed["FT:total"])
 
     # 3) By Program – Full Time
-    ws_ft_prog = wb[SHEET_BYPROG_FT]
-    for prog in PROGRAMS:
-        t1, t2 = byprog_full_names(prog)
-        update_mrf_table(ws_ft_prog, t1, byprog_ft[prog], "job_search_status")
-        update_wh_table(ws_ft_prog, t2, byprog_ft[prog], "job_search_status")
-    print("Updated By Program - Full Time")
+    elif sheet_name == SHEET_BYPROG_FT:
+        for prog in PROGRAMS:
+            t1, t2 = byprog_full_names(prog)
+            update_table_pair(ws, t1, t2, data["byprog_ft"][prog], "job_search_status", changed[f"FT:{prog}"])
 
     # 4) Total – Internships (MRF replace & WH append)
-    ws_int_total = wb[SHEET_TOTAL_INT]
-    update_mrf_table(ws_int_total, TABLE_TOTAL_INT_MRF, total_int_rows, "internship_search_status")
-    update_wh_table(ws_int_total, TABLE_TOTAL_INT_WH, total_int_rows, "internship_search_status")
-    print("Updated Total - Internships")
+    elif sheet_name == SHEET_TOTAL_INT:
+        update_table_pair(ws, TABLE_TOTAL_INT_MRF, TABLE_TOTAL_INT_WH, data["total_int"], "internship_search_status",
+                          changed["INT:total"])
 
     # 5) By Program – Internships
-    ws_int_prog = wb[SHEET_BYPROG_INT]
+    elif sheet_name == SHEET_BYPROG_INT:
+        for prog in PROGRAMS:
+            t1, t2 = byprog_int_names(prog)
+            update_table_pair(ws, t1, t2, data["byprog_int"][prog], "internship_search_status", changed[f"INT:{prog}"])
+
+    else:
+        raise RuntimeError(f"No updater for sheet '{sheet_name}'")
+    print(f"Updated {sheet_name}")
+
+# Every WH table with the data-snapshot rows that feed it, as (sheet, table, rows(data)). Used by the backfill.
+def wh_tables() -> List[Tuple[str, str, Callable[[Dict], List[Tuple[str, int]]]]]:
+    tables = [(SHEET_TOTAL_FT, TABLE_TOTAL_FT_WH, lambda d: d["total_ft"])]
+    tables += [(SHEET_BYPROG_FT, byprog_full_names(p)[1], lambda d, p=p: d["byprog_ft"][p]) for p in PROGRAMS]
+    tables.append((SHEET_TOTAL_INT, TABLE_TOTAL_INT_WH, lambda d: d["total_int"]))
+    tables += [(SHEET_BYPROG_INT, byprog_int_names(p)[1], lambda d, p=p: d["byprog_int"][p]) for p in PROGRAMS]
+    return tables
+
+# Every MRF table with the data-snapshot rows that feed it, as (sheet, table, rows(data)). Used by the Changes sheet.
+def mrf_tables() -> List[Tuple[str, str, Callable[[Dict], List[Tuple[str, int]]]]]:
+    tables = [(SHEET_TOTAL_FT, TABLE_TOTAL_FT_MRF, lambda d: d["total_ft"])]
+    tables += [(SHEET_BYPROG_FT, byprog_full_names(p)[0], lambda d, p=p: d["byprog_ft"][p]) for p in PROGRAMS]
+    tables.append((SHEET_TOTAL_INT, TABLE_TOTAL_INT_MRF, lambda d: d["total_int"]))
+    tables += [(SHEET_BYPROG_INT, byprog_int_names(p)[0], lambda d, p=p: d["byprog_int"][p]) for p in PROGRAMS]
+    return tables
+
+# The month-end charts (month_end_charts.py): MSB-wide, then one per program, each with full time and internship % Placed
+def chart_list() -> List[Tuple[str, str, List[Tuple[str, Tuple[str, str]]]]]:
+    charts = [("MSB", "MSB Placement Trend", [
+        ("Full Time", (SHEET_TOTAL_FT, TABLE_TOTAL_FT_WH)), ("Internships", (SHEET_TOTAL_INT, TABLE_TOTAL_INT_WH)),
+    ])]
     for prog in PROGRAMS:
-        t1, t2 = byprog_int_names(prog)
-        update_mrf_table(ws_int_prog, t1, byprog_int[prog], "internship_search_status")
-        update_wh_table(ws_int_prog, t2, byprog_int[prog], "internship_search_status")
-    print("Updated By Program - Internships")
+        charts.append((prog, f"{prog} Placement Trend", [
+            ("Full Time", (SHEET_BYPROG_FT, byprog_full_names(prog)[1])),
+            ("Internships", (SHEET_BYPROG_INT, byprog_int_names(prog)[1])),
+        ]))
+    return charts
+
+# ----------------------------
+# 5) Main workflow: connect to DB -> run SQL queries -> open Excel workbook -> update each of the sheets -> save and create a copy for history
+# ----------------------------
+
+# The workbook for a graduating class: the main report for FT_GRAD_CLASS, classof<year>/ for the others
+def cohort_template_path(grad_class: int = FT_GRAD_CLASS) -> str:
+    if grad_class == FT_GRAD_CLASS:
+        return os.path.join(os.path.dirname(__file__), "weekly_placement_report.xlsx")
+    return os.path.join(os.path.dirname(__file__), f"classof{grad_class}", "weekly_placement_report.xlsx")
+
+# The email digest's inputs: the MSB totals, then each program (full time and internship rows)
+def report_digest_values(data: Dict) -> Dict:
+    groups = [("MSB", data["total_ft"], data["total_int"])]
+    groups += [(prog, data["byprog_ft"][prog], data["byprog_int"][prog]) for prog in PROGRAMS]
+    return digest_values(groups)
+
+# Opens, updates and saves one workbook from a data snapshot. Returns the email digest rows.
+def update_workbook(template_path: str, data: Dict, tracker_scope: str, dashboard_dir: Path = DASHBOARD_DIR,
+                    grad_class: int = FT_GRAD_CLASS):
+    # CHANGES_SHEET=1: the MRF values about to be overwritten, streamed from the file on disk (mrf_diff.py)
+    if CHANGES_SHEET_ENABLED:
+        with stage("mrf_diff", os.path.basename(template_path)):
+            schema = load_schema(tracker_scope)
+            previous = previous_mrf(template_path, schema)
+
+    with stage("workbook_load", os.path.basename(template_path)):
+        wb = load_workbook(template_path, data_only=False)
+    # Stop here, before anything is written, if this run's counts are far off the weekly history (anomaly_guard.py)
+    with stage("anomaly_guard", os.path.basename(template_path)):
+        check_workbook(wb, wh_tables(), data, RUN_DATE, os.path.basename(template_path))
+    tracker = ChangeTracker(FINGERPRINT_PATH, tracker_scope)
+
+    changed = change_flags(tracker, data)
+
+    # Update the five sheets -- in worker processes with RENDER_WORKERS > 1, one after another otherwise
+    if parallel_available():
+        with stage("sheet_render", f"{len(SHEET_ORDER)} sheets"):
+            rendered = render_sheets(wb, SHEET_ORDER, lambda wb_, name: update_sheet(wb_, name, data, changed))
+    else:
+        rendered = None
+        for sheet_name in SHEET_ORDER:
+            update_sheet(wb, sheet_name, data, changed)
+
+    if CHANGES_SHEET_ENABLED:
+        write_changes_sheet(wb, mrf_deltas(previous, mrf_tables(), data), RUN_DATE_LABEL, bool(schema))
+
+    # Save over the template as the weekly report: temp file + rename, the previous one kept in backups/ (safe_save.py)
+    with stage("workbook_save", os.path.basename(template_path)):
+        if rendered is not None:
+            safe_save(lambda f: save_rendered(wb, f, rendered), template_path)
+        else:
+            safe_save(wb.save, template_path)
+    if CHANGES_SHEET_ENABLED:
+        save_schema(tracker_scope, wb, mrf_tables())
+    if LOW_MEMORY:
+        # The email step runs in this same process; don't carry the workbook's cells into it
+        wb.close()
+        del wb
+        gc.collect()
+
+    # Only remember this run's numbers once the workbook is safely saved
+    tracker.save()
+    print(tracker.summary_line())
+
+    # Email digest, compared with the last report (and then recorded as this report)
+    values = report_digest_values(data)
+    digest = digest_rows(tracker_scope, RUN_DATE, values)
+    save_digest(RUN_DATE, {tracker_scope: values})
+
+    # Columnar copies of the same numbers for BI, next to the workbook (bi_export.py)
+    with stage("bi_export", os.path.dirname(template_path)):
+        exports = write_exports(data, os.path.dirname(template_path), PROGRAMS, RUN_DATE, grad_class)
+    if exports:
+        print(f"BI exports: {', '.join(os.path.basename(p) for p in exports)}")
+
+    if DASHBOARD:
+        with stage("dashboard", str(dashboard_dir)):
+            written, unchanged = write_dashboard(data, dashboard_dir, PROGRAMS, RUN_DATE_LABEL)
+        print(f"Dashboard: {written} page(s) written, {unchanged} unchanged in {dashboard_dir}")
+    return digest
+
+def main():
+    use_routing()
+    template_path = cohort_template_path()
+
+    if not os.path.exists(template_path):
+        raise FileNotFoundError(f"Template not found at: {template_path}")
+
+    # Pull every number the workbook needs
+    data = fetch_report_data()
+    return update_workbook(template_path, data, os.path.basename(template_path))
+
+# Batch run: one grouped query for every requested graduating class, then one workbook per class
+# (weekly_placement_report.xlsx for FT_GRAD_CLASS, classof<year>/weekly_placement_report.xlsx for the rest).
+def run_cohorts(grad_classes: List[int]):
+    use_routing()
+    paths = {g: cohort_template_path(g) for g in grad_classes}
+    for g, path in paths.items():
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Workbook for the class of {g} not found at: {path}")
+    if PLACEMENT_SOURCE == "rollup":
+        raise RuntimeError("The rollup only stores the default cohort; batch runs need PLACEMENT_SOURCE=mysql or mirror.")
+    if PLACEMENT_SOURCE == "mirror" and any(g != FT_GRAD_CLASS for g in grad_classes):
+        print("[WARN] The mirror only holds the classes of the default cohort; other classes may come out short.")
+
+    cur = open_statements()
+    try:
+        with stage("query", f"SQL_BATCH:{','.join(map(str, grad_classes))}"):
+            batch = fetch_batch(cur, [cohort_for(g) for g in grad_classes])
+        if isinstance(cur, QueryProfiler):
+            cur.write_profile(PROFILE_DIR)
+    finally:
+        cur.close()
+        cur.conn.close()
+
+    for g, path in paths.items():
+        # The default cohort keeps its usual fingerprints; the others get their own
+        scope = os.path.basename(path) if g == FT_GRAD_CLASS else f"{os.path.basename(path)}:classof{g}"
+        dashboard_dir = DASHBOARD_DIR if g == FT_GRAD_CLASS else DASHBOARD_DIR / f"classof{g}"
+        update_workbook(path, batch_report_data(batch, g), scope, dashboard_dir, g)
+        print(f"Updated class of {g}: {path}")
+
 
-    # Save in place (overwrite template as the weekly report, and create the history path)
-    wb.save(template_path)
-    
-    
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update the weekly placement report.")
+    parser.add_argument("--cohorts", default=COHORTS, help="graduating classes for a batch run, e.g. 2026,2027 (default: COHORTS)")
+    args = parser.parse_args()
+    METRICS.start("leadership-update")
     try:
-        main()
+        if args.cohorts:
+            run_cohorts(parse_cohorts(args.cohorts))
+        else:
+            main()
+        METRICS.write("ok")
         print(f"Weekly placement report updated successfully: {RUN_DATE_LABEL}")
     except Exception as e:
+        METRICS.write("error")
         # Fail fast with a clear message
         sys.stderr.write(f"[ERROR] {e}\n")
         sys.exit(1)
@@ -0,0 +1,182 @@
+# Benchmark harness for update-leadership-report.py and update-CD-reports.py.
+# For every (report family, WH weeks, population scale) case it builds synthetic template workbooks and a stand-in
+# student database (the SQLite mirror format), runs the real update code against them in a fresh process, and
+# collects the per-stage timings from run_metrics. Results are written as JSON tagged with the git commit so runs on
+# different commits can be compared.
+#
+#   python benchmarks/bench_reports.py                       # 10/30/52 weeks x 1/10/100x students, both families
+#   python benchmarks/bench_reports.py --weeks 10 --scales 1 --families leadership
+#   python benchmarks/bench_reports.py --compare benchmarks/results/<older>.json
+
+import os
+import sys
+import json
+import shutil
+import resource
+import argparse
+import tempfile
+import subprocess
+import datetime as dt
+import importlib.util
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))  # placement_common, for this process and the case children
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+FAMILIES = {
+    "leadership": (ROOT / "Leadership-Report", "update-leadership-report.py"),
+    "career-director": (ROOT / "CareerDirector-Report", "update-CD-reports.py"),
+}
+
+DEFAULT_WEEKS = (10, 30, 52)
+DEFAULT_SCALES = (1, 10, 100)
+BASE_STUDENTS = 1500  # students at 1x, roughly one MSB population across the mirrored classes
+
+# ----------------------------
+# 1) Child process: run one case and print its stage totals as JSON
+# ----------------------------
+
+def _load(path: Path, name: str):
+    spec = importlib.util.spec_from_file_location(name, str(path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def run_child(family: str, workdir: Path) -> Dict:
+    sys.path.insert(0, str(workdir))
+    os.chdir(workdir)
+    _, script = FAMILIES[family]
+    module = _load(workdir / script, "bench_target")
+    from placement_common.run_metrics import METRICS as metrics
+    metrics.start(f"bench-{family}")
+
+    t0 = dt.datetime.now()
+    if family == "leadership":
+        module.main()
+    else:
+        synthetic = _load(Path(__file__).resolve().parent / "synthetic.py", "synthetic")
+        try:
+            for programs in synthetic.DIRECTOR_PROGRAMS:
+                module.main(list(programs))
+        finally:
+            module.close_statements()
+    wall = (dt.datetime.now() - t0).total_seconds()
+
+    stages: Dict[str, Dict[str, float]] = {}
+    for s in metrics.stages:
+        agg = stages.setdefault(s["stage"], {"count": 0, "wall_s": 0.0, "cpu_s": 0.0})
+        agg["count"] += 1
+        agg["wall_s"] += s["wall_s"]
+        agg["cpu_s"] += s["cpu_s"]
+    return {"total_wall_s": wall, "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024, "stages": stages}
+
+# ----------------------------
+# 2) Parent: set up each case in a scratch folder and run it in a fresh interpreter
+# ----------------------------
+
+def prepare_case(family: str, weeks: int, mirror_path: Path, workdir: Path, today: dt.date):
+    synthetic = _load(Path(__file__).resolve().parent / "synthetic.py", "synthetic")
+    src, _ = FAMILIES[family]
+    for py in src.glob("*.py"):
+        shutil.copy2(py, workdir / py.name)
+    shutil.copy2(mirror_path, workdir / "student_mirror.sqlite3")
+    if family == "leadership":
+        synthetic.make_leadership_workbook(workdir / "weekly_placement_report.xlsx", weeks, today)
+    else:
+        for programs in synthetic.DIRECTOR_PROGRAMS:
+            synthetic.make_cd_workbook(workdir / f"WeeklyPlacement-{'-'.join(programs)}.xlsx", programs, weeks, today)
+
+def run_case(family: str, workdir: Path) -> Dict:
+    env = dict(os.environ)
+    env.update({
+        "DB_HOST": "bench", "DB_USER": "bench", "DB_PASSWORD": "bench", "DB_NAME": "bench",
+        "PLACEMENT_SOURCE": "mirror", "FORCE_FULL_UPDATE": "1",
+        # Synthetic counts against a synthetic history would trip the anomaly guard
+        "ANOMALY_GUARD": "off",
+        "MIRROR_PATH": str(workdir / "student_mirror.sqlite3"),
+        "METRICS_DIR": str(workdir / "metrics"),
+        "ROUTING_CONFIG": str(ROOT / "routing.toml"),
+    })
+    env.pop("OUTPUT_PATH", None)
+    proc = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), "--child", family, str(workdir)],
+        env=env, cwd=str(workdir), capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{family} case failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def case_key(c: Dict) -> str:
+    return f"{c['family']}/w{c['weeks']}/x{c['scale']}"
+
+def print_table(cases: List[Dict], baseline: Dict[str, Dict] = None):
+    stage_names = ["query", "workbook_load", "table_update", "workbook_save"]
+    print(f"{'case':<28}{'total':>9}" + "".join(f"{n:>15}" for n in stage_names) + (f"{'vs base':>10}" if baseline else ""))
+    for c in cases:
+        line = f"{case_key(c):<28}{c['total_wall_s']:>8.2f}s"
+        for n in stage_names:
+            line += f"{c['stages'].get(n, {}).get('wall_s', 0.0):>14.3f}s"
+        if baseline:
+            b = baseline.get(case_key(c))
+            line += f"{c['total_wall_s'] / b['total_wall_s']:>9.2f}x" if b and b["total_wall_s"] else f"{'-':>10}"
+        print(line)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the report update scripts on synthetic data.")
+    parser.add_argument("--families", nargs="+", choices=sorted(FAMILIES), default=sorted(FAMILIES))
+    parser.add_argument("--weeks", nargs="+", type=int, default=list(DEFAULT_WEEKS))
+    parser.add_argument("--scales", nargs="+", type=int, default=list(DEFAULT_SCALES))
+    parser.add_argument("--base-students", type=int, default=BASE_STUDENTS)
+    parser.add_argument("--compare", default=None, help="earlier results JSON to compare against")
+    parser.add_argument("--child", nargs=2, metavar=("FAMILY", "WORKDIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_child(args.child[0], Path(args.child[1]))))
+        return
+
+    os.environ.setdefault("DB_HOST", "bench")
+    from placement_common import student_mirror
+    synthetic = _load(Path(__file__).resolve().parent / "synthetic.py", "synthetic")
+
+    today = dt.date.today()
+    cases = []
+    with tempfile.TemporaryDirectory(prefix="placement-bench-") as tmp:
+        tmp = Path(tmp)
+        mirrors = {s: synthetic.seed_population(student_mirror, tmp / f"pop-x{s}.sqlite3", args.base_students * s) for s in args.scales}
+        for family in args.families:
+            for weeks in args.weeks:
+                for scale in args.scales:
+                    workdir = tmp / f"{family}-w{weeks}-x{scale}"
+                    workdir.mkdir()
+                    prepare_case(family, weeks, mirrors[scale], workdir, today)
+                    result = run_case(family, workdir)
+                    result.update({"family": family, "weeks": weeks, "scale": scale, "students": args.base_students * scale})
+                    cases.append(result)
+                    print(f"done {case_key(result)}: {result['total_wall_s']:.2f}s", file=sys.stderr)
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    commit = git_commit()
+    out = RESULTS_DIR / f"bench-{dt.datetime.now():%Y%m%d-%H%M%S}-{commit}.json"
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"commit": commit, "python": sys.version.split()[0], "base_students": args.base_students, "cases": cases}, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = {case_key(c): c for c in json.load(f)["cases"]}
+    print_table(cases, baseline)
+    print(f"Results written: {out}")
+
+
+if __name__ == "__main__":
+    main()
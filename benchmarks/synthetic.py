@@ -0,0 +1,137 @@
+# Synthetic inputs for the benchmarks: template workbooks with the real sheet/table naming scheme, and a stand-in
+# student population written into the same SQLite mirror format the update scripts read with PLACEMENT_SOURCE=mirror.
+# Nothing here touches the real database or the real workbooks.
+
+import random
+import datetime as dt
+from pathlib import Path
+from typing import List, Sequence
+
+from openpyxl import Workbook
+from openpyxl.worksheet.table import Table, TableStyleInfo
+from openpyxl.utils import get_column_letter
+
+from placement_common.routing import load_routing
+
+# Programs and director groupings (one workbook each) from routing.toml, like the update scripts.
+# placement_common is imported from the repository root the harness put on sys.path.
+_ROUTING = load_routing()
+PROGRAMS = list(_ROUTING.programs)
+DIRECTOR_PROGRAMS = [director.programs for director in _ROUTING.directors.values()]
+
+# Row labels in the templates (the view's status strings)
+FT_STATUSES = [
+    "Accepted an offer", "Actively seeking", "Not Reported", "No Recent Information Available",
+    "Not seeking - continuing education", "Not seeking - other",
+]
+INT_STATUSES = ["Accepted an offer", "Actively seeking", "Not Reported", "Not seeking"]
+
+FT_HEADER = "Job Search Status"
+INT_HEADER = "Internship Search Status"
+SUMMARY_HEADERS = [
+    "Program", "% Placed", "Offers Accepted", "Still Seeking", "Int'l",
+    "No Info*", "Not Seeking", "Total", "% NS**", "% Null",
+]
+
+STYLE = TableStyleInfo(name="TableStyleMedium2", showRowStripes=True)
+
+# Friday labels going back `weeks` weeks from `end`
+def week_labels(weeks: int, end: dt.date) -> List[str]:
+    return [(end - dt.timedelta(weeks=weeks - i)).strftime("%m/%d/%Y") for i in range(weeks)]
+
+# Writes one status table (header, status rows, Class Size, % Placed) and registers it. Returns the next free row.
+def _status_table(ws, name: str, top: int, left: int, header: str, statuses: Sequence[str], labels: Sequence[str], rnd) -> int:
+    ws.cell(row=top, column=left, value=header)
+    for j, lbl in enumerate(labels):
+        ws.cell(row=top, column=left + 1 + j, value=lbl)
+    for i, status in enumerate(statuses):
+        ws.cell(row=top + 1 + i, column=left, value=status)
+        for j in range(len(labels)):
+            ws.cell(row=top + 1 + i, column=left + 1 + j, value=rnd.randint(0, 40))
+    size_row = top + 1 + len(statuses)
+    ws.cell(row=size_row, column=left, value="Class Size")
+    ws.cell(row=size_row + 1, column=left, value="% Placed")
+    for j in range(len(labels)):
+        ws.cell(row=size_row, column=left + 1 + j, value=0)
+        ws.cell(row=size_row + 1, column=left + 1 + j, value=0)
+    ref = f"{get_column_letter(left)}{top}:{get_column_letter(left + len(labels))}{size_row + 1}"
+    tbl = Table(displayName=name, ref=ref)
+    tbl.tableStyleInfo = STYLE
+    ws.add_table(tbl)
+    return size_row + 3
+
+# MRF table at column A, WH table at column D, side by side
+def _pair(ws, top: int, mrf: str, wh: str, header: str, statuses, weeks: int, end: dt.date, rnd) -> int:
+    labels = week_labels(weeks, end)
+    _status_table(ws, mrf, top, 1, header, statuses, labels[-1:], rnd)
+    return _status_table(ws, wh, top, 4, header, statuses, labels, rnd)
+
+# weekly_placement_report.xlsx: Summary, Total FT, By Program FT, Total INT, By Program INT
+def make_leadership_workbook(path: Path, weeks: int, end: dt.date, seed: int = 1) -> Path:
+    rnd = random.Random(seed)
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Summary - Full Time"
+    for c, h in enumerate(SUMMARY_HEADERS, start=1):
+        ws.cell(row=1, column=c, value=h)
+    for r in range(len(PROGRAMS)):
+        for c in range(len(SUMMARY_HEADERS)):
+            ws.cell(row=2 + r, column=1 + c, value=0)
+    tbl = Table(displayName="summary", ref=f"A1:{get_column_letter(len(SUMMARY_HEADERS))}{1 + len(PROGRAMS)}")
+    tbl.tableStyleInfo = STYLE
+    ws.add_table(tbl)
+
+    ws = wb.create_sheet("Total - Full Time")
+    _pair(ws, 1, "FT_total_mrf", "FT_total_wh", FT_HEADER, FT_STATUSES, weeks, end, rnd)
+    ws = wb.create_sheet("By Program - Full Time")
+    top = 1
+    for prog in PROGRAMS:
+        top = _pair(ws, top, *_ROUTING.tables[prog][:2], FT_HEADER, FT_STATUSES, weeks, end, rnd)
+
+    ws = wb.create_sheet("Total - Internships")
+    _pair(ws, 1, "INT_total_mrf", "INT_total_wh", INT_HEADER, INT_STATUSES, weeks, end, rnd)
+    ws = wb.create_sheet("By Program - Internships")
+    top = 1
+    for prog in PROGRAMS:
+        top = _pair(ws, top, *_ROUTING.internship_tables[prog], INT_HEADER, INT_STATUSES, weeks, end, rnd)
+
+    wb.save(path)
+    return Path(path)
+
+# WeeklyPlacement-<programs>.xlsx: "2026 MSB Overall" (Class1..4) plus one sheet per program
+def make_cd_workbook(path: Path, programs: Sequence[str], weeks: int, end: dt.date, seed: int = 1) -> Path:
+    rnd = random.Random(seed)
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "2026 MSB Overall"
+    top = _pair(ws, 1, "Class1", "Class2", FT_HEADER, FT_STATUSES, weeks, end, rnd)
+    _pair(ws, top, "Class3", "Class4", INT_HEADER, INT_STATUSES, weeks, end, rnd)
+    for prog in programs:
+        ws = wb.create_sheet(prog)
+        names = _ROUTING.tables[prog]
+        top = _pair(ws, 1, names[0], names[1], FT_HEADER, FT_STATUSES, weeks, end, rnd)
+        for k in range(2, len(names), 2):
+            top = _pair(ws, top, names[k], names[k + 1], INT_HEADER, INT_STATUSES, weeks, end, rnd)
+    wb.save(path)
+    return Path(path)
+
+# Seeds a stand-in bcc_student_view with n students, in the student_mirror.py format
+def seed_population(mirror_module, path: Path, n: int, seed: int = 1) -> Path:
+    rnd = random.Random(seed)
+    db = mirror_module.open_mirror_db(path)
+    db.execute(f"DELETE FROM {mirror_module.VIEW_NAME}")
+    classes = ["2024", "2025", "2026", "2026", "2026", "2027", "2027", "2028", "2029"]
+    rows = []
+    for k in range(n):
+        rows.append((
+            f"S{k:07d}", rnd.choice(PROGRAMS), rnd.choice(classes),
+            rnd.choice(("Enrolled", "Enrolled", "Graduated")), "A" if rnd.random() < 0.97 else "I",
+            rnd.choice((20261, 20263, 20265, 20271)),
+            rnd.choice(FT_STATUSES + [None]), rnd.choice(INT_STATUSES + [None]),
+            1 if rnd.random() < 0.12 else 0, rnd.choice((None, "U.S. Citizen", "F-1")),
+            k,
+        ))
+    with db:
+        db.executemany(f"INSERT INTO {mirror_module.VIEW_NAME} VALUES ({','.join(['?'] * 11)})", rows)
+    db.close()
+    return Path(path)
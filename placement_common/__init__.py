@@ -0,0 +1,2 @@
+# Code shared by Leadership-Report/ and CareerDirector-Report/ (cohort queries, the student mirror and nightly rollup,
+# workbook writes and saves, mail, metrics). See paths.py for where its modules read and write files.
@@ -0,0 +1,136 @@
+# Pre-send anomaly guard (ANOMALY_GUARD).
+# A bad refresh of the student view once would have sent a report whose Class Size dropped by half. Before a workbook
+# is updated, every count this run is about to append -- each status, plus Class Size, of every WH (Weekly History)
+# table -- is checked against the trailing weeks already in that table:
+#  - percent change: |now - last week| / last week above ANOMALY_MAX_CHANGE (0.5 = a 50% jump or drop);
+#  - z-score of the week-over-week change against the trailing weeks' changes, above ANOMALY_Z (a count that has
+#    been growing steadily isn't flagged for growing; one that suddenly moves against its trend is).
+# Counts that stay below ANOMALY_MIN_COUNT, and moves smaller than that, never trip the guard (small programs swing).
+#
+# The history is read once into a flat cube (one list of trailing counts per table and row) and checked in a single
+# pass, so the guard costs milliseconds and stays on. Columns dated today (a rerun) aren't part of the history.
+#
+# ANOMALY_GUARD=flag (default) only prints the anomalies; block raises before the workbook is saved, so nothing is
+# written or emailed; off skips the check. The default stays flag until the thresholds have been checked against real
+# history: a false positive under block means no report goes out that week until someone edits the .env on the Pi.
+
+import os
+import math
+import datetime as dt
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from openpyxl.utils.cell import range_boundaries
+
+from placement_common.wh_backfill import parse_week_label
+
+ANOMALY_GUARD = os.getenv("ANOMALY_GUARD", "flag").strip().lower()
+ANOMALY_WEEKS = int(os.getenv("ANOMALY_WEEKS", "8"))
+ANOMALY_MAX_CHANGE = float(os.getenv("ANOMALY_MAX_CHANGE", "0.5"))
+ANOMALY_Z = float(os.getenv("ANOMALY_Z", "4"))
+ANOMALY_MIN_COUNT = int(os.getenv("ANOMALY_MIN_COUNT", "10"))
+
+CLASS_SIZE = "Class Size"
+TOTAL_LABELS = {"total", "class size"}
+PERCENT_LABELS = {"% placed", "placement %"}
+
+class Anomaly(NamedTuple):
+    table: str
+    label: str
+    last: int
+    current: int
+    change: Optional[float]  # fraction of last week's count, None when last week was 0
+    z: Optional[float]
+
+    def describe(self) -> str:
+        parts = [f"{self.table} / {self.label}: {self.last} -> {self.current}"]
+        if self.change is not None:
+            parts.append(f"{self.change:+.0%}")
+        if self.z is not None:
+            parts.append(f"z={self.z:.1f}")
+        return " ".join(parts)
+
+def _count(v) -> int:
+    try:
+        return int(str(v).replace(",", "")) if v not in (None, "", "-") else 0
+    except (TypeError, ValueError):
+        return 0
+
+# {row label: counts of the trailing weeks, oldest first} for one WH table. Class Size is summed from the status rows
+# (a template's Class Size row can hold zeros for weeks it was never computed).
+def wh_history(ws, table_name: str, before: dt.date, weeks: int = ANOMALY_WEEKS) -> Dict[str, List[int]]:
+    min_col, min_row, max_col, max_row = range_boundaries(ws.tables[table_name].ref)
+    dated = []
+    for c in range(min_col + 1, max_col + 1):
+        week = parse_week_label(ws.cell(row=min_row, column=c).value)
+        if week is not None and week < before:
+            dated.append((week, c))
+    # A rerun leaves two columns with one date; the later column wins
+    by_week = dict(sorted(dated))
+    cols = [by_week[w] for w in sorted(by_week)[-weeks:]]
+
+    history: Dict[str, List[int]] = {}
+    for r in range(min_row + 1, max_row + 1):
+        label = ws.cell(row=r, column=min_col).value
+        if not isinstance(label, str) or not label.strip():
+            continue
+        key = label.strip()
+        if key.lower() in PERCENT_LABELS or key.lower() in TOTAL_LABELS:
+            continue
+        history[key] = [_count(ws.cell(row=r, column=c).value) for c in cols]
+    if history:
+        history[CLASS_SIZE] = [sum(week) for week in zip(*history.values())]
+    return history
+
+# One check over the whole cube: [(table, label, trailing counts, current count)]
+def find_anomalies(cube: Sequence[Tuple[str, str, List[int], int]]) -> List[Anomaly]:
+    found = []
+    for table, label, history, current in cube:
+        if not history:
+            continue
+        last = history[-1]
+        move = current - last
+        if abs(move) < ANOMALY_MIN_COUNT or max(last, current) < ANOMALY_MIN_COUNT:
+            continue
+        change = move / last if last else None
+        z = None
+        diffs = [b - a for a, b in zip(history, history[1:])]
+        if len(diffs) >= 3:
+            mean = sum(diffs) / len(diffs)
+            sd = math.sqrt(sum((d - mean) ** 2 for d in diffs) / len(diffs))
+            z = (move - mean) / sd if sd else None
+        if (change is None or abs(change) > ANOMALY_MAX_CHANGE) or (z is not None and abs(z) > ANOMALY_Z):
+            found.append(Anomaly(table, label, last, current, change, z))
+    return found
+
+# Builds the cube from the loaded workbook (before it's updated) and this run's data snapshot.
+# tables is the update script's wh_tables(): [(sheet, table, rows(data))].
+def build_cube(wb, tables: Sequence[Tuple[str, str, Callable[[Dict], List[Tuple[str, int]]]]], data: Dict,
+               today: dt.date) -> List[Tuple[str, str, List[int], int]]:
+    cube = []
+    for sheet, table, rows in tables:
+        if sheet not in wb.sheetnames or table not in wb[sheet].tables:
+            continue
+        history = wh_history(wb[sheet], table, today)
+        current = {str(s).strip(): int(n or 0) for s, n in rows(data)}
+        current[CLASS_SIZE] = sum(current.values())
+        for label in sorted(set(history) | set(current)):
+            cube.append((table, label, history.get(label, []), current.get(label, 0)))
+    return cube
+
+# Runs the guard for one workbook. Raises RuntimeError in block mode if anything looks off; returns the anomalies.
+def check_workbook(wb, tables, data: Dict, today: dt.date, name: str, mode: str = ANOMALY_GUARD) -> List[Anomaly]:
+    if mode == "off":
+        return []
+    if mode not in ("block", "flag"):
+        raise RuntimeError(f"ANOMALY_GUARD must be block, flag or off, not '{mode}'")
+    anomalies = find_anomalies(build_cube(wb, tables, data, today))
+    if not anomalies:
+        return []
+    lines = "\n  ".join(a.describe() for a in anomalies)
+    if mode == "block":
+        raise RuntimeError(
+            f"{name}: {len(anomalies)} count(s) moved far outside their weekly history; not saved or sent "
+            f"(ANOMALY_GUARD=flag to send anyway):\n  {lines}"
+        )
+    print(f"[WARN] {name}: {len(anomalies)} count(s) moved far outside their weekly history:\n  {lines}")
+    return anomalies
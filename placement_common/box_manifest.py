@@ -0,0 +1,96 @@
+# Skip Box uploads whose file Box already has.
+# Every run emailed each workbook to its Box upload address, even when it was the same file as the last upload (a
+# rerun the same day, which rewrites that day's WH column instead of adding one, e.g. after a failed send).
+# box_manifest.json now remembers, per Box address and file name, the content hash of the last file sent there; a
+# file with the same hash isn't sent again, and the run prints how many uploads and bytes that saved. A run on a new
+# date always uploads: every workbook gets a new dated WH column, even when its counts didn't move.
+#
+# openpyxl stamps the save time into docProps/core.xml, so the raw bytes of a re-saved workbook always differ. For
+# .xlsx files the hash covers every other zip member's uncompressed content instead; anything else is hashed as is.
+# An entry is only recorded once its upload was sent. FORCE_BOX_UPLOAD=1 uploads everything (the manifest is still
+# updated).
+
+import os
+import json
+import hashlib
+import zipfile
+from pathlib import Path
+from typing import Dict
+
+from placement_common.query_profiler import env_flag
+from placement_common.paths import REPORT_DIR
+
+BOX_MANIFEST_PATH = Path(os.getenv("BOX_MANIFEST_PATH", str(REPORT_DIR / "box_manifest.json")))
+FORCE_BOX_UPLOAD = env_flag("FORCE_BOX_UPLOAD")
+
+# Zip members that change on every save without the workbook's content changing
+VOLATILE_MEMBERS = {"docProps/core.xml"}
+
+_READ_SIZE = 1024 * 1024
+
+# Hash of an .xlsx (a path or an open file) over its zip members, leaving out the volatile ones
+def xlsx_hash(source) -> str:
+    h = hashlib.sha256()
+    with zipfile.ZipFile(source) as z:
+        for name in sorted(z.namelist()):
+            if name in VOLATILE_MEMBERS:
+                continue
+            h.update(name.encode("utf-8") + b"\0")
+            with z.open(name) as f:
+                for chunk in iter(lambda: f.read(_READ_SIZE), b""):
+                    h.update(chunk)
+    return h.hexdigest()
+
+def content_hash(path) -> str:
+    if str(path).lower().endswith(".xlsx") and zipfile.is_zipfile(path):
+        return xlsx_hash(path)
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_READ_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class BoxManifest:
+    """Content hash of the last file uploaded to each Box address, by file name"""
+
+    def __init__(self, path: Path = BOX_MANIFEST_PATH, force: bool = FORCE_BOX_UPLOAD):
+        self.path = Path(path)
+        self.force = force
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._uploads: Dict[str, Dict[str, str]] = json.load(f)
+        except (OSError, ValueError):
+            self._uploads = {}
+        self._hashes: Dict[str, str] = {}
+        self.sent = self.skipped = 0
+        self.bytes_sent = self.bytes_skipped = 0
+
+    def _hash(self, path) -> str:
+        key = str(path)
+        if key not in self._hashes:
+            self._hashes[key] = content_hash(path)
+        return self._hashes[key]
+
+    # True if this address already has a file with the same name and content (counted as a skipped upload)
+    def unchanged(self, destination: str, path) -> bool:
+        same = self._uploads.get(destination, {}).get(os.path.basename(path)) == self._hash(path)
+        if same and not self.force:
+            self.skipped += 1
+            self.bytes_skipped += os.path.getsize(path)
+            return True
+        return False
+
+    # Call once the upload was sent; saves the manifest right away so a later failure doesn't lose it
+    def record(self, destination: str, path):
+        self.sent += 1
+        self.bytes_sent += os.path.getsize(path)
+        self._uploads.setdefault(destination, {})[os.path.basename(path)] = self._hash(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._uploads, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def summary_line(self) -> str:
+        return (f"Box uploads: {self.sent} sent ({self.bytes_sent / 1024:.1f} KiB), {self.skipped} unchanged skipped "
+                f"({self.bytes_skipped / 1024:.1f} KiB of upload traffic avoided)")
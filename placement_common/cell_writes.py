@@ -0,0 +1,84 @@
+# Batched cell writes for the table updaters.
+# A table update (MRF, WH, backfill) records every cell it changes -- the run-date header, the Class Size relabel, the
+# counts, dashes, totals and % Placed -- in a CellWriteBuffer, and the buffer applies them in one row-major pass when
+# the update finishes. If the update raises partway, nothing is written, so a table is never left half-updated.
+# Table metadata (ref, tableColumns) is not a cell write; the updaters keep it in sync themselves.
+# Dashes, percents and borders reuse the shared style objects below instead of building new ones per cell.
+
+from copy import copy
+from typing import Dict, Tuple
+from openpyxl.styles import Alignment, Border, Side
+from openpyxl.worksheet.worksheet import Worksheet
+
+# Shared style objects -- use these instead of building new ones per cell
+RIGHT_ALIGN = Alignment(horizontal="right")
+THIN_BORDER = Border(bottom=Side(style="thin", color="000000"))
+PERCENT_FORMAT = "0.00%"
+
+class CellWriteBuffer:
+    def __init__(self, ws: Worksheet):
+        self.ws = ws
+        self.pending: Dict[Tuple[int, int], Dict[str, object]] = {}
+
+    def _slot(self, row: int, col: int) -> Dict[str, object]:
+        return self.pending.setdefault((row, col), {})
+
+    def value(self, row: int, col: int, value):
+        self._slot(row, col)["value"] = value
+
+    # No count for this status: a right-aligned '-'
+    def dash(self, row: int, col: int):
+        slot = self._slot(row, col)
+        slot["value"] = "-"
+        slot["alignment"] = RIGHT_ALIGN
+
+    # pct is 0-100 (placement_percent's scale); Excel wants a fraction
+    def percent(self, row: int, col: int, pct: float):
+        slot = self._slot(row, col)
+        slot["value"] = pct / 100.0
+        slot["number_format"] = PERCENT_FORMAT
+
+    def border(self, row: int, col: int, border: Border = THIN_BORDER):
+        self._slot(row, col)["border"] = border
+
+    # Gives the cell the whole style of another cell (applied before any alignment/format/border set here)
+    def copy_style(self, row: int, col: int, source):
+        self._slot(row, col)["style"] = copy(source._style)
+
+    # The value the cell will have after flush() (so totals can be computed before anything is written)
+    def get(self, row: int, col: int):
+        slot = self.pending.get((row, col))
+        if slot is not None and "value" in slot:
+            return slot["value"]
+        return self.ws.cell(row=row, column=col).value
+
+    # Applies every pending write in row-major order. Returns how many cells were touched.
+    def flush(self) -> int:
+        ws = self.ws
+        for (row, col) in sorted(self.pending):
+            slot = self.pending[(row, col)]
+            cell = ws.cell(row=row, column=col)
+            if "style" in slot:
+                cell._style = copy(slot["style"])
+            if "value" in slot:
+                cell.value = slot["value"]
+            if "alignment" in slot:
+                cell.alignment = slot["alignment"]
+            if "number_format" in slot:
+                cell.number_format = slot["number_format"]
+            if "border" in slot:
+                cell.border = slot["border"]
+        count = len(self.pending)
+        self.pending.clear()
+        return count
+
+    def __enter__(self):
+        return self
+
+    # Only write if the table update finished; a half-updated table is worse than an untouched one
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.pending.clear()
+        return False
@@ -0,0 +1,68 @@
+# Change detection between runs.
+# Most weeks several programs have exactly the same status counts as the week before. For those, rewriting the MRF
+# table and recomputing its totals is wasted work, so each run stores a small fingerprint (a hash of the grouped counts)
+# per program and table, and the next run compares against it.
+# Unchanged programs still get their new WH column (that's the weekly history) -- only the MRF rewrite is skipped.
+#
+# FORCE_FULL_UPDATE=1 in the .env ignores the stored fingerprints (e.g. after restoring a workbook by hand).
+
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from placement_common.query_profiler import env_flag
+
+# Hash of a query result: (status, count) pairs, sorted so row order doesn't matter
+def fingerprint(rows: Iterable[Tuple]) -> str:
+    normalized = sorted((str(r[0]).strip(), *(int(v or 0) for v in r[1:])) for r in rows)
+    return hashlib.sha1(json.dumps(normalized).encode("utf-8")).hexdigest()
+
+class ChangeTracker:
+    """Fingerprints for one workbook (scope), stored in a JSON file shared by every workbook in the folder."""
+
+    def __init__(self, path: Path, scope: str):
+        self.path = Path(path)
+        self.scope = scope
+        self.force = env_flag("FORCE_FULL_UPDATE")
+        self._all: Dict[str, Dict[str, str]] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._all = json.load(f)
+            except (OSError, ValueError):
+                self._all = {}
+        self.previous: Dict[str, str] = dict(self._all.get(scope, {}))
+        self.current: Dict[str, str] = {}
+        self.changed_keys: List[str] = []
+        self.unchanged_keys: List[str] = []
+
+    # True if the rows for this key differ from the last saved run (or there was no last run)
+    def changed(self, key: str, rows: Iterable[Tuple]) -> bool:
+        fp = fingerprint(rows)
+        self.current[key] = fp
+        is_changed = self.force or self.previous.get(key) != fp
+        (self.changed_keys if is_changed else self.unchanged_keys).append(key)
+        return is_changed
+
+    # Only call this after the workbook has been saved, otherwise a failed save would hide the change next week
+    def save(self):
+        self._all[self.scope] = {**self.previous, **self.current}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._all, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def summary_line(self) -> str:
+        changed = ", ".join(self.changed_keys) or "none"
+        unchanged = ", ".join(self.unchanged_keys) or "none"
+        return f"Changed: {changed} | Unchanged (MRF skipped): {unchanged}"
+
+# Saves fingerprints recorded somewhere else (e.g. by trackers in worker processes): {scope: {key: fingerprint}}
+def save_scopes(path: Path, scopes: Dict[str, Dict[str, str]]):
+    for scope, current in scopes.items():
+        tracker = ChangeTracker(path, scope)
+        tracker.current = dict(current)
+        tracker.save()
@@ -0,0 +1,93 @@
+# Batch runs over several graduating classes.
+# The report SQL is compiled for one cohort (cohorts.FT_GRAD_CLASS). Reporting on more than one graduating class used
+# to mean editing the constants and re-running the whole pipeline per class. Instead, a batch run sends ONE grouped
+# query covering every class any of the requested cohorts reports on (cohorts.batch_where), and each cohort's numbers
+# are then summed out of those groups in Python:
+#  - full time: class_of = the graduating class (Enrolled or Graduated), or a carry-over class (Enrolled only)
+#  - internships: class_of in the cohort's internship classes
+#  - summary: the SQL_SUMMARY columns, from the same groups
+# The accessors return the same shapes as the report queries (and rollup.py), so the workbook updaters don't change.
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from placement_common.cohorts import Cohort, compile_query, batch_where
+
+# Summary values that count as "no info" / "not seeking" (same as SQL_SUMMARY; NULL is already 'Not Reported' here)
+NO_INFO_STATUSES = ("Not Reported", "No Recent Information Available", "")
+NOT_SEEKING_PREFIX = "not seeking"
+STATUS_ACCEPTED = "Accepted an offer"
+STATUS_SEEKING = "Actively seeking"
+
+# One row per (program, class, enroll status, job status, internship status), with its count and international count
+SQL_BATCH_TEMPLATE = """
+SELECT
+    program,
+    class_of,
+    enroll_status,
+    COALESCE(job_search_status, 'Not Reported') AS job_search_status,
+    COALESCE(internship_search_status, 'Not Reported') AS internship_search_status,
+    COUNT(*) AS count,
+    SUM(CASE WHEN is_international = 1 AND (work_authorization NOT IN ('U.S. Permanent Resident', 'U.S. Citizen') OR work_authorization IS NULL) THEN 1 ELSE 0 END) AS intl_all
+FROM msmdatabase.bcc_student_view
+{COHORT}GROUP BY program, class_of, enroll_status,
+    COALESCE(job_search_status, 'Not Reported'), COALESCE(internship_search_status, 'Not Reported');
+"""
+
+class CohortBatch:
+    """The grouped rows for a set of cohorts, with per-cohort accessors shaped like the report queries."""
+
+    def __init__(self, cohorts: Sequence[Cohort], rows: Iterable[Tuple]):
+        self.cohorts = {c.grad_class: c for c in cohorts}
+        # (program, class_of, enroll_status, job_status, internship_status) -> [count, intl_all]
+        self.groups: Dict[Tuple[str, int, str, str, str], List[int]] = defaultdict(lambda: [0, 0])
+        for program, class_of, enroll, job, internship, count, intl in rows:
+            g = self.groups[(str(program), int(class_of), str(enroll), str(job), str(internship))]
+            g[0] += int(count or 0)
+            g[1] += int(intl or 0)
+
+    def cohort(self, grad_class: int) -> Cohort:
+        if grad_class not in self.cohorts:
+            raise RuntimeError(f"Class of {grad_class} is not part of this batch ({sorted(self.cohorts)}).")
+        return self.cohorts[grad_class]
+
+    # Rows in the full time cohort: the graduating class, plus carry-overs who are still enrolled
+    def _full_time(self, cohort: Cohort, programs: Optional[Sequence[str]]):
+        for (program, class_of, enroll, job, internship), (count, intl) in self.groups.items():
+            if programs is not None and program not in programs:
+                continue
+            if class_of == cohort.grad_class or (class_of in cohort.carryover and enroll == "Enrolled"):
+                yield program, job, count, intl
+
+    def full_time_counts(self, grad_class: int, programs: Optional[Sequence[str]] = None) -> List[Tuple[str, int]]:
+        totals: Dict[str, int] = defaultdict(int)
+        for _, job, count, _ in self._full_time(self.cohort(grad_class), programs):
+            totals[job] += count
+        return sorted(totals.items())
+
+    def internship_counts(self, grad_class: int, programs: Optional[Sequence[str]] = None,
+                          classes: Optional[Sequence[int]] = None) -> List[Tuple[str, int]]:
+        classes = self.cohort(grad_class).int_classes if classes is None else classes
+        totals: Dict[str, int] = defaultdict(int)
+        for (program, class_of, _, _, internship), (count, _) in self.groups.items():
+            if class_of in classes and (programs is None or program in programs):
+                totals[internship] += count
+        return sorted(totals.items())
+
+    # Summary sheet rows: (program, offer_accepted, still_seeking, no_info, not_seeking, intl_all, total)
+    def summary_rows(self, grad_class: int, programs: Sequence[str]) -> List[Tuple]:
+        by_prog: Dict[str, List[int]] = {}
+        for program, job, count, intl in self._full_time(self.cohort(grad_class), programs):
+            s = by_prog.setdefault(program, [0, 0, 0, 0, 0, 0])
+            s[0] += count if job == STATUS_ACCEPTED else 0
+            s[1] += count if job == STATUS_SEEKING else 0
+            s[2] += count if job in NO_INFO_STATUSES else 0
+            s[3] += count if job.lower().startswith(NOT_SEEKING_PREFIX) else 0
+            s[4] += intl
+            s[5] += count
+        return [(p,) + tuple(by_prog[p]) for p in sorted(by_prog)]
+
+# Runs the one grouped query for every cohort in the batch
+def fetch_batch(statements, cohorts: Sequence[Cohort]) -> CohortBatch:
+    query = compile_query(SQL_BATCH_TEMPLATE, batch_where(cohorts), "SQL_BATCH")
+    return CohortBatch(cohorts, statements.fetch(query))
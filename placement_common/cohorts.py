@@ -0,0 +1,160 @@
+# Cohort definitions shared by every placement query in this folder.
+# Before this, the class_of / enroll_status / excluded program filters were copy-pasted into every SQL string,
+# and class_of was compared to ints in some queries and strings in others.
+# Now the filters live here once, get compiled into a parameterized WHERE clause, and are run through
+# server-side prepared statements (cursor(prepared=True)) that are reused for every program in the run.
+
+from typing import Dict, Iterator, List, NamedTuple, Sequence, Tuple
+
+# ----------------------------
+# 1) Cohort Variables
+# ----------------------------
+
+# Full Time: the graduating class, plus carry-over students from earlier classes who are still enrolled
+FT_GRAD_CLASS = 2026
+FT_CARRYOVER_CLASSES = (2024, 2025)
+
+# Internships: the classes that are still looking for internships
+INT_CLASSES = (2027, 2028, 2029)
+
+# A graduating class and the classes reported alongside it. The defaults above are Cohort(2026, (2024, 2025),
+# (2027, 2028, 2029)); other graduating classes follow the same pattern (cohort_for) for batch runs.
+class Cohort(NamedTuple):
+    grad_class: int
+    carryover: Tuple[int, ...]
+    int_classes: Tuple[int, ...]
+
+def cohort_for(grad_class: int) -> Cohort:
+    grad_class = int(grad_class)
+    return Cohort(grad_class, (grad_class - 2, grad_class - 1), (grad_class + 1, grad_class + 2, grad_class + 3))
+
+DEFAULT_COHORT = Cohort(FT_GRAD_CLASS, tuple(FT_CARRYOVER_CLASSES), tuple(INT_CLASSES))
+
+# "2026,2027" (the COHORTS env var or --cohorts) -> [2026, 2027]
+def parse_cohorts(raw: str) -> List[int]:
+    classes = [int(c) for c in str(raw).replace(" ", "").split(",") if c]
+    if not classes:
+        raise RuntimeError(f"No graduating classes in '{raw}'")
+    return sorted(set(classes))
+
+# Programs and semesters that are never part of the reports
+EXCLUDED_PROGRAMS = ("EMBA", "EMPA", "StratMnr")
+EXCLUDED_SEMESTERS = (20265, 20275, 20285)
+
+# A compiled query: SQL text with %s placeholders and the cohort parameters that fill the first placeholders.
+# Any per-call parameters (like the program) are appended after these.
+# name is only used for reporting (profiles, logs), e.g. "SQL_TOTAL_FULL".
+class CohortQuery(NamedTuple):
+    sql: str
+    params: Tuple
+    name: str = ""
+
+# ----------------------------
+# 2) Compiling the filters
+# ----------------------------
+
+# Builds a comma-separated list of SQL parameter placeholders wrapped in parentheses
+def placeholders(count: int) -> str:
+    return "(" + ",".join(["%s"] * count) + ")"
+
+# class_of is always bound as a string so every query compares the column against the same literal type
+def class_params(classes: Sequence[int]) -> Tuple[str, ...]:
+    return tuple(str(c) for c in classes)
+
+# Filters that every query shares, no matter the cohort
+def _common_filters() -> Tuple[str, Tuple]:
+    sql = (
+        f"  AND program NOT IN {placeholders(len(EXCLUDED_PROGRAMS))}\n"
+        "  AND enroll_status IN ('Enrolled','Graduated')\n"
+        "  AND record_status = 'A'\n"
+        f"  AND semester_byu NOT IN {placeholders(len(EXCLUDED_SEMESTERS))}\n"
+    )
+    return sql, tuple(EXCLUDED_PROGRAMS) + tuple(EXCLUDED_SEMESTERS)
+
+# WHERE clause for the full time cohort (graduating class + enrolled carry-overs)
+def full_time_where(grad_class: int = FT_GRAD_CLASS, carryover: Sequence[int] = FT_CARRYOVER_CLASSES) -> Tuple[str, Tuple]:
+    common_sql, common_params = _common_filters()
+    sql = (
+        "WHERE ((class_of = %s AND enroll_status IN ('Enrolled','Graduated'))"
+        f" OR (class_of IN {placeholders(len(carryover))} AND enroll_status = 'Enrolled'))\n"
+        + common_sql
+    )
+    return sql, class_params([grad_class]) + class_params(carryover) + common_params
+
+# WHERE clause for the internship cohort (one or more underclassmen classes)
+def internship_where(classes: Sequence[int] = INT_CLASSES) -> Tuple[str, Tuple]:
+    common_sql, common_params = _common_filters()
+    sql = f"WHERE class_of IN {placeholders(len(classes))}\n" + common_sql
+    return sql, class_params(classes) + common_params
+
+# WHERE clause for a batch of cohorts: every class any of them reports on. Which rows belong to which cohort
+# (graduated vs. enrolled carry-overs) is sorted out per cohort after the grouped query (see cohort_batch.py).
+def batch_where(cohorts: Sequence[Cohort]) -> Tuple[str, Tuple]:
+    classes = sorted({c for co in cohorts for c in (co.grad_class,) + tuple(co.carryover) + tuple(co.int_classes)})
+    common_sql, common_params = _common_filters()
+    sql = f"WHERE class_of IN {placeholders(len(classes))}\n" + common_sql
+    return sql, class_params(classes) + common_params
+
+# WHERE clause for the local mirror: every class any report uses, minus the excluded programs.
+# The rest of the cohort filters are applied when the report queries run against the mirror.
+def mirror_where() -> Tuple[str, Tuple]:
+    classes = (FT_GRAD_CLASS,) + tuple(FT_CARRYOVER_CLASSES) + tuple(INT_CLASSES)
+    sql = (
+        f"WHERE class_of IN {placeholders(len(classes))}\n"
+        f"  AND program NOT IN {placeholders(len(EXCLUDED_PROGRAMS))}\n"
+    )
+    return sql, class_params(classes) + tuple(EXCLUDED_PROGRAMS)
+
+# Drops a compiled WHERE clause into a query template. The template marks the spot with {COHORT}
+# and can add extra filters right after it (e.g. "  AND program = %s").
+def compile_query(template: str, where: Tuple[str, Tuple], name: str = "", **fmt) -> CohortQuery:
+    where_sql, where_params = where
+    return CohortQuery(template.format(COHORT=where_sql, **fmt), where_params, name)
+
+# ----------------------------
+# 3) Prepared Statements
+# ----------------------------
+
+# Keeps one server-side prepared cursor per distinct statement, so each statement is only prepared once per connection.
+# (A single prepared cursor re-prepares whenever the SQL text changes, which would happen on every alternating query.)
+class PreparedStatements:
+    def __init__(self, conn):
+        self.conn = conn
+        self._cursors: Dict[str, object] = {}
+
+    def cursor_for(self, sql: str):
+        cur = self._cursors.get(sql)
+        if cur is None:
+            cur = self.conn.cursor(prepared=True)
+            self._cursors[sql] = cur
+        return cur
+
+    def is_connected(self) -> bool:
+        return self.conn.is_connected()
+
+    def fetch(self, query: CohortQuery, params: Tuple = ()) -> List[Tuple]:
+        cur = self.cursor_for(query.sql)
+        cur.execute(query.sql, query.params + tuple(params))
+        return list(cur.fetchall())
+
+    # Yields rows as they come off the server, batch_size at a time, instead of buffering the whole result.
+    # Uses its own cursor: nothing else can run on the connection until the result has been read to the end.
+    def stream(self, query: CohortQuery, params: Tuple = (), batch_size: int = 500) -> Iterator[Tuple]:
+        cur = self.conn.cursor(prepared=True)
+        try:
+            cur.execute(query.sql, query.params + tuple(params))
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cur.close()
+
+    def close(self):
+        for cur in self._cursors.values():
+            try:
+                cur.close()
+            except Exception:
+                pass
+        self._cursors.clear()
@@ -0,0 +1,274 @@
+# End-to-end dry run (--dry-run): the whole update-and-email pipeline against local stand-ins.
+# Checking a change meant either running the real thing (live database, real emails to directors and Box) or running
+# pieces of it by hand. `python email-<report>.py --dry-run` instead reruns the script in a child process inside a
+# scratch directory (DRY_RUN_DIR, default dry-run/ in the report folder, cleared every time) laid out like the
+# repository -- a copy of the report folder, of placement_common/ and the fixture -- where:
+#  - the data comes from a local fixture database: a student mirror file (--fixture, default the repository's
+#    student_mirror.sqlite3, see student_mirror.py or benchmarks/synthetic.py), read with PLACEMENT_SOURCE=mirror;
+#    the DB_* settings point nowhere, so nothing can reach the live database;
+#  - the workbooks and every state file (fingerprints, digest history, Box manifest, snapshots) are copies, so the
+#    real ones are never written;
+#  - mail goes to an outbox (one .eml per message, envelope sender and recipients in X-Envelope-* headers), or, with
+#    --smtp host:port, to a local stand-in SMTP server (python -m aiosmtpd -n, MailHog...) without TLS or login;
+#  - the schedule is forced with --report weekly|monthend instead of waiting for a Friday or the last of the month;
+#  - the anomaly guard (anomaly_guard.py) only warns: ANOMALY_GUARD defaults to flag, since fixture numbers (e.g. from
+#    benchmarks/synthetic.py) rarely fit the workbooks' history. Set ANOMALY_GUARD=block to rehearse a blocked run.
+# When the child finishes, the total wall time and the per-stage totals from its run log are printed.
+#
+# The .env is never copied, so the real SMTP password and addresses aren't used; stand-ins are set where missing.
+
+import os
+import sys
+import json
+import time
+import shutil
+import smtplib
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from placement_common.paths import REPO_DIR, REPORT_DIR
+from placement_common.routing import ROUTING_PATH
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+DRY_RUN_DIR = Path(os.getenv("DRY_RUN_DIR", str(REPORT_DIR / "dry-run")))
+DEFAULT_FIXTURE = REPO_DIR / "student_mirror.sqlite3"
+
+# Set in the child process only
+DRY_RUN = bool(os.getenv("DRY_RUN_CHILD"))
+DRY_RUN_SPOOL = os.getenv("DRY_RUN_SPOOL", "")
+DRY_RUN_SMTP = os.getenv("DRY_RUN_SMTP", "")
+DRY_RUN_REPORT = os.getenv("DRY_RUN_REPORT", "")
+
+# The email scripts import the update scripts under these names
+UPDATE_MODULES = {
+    "update_overall_report": "update-leadership-report.py",
+    "create_program_reports": "update-CD-reports.py",
+}
+
+# Outputs of a real run that aren't worth copying into the scratch directory
+SKIP_COPY = {"__pycache__", "profiles", "metrics", "dashboard", "charts", "backups", "dry-run"}
+
+# Settings that could point a run at real files outside the scratch directory
+PATH_SETTINGS = ("OUTPUT_PATH", "MIRROR_PATH", "METRICS_DIR", "DIGEST_PATH", "BOX_MANIFEST_PATH",
+                 "STATUS_SNAPSHOT_PATH", "ROLLUP_PATH", "CHART_DIR", "DASHBOARD_DIR", "TABLE_SCHEMA_DIR")
+
+STAND_INS = {
+    "SENDER": "reports@dry-run.invalid",
+    "SMTP_PASS": "dry-run",
+    "TO_ADDRS": "leadership@dry-run.invalid",
+    "BOX_UPLOAD_EMAIL": "box@dry-run.invalid",
+    "MAIN_BOX_UPLOAD_EMAIL": "box-weekly@dry-run.invalid",
+    "MONTHEND_BOX_UPLOAD_EMAIL": "box-monthend@dry-run.invalid",
+}
+
+# run_check() codes the schedule is forced to
+REPORTS = {"weekly": 0, "monthend": 1}
+
+
+class SpoolSMTP(smtplib.SMTP):
+    """Stands in for the Gmail connection: never connects, writes every message to out_dir as an .eml file"""
+
+    def __init__(self, out_dir):
+        super().__init__()  # no host, so no connection
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.count = 0
+        self._cmd = ""
+        self._from = ""
+        self._rcpts: List[str] = []
+        self._data: List[bytes] = []
+        self._in_data = False
+
+    def ehlo(self, name=""):
+        self.ehlo_resp = b"dry-run"
+        self.does_esmtp = True
+        return 250, self.ehlo_resp
+
+    def starttls(self, *args, **kwargs):
+        return 220, b"dry-run: no TLS"
+
+    def login(self, user, password, *, initial_response_ok=True):
+        return 235, b"dry-run: no login"
+
+    # smtplib.SMTP's sendmail/send_message and streaming_mail.send_streamed all go through putcmd/getreply/send
+    def putcmd(self, cmd, args=""):
+        self._cmd = cmd.lower()
+        if self._cmd == "mail":
+            self._from = args.split(":", 1)[-1].split(" ", 1)[0].strip("<>")
+            self._rcpts, self._data = [], []
+        elif self._cmd == "rcpt":
+            self._rcpts.append(args.split(":", 1)[-1].strip().strip("<>"))
+
+    def send(self, s):
+        self._data.append(s.encode("ascii") if isinstance(s, str) else bytes(s))
+
+    def getreply(self):
+        if self._cmd == "quit":
+            return 221, b"dry-run: bye"
+        if self._cmd != "data":
+            return 250, b"dry-run: ok"
+        if not self._in_data:
+            self._in_data = True
+            self._data = []
+            return 354, b"dry-run: go ahead"
+        self._in_data = False
+        self._cmd = ""
+        path = self._spool(b"".join(self._data))
+        return 250, f"dry-run: written to {path.name}".encode("ascii")
+
+    def _spool(self, data: bytes) -> Path:
+        if data.endswith(b"\r\n.\r\n"):
+            data = data[:-3]
+        data = data.replace(b"\r\n..", b"\r\n.")  # undo the dot-stuffing
+        if data.startswith(b".."):
+            data = data[1:]
+        envelope = f"X-Envelope-From: {self._from}\r\nX-Envelope-To: {', '.join(self._rcpts)}\r\n".encode("utf-8")
+        self.count += 1
+        path = self.out_dir / f"{self.count:03d}.eml"
+        with open(path, "wb") as f:
+            f.write(envelope + data)
+        return path
+
+
+class LocalSMTP(smtplib.SMTP):
+    """A local stand-in SMTP server: plain connection, no TLS or login"""
+
+    def starttls(self, *args, **kwargs):
+        return 220, b"dry-run: no TLS"
+
+    def login(self, user, password, *, initial_response_ok=True):
+        return 235, b"dry-run: no login"
+
+
+# The SMTP connection the email scripts send through: the real server, or a stand-in in a dry run
+def smtp_connect(server: str, port: int) -> smtplib.SMTP:
+    if not DRY_RUN:
+        return smtplib.SMTP(server, port)
+    if DRY_RUN_SMTP:
+        host, _, p = DRY_RUN_SMTP.rpartition(":")
+        return LocalSMTP(host or "localhost", int(p))
+    return SpoolSMTP(DRY_RUN_SPOOL or "outbox")
+
+
+# run_check()'s answer, or the report forced by --report in a dry run
+def schedule(a: Optional[int]) -> Optional[int]:
+    if DRY_RUN and DRY_RUN_REPORT in REPORTS:
+        return REPORTS[DRY_RUN_REPORT]
+    return a
+
+
+# scratch/<report folder>/, scratch/placement_common/ and scratch/student_mirror.sqlite3. Returns the report copy.
+def _copy_tree(src: Path, scratch: Path, fixture: Path) -> Path:
+    workdir = scratch / src.name
+    workdir.mkdir()
+    for item in src.iterdir():
+        if item.name.startswith(".") or item.name in SKIP_COPY or item.resolve() == scratch.resolve():
+            continue
+        if item.is_dir():
+            shutil.copytree(item, workdir / item.name, ignore=shutil.ignore_patterns("__pycache__", "backups"))
+        elif item.resolve() != fixture.resolve():
+            shutil.copy2(item, workdir / item.name)
+    for module, script in UPDATE_MODULES.items():
+        if (src / script).exists() and not (src / f"{module}.py").exists():
+            shutil.copy2(src / script, workdir / f"{module}.py")
+    shutil.copytree(PACKAGE_DIR, scratch / PACKAGE_DIR.name, ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copy2(fixture, scratch / "student_mirror.sqlite3")
+    return workdir
+
+
+# {stage: (count, wall seconds)} from the child's run log
+def stage_totals(log_path: Path) -> Dict[str, Tuple[int, float]]:
+    totals: Dict[str, Tuple[int, float]] = {}
+    if not log_path.exists():
+        return totals
+    with open(log_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                s = json.loads(line)
+            except ValueError:
+                continue
+            n, wall = totals.get(s.get("stage", "?"), (0, 0.0))
+            totals[s.get("stage", "?")] = (n + 1, wall + float(s.get("wall_s") or 0))
+    return totals
+
+
+def _report(scratch: Path, wall: float, code: int, outbox: Optional[Path]):
+    print(f"\nDry run {'finished' if code == 0 else f'failed (exit {code})'} in {wall:.2f}s -- {scratch}")
+    totals = stage_totals(scratch / "metrics" / "run-log.jsonl")
+    totals.pop("run", None)
+    if totals:
+        print(f"  {'stage':<28}{'count':>7}{'wall s':>10}")
+        for name, (n, secs) in sorted(totals.items(), key=lambda kv: -kv[1][1]):
+            print(f"  {name:<28}{n:>7}{secs:>10.3f}")
+    if outbox is not None:
+        mails = sorted(outbox.glob("*.eml")) if outbox.exists() else []
+        size = sum(p.stat().st_size for p in mails)
+        print(f"  {len(mails)} message(s) in {outbox} ({size / 1024:.1f} KiB)")
+
+
+def run_dry(script: Path, args) -> int:
+    script = script.resolve()
+    src = script.parent
+    fixture = Path(args.fixture).resolve()
+    if not fixture.exists():
+        raise FileNotFoundError(
+            f"Fixture database not found at: {fixture} (build one with student_mirror.py or benchmarks/synthetic.py)"
+        )
+    scratch = Path(args.scratch).resolve()
+    if scratch == src or scratch in src.parents:
+        raise RuntimeError("DRY_RUN_DIR can't be the report folder or one of the folders it's in")
+    if scratch.exists():
+        shutil.rmtree(scratch)
+    scratch.mkdir(parents=True)
+    workdir = _copy_tree(src, scratch, fixture)
+
+    env = dict(os.environ)
+    for name in PATH_SETTINGS:
+        env.pop(name, None)
+    for name, value in STAND_INS.items():
+        env.setdefault(name, value)
+    env.setdefault("ANOMALY_GUARD", "flag")
+    outbox = None if args.smtp else scratch / "outbox"
+    env.update({
+        "DRY_RUN_CHILD": "1",
+        "DRY_RUN_REPORT": args.report,
+        "DRY_RUN_SMTP": args.smtp or "",
+        "DRY_RUN_SPOOL": str(outbox or ""),
+        "DB_HOST": "dry-run.invalid",
+        "DB_USER": "dry-run",
+        "DB_PASSWORD": "dry-run",
+        "DB_NAME": "dry-run",
+        "PLACEMENT_SOURCE": "mirror",
+        "MIRROR_PATH": str(scratch / "student_mirror.sqlite3"),
+        "METRICS_DIR": str(scratch / "metrics"),
+        "ROUTING_CONFIG": str(ROUTING_PATH.resolve()),  # read-only, shared by both reports
+    })
+
+    print(f"Dry run of {script.name} ({args.report}) in {scratch}")
+    started = time.perf_counter()
+    code = subprocess.call([sys.executable, str(workdir / script.name)], cwd=str(workdir), env=env)
+    _report(scratch, time.perf_counter() - started, code, outbox)
+    return code
+
+
+# Called at the top of an email script, before the update script is imported: with --dry-run, runs the script in a
+# scratch directory against the stand-ins and exits with its status. Does nothing otherwise (or in the child).
+def dispatch(script_path: str):
+    if "--dry-run" not in sys.argv[1:] or DRY_RUN:
+        return
+    parser = argparse.ArgumentParser(description="Dry run of the report pipeline against local stand-ins")
+    parser.add_argument("--dry-run", action="store_true", required=True)
+    parser.add_argument("--report", choices=sorted(REPORTS), default="weekly",
+                        help="which report to run, regardless of today's date (default: weekly)")
+    parser.add_argument("--fixture", default=os.getenv("DRY_RUN_FIXTURE", str(DEFAULT_FIXTURE)),
+                        help="student mirror file to read from (default: DRY_RUN_FIXTURE or the repository's student_mirror.sqlite3)")
+    parser.add_argument("--smtp", metavar="HOST:PORT", default=os.getenv("DRY_RUN_SMTP", ""),
+                        help="send to a local stand-in SMTP server instead of writing .eml files")
+    parser.add_argument("--scratch", default=str(DRY_RUN_DIR),
+                        help="scratch directory, cleared first (default: DRY_RUN_DIR or dry-run/ in the report folder)")
+    args = parser.parse_args()
+    if args.smtp and ":" not in args.smtp:
+        parser.error("--smtp takes HOST:PORT")
+    sys.exit(run_dry(Path(script_path), args))
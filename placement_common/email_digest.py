@@ -0,0 +1,141 @@
+# The numbers-at-a-glance digest at the top of the report emails.
+# The email bodies were static boilerplate, so reading one percentage meant downloading the workbook. Now the update
+# step hands back a digest built from the same in-memory counts it just wrote to the tables (nothing is re-read from
+# the saved file): per row -- the MSB, or one program -- full time and internship % Placed, the change since the last
+# report, and Class Size. The email scripts put it in an HTML part (multipart/alternative) and in the plain-text body.
+#
+# The change is measured against the last report from an earlier day, kept per workbook (scope) in digest_history.json.
+# Workers of a sharded run only read it; the parent saves their entries (save_digest), like the fingerprints.
+
+import os
+import re
+import json
+import html
+import datetime as dt
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from placement_common.paths import REPORT_DIR
+
+DIGEST_PATH = Path(os.getenv("DIGEST_PATH", str(REPORT_DIR / "digest_history.json")))
+
+# How many report dates to keep per workbook
+DIGEST_KEEP = 8
+
+STATUS_ACCEPTED = "Accepted an offer"
+STATUS_SEEKING = "Actively seeking"
+STATUS_NOT_REPORTED = "Not Reported"
+
+class DigestRow(NamedTuple):
+    label: str
+    ft_placed: float
+    ft_change: Optional[float]
+    ft_size: int
+    int_placed: float
+    int_change: Optional[float]
+    int_size: int
+
+# (% placed 0-100, class size) for one table's (status, count) rows -- the same numbers compute_totals puts in the table
+def placed_and_size(rows: Sequence[Tuple]) -> Tuple[float, int]:
+    counts: Dict[str, int] = {}
+    for status, count in rows:
+        counts[str(status).strip()] = counts.get(str(status).strip(), 0) + int(count or 0)
+    acc, seek, nr = counts.get(STATUS_ACCEPTED, 0), counts.get(STATUS_SEEKING, 0), counts.get(STATUS_NOT_REPORTED, 0)
+    denom = acc + seek + nr
+    return (round(acc * 100.0 / denom, 2) if denom else 0.0), sum(counts.values())
+
+# {label: [ft %, ft size, int %, int size]} from (label, ft rows, int rows)
+def digest_values(groups: Sequence[Tuple[str, Sequence[Tuple], Sequence[Tuple]]]) -> Dict[str, List]:
+    return {label: [*placed_and_size(ft), *placed_and_size(itn)] for label, ft, itn in groups}
+
+def _load(path: Path) -> Dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+# Digest rows for one workbook, with the change since its last stored report before today
+def digest_rows(scope: str, today: dt.date, values: Dict[str, List], path: Path = DIGEST_PATH) -> List[DigestRow]:
+    history = _load(Path(path)).get(scope, {})
+    earlier = sorted(d for d in history if d < today.isoformat())
+    previous = history[earlier[-1]] if earlier else {}
+    rows = []
+    for label, (ft_pct, ft_size, int_pct, int_size) in values.items():
+        before = previous.get(label)
+        rows.append(DigestRow(
+            label,
+            ft_pct, round(ft_pct - before[0], 2) if before else None, ft_size,
+            int_pct, round(int_pct - before[2], 2) if before else None, int_size,
+        ))
+    return rows
+
+# Stores today's values for each scope ({scope: values}); call it once the workbooks are saved
+def save_digest(today: dt.date, scopes: Dict[str, Dict[str, List]], path: Path = DIGEST_PATH):
+    path = Path(path)
+    history = _load(path)
+    for scope, values in scopes.items():
+        entries = history.setdefault(scope, {})
+        entries[today.isoformat()] = values
+        for old in sorted(entries)[:-DIGEST_KEEP]:
+            del entries[old]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+def _change(v: Optional[float]) -> str:
+    if v is None:
+        return "new"
+    if v == 0:
+        return "no change"
+    return f"{'+' if v > 0 else ''}{v:.2f} pts"
+
+# Plain-text lines for the text/plain body
+def digest_text(rows: Sequence[DigestRow]) -> str:
+    lines = ["This week at a glance (% Placed, change since the last report, Class Size):"]
+    for r in rows:
+        lines.append(
+            f"  - {r.label}: Full Time {r.ft_placed:.2f}% ({_change(r.ft_change)}), class size {r.ft_size}; "
+            f"Internships {r.int_placed:.2f}% ({_change(r.int_change)}), class size {r.int_size}"
+        )
+    return "\n".join(lines)
+
+# HTML version of the whole body: the digest table, then the usual text
+def digest_html(rows: Sequence[DigestRow], greeting: str, body_text: str) -> str:
+    def change_cell(v):
+        color = "#666" if not v else ("#1a7f37" if v > 0 else "#b42318")
+        return f'<td style="padding:4px 10px;text-align:right;color:{color}">{html.escape(_change(v))}</td>'
+
+    cell = '<td style="padding:4px 10px;text-align:right">{}</td>'
+    head = "".join(
+        f'<th style="padding:4px 10px;background:#002e5d;color:#fff">{h}</th>'
+        for h in ("", "Full Time % Placed", "Change", "Class Size", "Internship % Placed", "Change", "Class Size")
+    )
+    body_rows = "".join(
+        f'<tr style="border-bottom:1px solid #ddd"><td style="padding:4px 10px"><b>{html.escape(r.label)}</b></td>'
+        + cell.format(f"{r.ft_placed:.2f}%") + change_cell(r.ft_change) + cell.format(r.ft_size)
+        + cell.format(f"{r.int_placed:.2f}%") + change_cell(r.int_change) + cell.format(r.int_size) + "</tr>"
+        for r in rows
+    )
+    paragraphs = "".join(
+        "<p>" + "<br>".join(html.escape(line.strip()) for line in p.strip().splitlines()) + "</p>"
+        for p in re.split(r"\n\s*\n", body_text.strip())
+    )
+    return (
+        '<html><body style="font-family:Arial,Helvetica,sans-serif;color:#222">'
+        f"<p>{html.escape(greeting)}</p>"
+        f'<table style="border-collapse:collapse;margin:8px 0 16px">{"<tr>" + head + "</tr>"}{body_rows}</table>'
+        f"{paragraphs}</body></html>"
+    )
+
+# Sets the message body: the digest goes right after the greeting in the plain text, and the same body is added as an
+# HTML alternative with the digest as a table. Without digest rows the body is set exactly as before.
+def set_body_with_digest(msg, body: str, rows: Sequence[DigestRow]):
+    if not rows:
+        msg.set_content(body)
+        return
+    greeting, _, rest = body.strip().partition("\n")
+    msg.set_content(f"{greeting.strip()}\n\n{digest_text(rows)}\n{rest}")
+    msg.add_alternative(digest_html(rows, greeting.strip(), rest), subtype="html")
@@ -0,0 +1,181 @@
+# Month-end placement trend charts (PNG), attached to the month-end emails.
+# The month-end email used to promise "a visualization ... within the next business day", which someone then made by
+# hand. Now the month-end run draws the charts itself, straight from the WH (Weekly History) tables it just updated:
+# one chart for the MSB as a whole and one per program, each showing % Placed week by week for full time and
+# internships.
+#
+#  - Headless: matplotlib with the Agg backend (nothing needs a display on the Pi). matplotlib is only needed on
+#    month-end days; if it isn't installed the charts are skipped with a warning and the emails go out without them.
+#  - Cached per run: charts go in a folder for the run's date (CHART_DIR/YYYY-MM-DD) and a chart's file name carries a
+#    hash of its input series. Across month ends the WH tables always have new weeks, so nothing carries over; the
+#    reuse is within one run, where the MSB chart is drawn once and attached for all nine directors (and a same-day
+#    rerun reuses what didn't change). Folders from earlier runs are deleted, so CHART_DIR doesn't grow on the SD card.
+#  - Parallel: the charts that do need drawing are rendered across a process pool (CHART_WORKERS, default: CPU count).
+#    Each job is a small picklable ChartSpec, so any start method works.
+
+import os
+import re
+import json
+import hashlib
+import datetime as dt
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from openpyxl import load_workbook
+from openpyxl.utils.cell import range_boundaries
+
+from placement_common.wh_backfill import parse_week_label
+from placement_common.paths import REPORT_DIR
+
+CHART_DIR = Path(os.getenv("CHART_DIR", str(REPORT_DIR / "charts")))
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", "0")) or (os.cpu_count() or 1)
+
+# Bump when the drawing code changes, so every cached chart is redrawn once
+CHART_VERSION = 1
+
+PERCENT_LABELS = {"% placed", "placement %"}
+
+# One chart: a title and one or more named series over the same weeks (ISO dates). Values are 0-1 fractions or None.
+class ChartSpec(NamedTuple):
+    name: str
+    title: str
+    weeks: Tuple[str, ...]
+    series: Tuple[Tuple[str, Tuple[Optional[float], ...]], ...]
+
+    def digest(self) -> str:
+        payload = json.dumps([CHART_VERSION, self.title, self.weeks, self.series])
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+    def filename(self) -> str:
+        return f"{_slug(self.name)}-{self.digest()}.png"
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", name).strip("-") or "chart"
+
+def _fraction(v) -> Optional[float]:
+    try:
+        return None if v in (None, "", "-") else float(v)
+    except (TypeError, ValueError):
+        return None
+
+# {week: % placed} from one WH table (a rerun on the same day leaves two columns with one date; the later one wins)
+def placement_history(ws, table_name: str) -> Dict:
+    min_col, min_row, max_col, max_row = range_boundaries(ws.tables[table_name].ref)
+    pct_row = next((r for r in range(min_row, max_row + 1)
+                    if str(ws.cell(row=r, column=min_col).value or "").strip().lower() in PERCENT_LABELS), None)
+    if pct_row is None:
+        return {}
+    history = {}
+    for c in range(min_col + 1, max_col + 1):
+        week = parse_week_label(ws.cell(row=min_row, column=c).value)
+        if week is not None:
+            history[week] = _fraction(ws.cell(row=pct_row, column=c).value)
+    return history
+
+# Builds a spec from named WH tables: series = [(label, (sheet, table)), ...]
+def trend_spec(wb, name: str, title: str, series: Sequence[Tuple[str, Tuple[str, str]]]) -> ChartSpec:
+    histories = []
+    for label, (sheet, table) in series:
+        if sheet in wb.sheetnames and table in wb[sheet].tables:
+            histories.append((label, placement_history(wb[sheet], table)))
+    weeks = sorted({w for _, h in histories for w in h})
+    return ChartSpec(
+        name, title, tuple(w.isoformat() for w in weeks),
+        tuple((label, tuple(h.get(w) for w in weeks)) for label, h in histories),
+    )
+
+# Reads the specs' series out of a saved workbook (values only; the WH tables hold plain numbers)
+def workbook_specs(path: str, charts: Sequence[Tuple[str, str, Sequence[Tuple[str, Tuple[str, str]]]]]) -> List[ChartSpec]:
+    wb = load_workbook(path, data_only=True)
+    try:
+        return [trend_spec(wb, name, title, series) for name, title, series in charts]
+    finally:
+        wb.close()
+
+# Worker: draws one chart to path
+def _render(spec: ChartSpec, path: str) -> str:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import PercentFormatter
+
+    weeks = [dt.date.fromisoformat(w) for w in spec.weeks]
+    fig, ax = plt.subplots(figsize=(8, 4.5), dpi=120)
+    try:
+        for label, values in spec.series:
+            points = [(w, v) for w, v in zip(weeks, values) if v is not None]
+            if not points:
+                continue
+            xs, ys = zip(*points)
+            line, = ax.plot(xs, ys, marker="o", markersize=3, label=label)
+            ax.annotate(f"{ys[-1]:.1%}", (xs[-1], ys[-1]), textcoords="offset points", xytext=(4, 4),
+                        fontsize=8, color=line.get_color())
+        ax.set_title(spec.title)
+        ax.set_ylabel("% Placed")
+        ax.set_ylim(0, 1)
+        ax.yaxis.set_major_formatter(PercentFormatter(1.0))
+        ax.grid(True, alpha=0.3)
+        if spec.series:
+            ax.legend(loc="upper left")
+        fig.autofmt_xdate()
+        fig.tight_layout()
+        tmp = path + ".tmp.png"
+        fig.savefig(tmp)
+        os.replace(tmp, path)
+    finally:
+        plt.close(fig)
+    return path
+
+# Deletes the chart folders of earlier runs (and PNGs left directly in CHART_DIR by older versions). Only touches
+# date-named folders and chart-named PNGs, in case CHART_DIR is pointed somewhere shared.
+def prune_chart_runs(chart_dir: Path, keep: Path) -> int:
+    chart_png = re.compile(r".+-[0-9a-f]{16}\.png")
+    removed = 0
+    for entry in Path(chart_dir).iterdir():
+        if entry.is_dir() and entry != keep and re.fullmatch(r"\d{4}-\d{2}-\d{2}", entry.name):
+            for png in entry.iterdir():
+                if chart_png.fullmatch(png.name) or png.name.endswith(".tmp.png"):
+                    png.unlink()
+                    removed += 1
+            try:
+                entry.rmdir()
+            except OSError:
+                print(f"[WARN] Left {entry} in place: it holds files that aren't charts")
+        elif entry.is_file() and chart_png.fullmatch(entry.name):
+            entry.unlink()
+            removed += 1
+    return removed
+
+# Renders (or reuses) every chart and returns the PNG paths in spec order. Returns [] if matplotlib isn't installed.
+def render_charts(specs: Sequence[ChartSpec], out_dir: Path = CHART_DIR, workers: int = CHART_WORKERS,
+                  run_day: Optional[dt.date] = None) -> List[str]:
+    try:
+        import matplotlib  # noqa: F401
+    except ImportError:
+        print("[WARN] matplotlib is not installed; month-end charts skipped")
+        return []
+    chart_dir = Path(out_dir)
+    out_dir = chart_dir / (run_day or dt.date.today()).isoformat()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    prune_chart_runs(chart_dir, out_dir)
+    paths = [str(out_dir / spec.filename()) for spec in specs]
+    todo = [(spec, path) for spec, path in zip(specs, paths) if spec.weeks and not os.path.exists(path)]
+
+    if len(todo) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+            list(pool.map(_render, *zip(*todo)))
+    else:
+        for spec, path in todo:
+            _render(spec, path)
+
+    # Older versions of the same charts (from an earlier run today) are no longer needed
+    keep = set(paths)
+    for spec in specs:
+        old_version = re.compile(re.escape(_slug(spec.name)) + r"-[0-9a-f]{16}\.png")
+        for old in out_dir.glob(f"{_slug(spec.name)}-*.png"):
+            if old_version.fullmatch(old.name) and str(old) not in keep:
+                old.unlink()
+    drawn = [p for spec, p in zip(specs, paths) if spec.weeks]
+    print(f"Charts: {len(todo)} drawn, {len(drawn) - len(todo)} reused from {out_dir}")
+    return drawn
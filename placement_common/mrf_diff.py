@@ -0,0 +1,164 @@
+# What changed in the MRF (Most Recent Friday) tables since the last report (CHANGES_SHEET=1).
+# An MRF table is overwritten every run, so nothing kept the numbers it showed before. With CHANGES_SHEET=1 the update
+# first reads the previous values out of the workbook file on disk, before it's loaded for the update, and puts a
+# per-table delta (row, previous, now, change) on a hidden "Changes" sheet.
+#
+# That pre-pass has to stay small next to the real load, so:
+#  - the file is opened read-only (openpyxl streams the sheet XML instead of building the workbook in memory);
+#  - read-only sheets don't expose their tables, so the MRF tables' locations come from a schema cached at the end of
+#    the previous run (table_schema/<workbook>.json: table -> sheet and range);
+#  - each sheet is streamed once, only over the rows and columns its MRF tables cover, and only the label and value
+#    columns are kept.
+# With no cached schema yet (the first run with CHANGES_SHEET=1) there's nothing to compare against; the sheet says so.
+
+import os
+import re
+import json
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from openpyxl import load_workbook
+from openpyxl.styles import Font
+from openpyxl.utils.cell import range_boundaries
+
+from placement_common.query_profiler import env_flag
+from placement_common.email_digest import placed_and_size
+from placement_common.paths import REPORT_DIR
+
+CHANGES_SHEET_ENABLED = env_flag("CHANGES_SHEET")
+TABLE_SCHEMA_DIR = Path(os.getenv("TABLE_SCHEMA_DIR", str(REPORT_DIR / "table_schema")))
+
+CHANGES_SHEET = "Changes"
+HEADER_FONT = Font(bold=True)
+CLASS_SIZE = "Class Size"
+PLACED = "% Placed"
+TOTAL_LABELS = {"total", "class size"}
+PERCENT_LABELS = {"% placed", "placement %"}
+
+# One MRF table's changes: the header of the previous value column (its run date) and (row, previous, now) per change
+class TableDelta(NamedTuple):
+    table: str
+    since: str
+    rows: List[Tuple[str, Optional[float], Optional[float]]]
+
+# One file per workbook, so sharded builds never write the same file
+def _schema_path(scope: str, schema_dir: Path) -> Path:
+    return Path(schema_dir) / (re.sub(r"[^A-Za-z0-9._-]+", "_", scope) + ".json")
+
+def load_schema(scope: str, schema_dir: Path = TABLE_SCHEMA_DIR) -> Dict[str, Tuple[str, str]]:
+    try:
+        with open(_schema_path(scope, schema_dir), "r", encoding="utf-8") as f:
+            return {table: tuple(loc) for table, loc in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+# Records where the MRF tables are in the workbook just saved; call it after the save
+def save_schema(scope: str, wb, tables: Sequence[Tuple[str, str, Callable]], schema_dir: Path = TABLE_SCHEMA_DIR):
+    schema = {table: [sheet, wb[sheet].tables[table].ref]
+              for sheet, table, _ in tables if sheet in wb.sheetnames and table in wb[sheet].tables}
+    path = _schema_path(scope, schema_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(schema, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+# {table: (header of the value column, {row label: value})} from the workbook file, streamed read-only
+def previous_mrf(path: str, schema: Dict[str, Tuple[str, str]]) -> Dict[str, Tuple[str, Dict[str, object]]]:
+    if not schema or not os.path.exists(path):
+        return {}
+    by_sheet: Dict[str, List[Tuple[str, Tuple[int, int, int, int]]]] = {}
+    for table, (sheet, ref) in schema.items():
+        by_sheet.setdefault(sheet, []).append((table, range_boundaries(ref)))
+
+    found: Dict[str, Tuple[str, Dict[str, object]]] = {}
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet, tables in by_sheet.items():
+            if sheet not in wb.sheetnames:
+                continue
+            min_row = min(b[1] for _, b in tables)
+            max_row = max(b[3] for _, b in tables)
+            min_col = min(b[0] for _, b in tables)
+            max_col = max(b[0] + 1 for _, b in tables)  # label column and the first value column
+            headers: Dict[str, str] = {}
+            values: Dict[str, Dict[str, object]] = {table: {} for table, _ in tables}
+            rows = wb[sheet].iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col, values_only=True)
+            for r, row in enumerate(rows, start=min_row):
+                for table, (t_min_col, t_min_row, _, t_max_row) in tables:
+                    if not t_min_row <= r <= t_max_row:
+                        continue
+                    label, value = row[t_min_col - min_col], row[t_min_col + 1 - min_col]
+                    if r == t_min_row:
+                        headers[table] = "" if value is None else str(value)
+                    elif isinstance(label, str) and label.strip():
+                        values[table][label.strip()] = value
+            for table, _ in tables:
+                found[table] = (headers.get(table, ""), values[table])
+    finally:
+        wb.close()
+    return found
+
+def _number(v) -> Optional[float]:
+    if v in (None, "", "-"):
+        return None
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+# Per-table deltas between the previous MRF values and this run's rows (tables: the update script's mrf_tables())
+def mrf_deltas(previous: Dict[str, Tuple[str, Dict[str, object]]], tables: Sequence[Tuple[str, str, Callable]],
+               data: Dict) -> List[TableDelta]:
+    deltas = []
+    for _, table, rows_for in tables:
+        if table not in previous:
+            continue
+        since, before = previous[table]
+        rows = rows_for(data)
+        now: Dict[str, Optional[float]] = {str(s).strip(): float(n or 0) for s, n in rows}
+        pct, size = placed_and_size(rows)
+        old: Dict[str, Optional[float]] = {}
+        for label, value in before.items():
+            key = label.lower()
+            if key in TOTAL_LABELS:
+                old[CLASS_SIZE] = _number(value)
+            elif key in PERCENT_LABELS:
+                old[PLACED] = _number(value)
+            else:
+                old[label] = _number(value)
+        statuses = [s for s in old if s not in (CLASS_SIZE, PLACED)]
+        statuses += [s for s in now if s not in old]
+        now[CLASS_SIZE], now[PLACED] = float(size), round(pct / 100.0, 4)
+        changed = [(label, old.get(label), now.get(label)) for label in statuses + [CLASS_SIZE, PLACED]
+                   if round(old.get(label) or 0, 6) != round(now.get(label) or 0, 6)]
+        if changed:
+            deltas.append(TableDelta(table, since, changed))
+    return deltas
+
+# Rebuilds the hidden Changes sheet
+def write_changes_sheet(wb, deltas: List[TableDelta], run_label: str, have_previous: bool):
+    if CHANGES_SHEET in wb.sheetnames:
+        del wb[CHANGES_SHEET]
+    ws = wb.create_sheet(CHANGES_SHEET)
+    ws.sheet_state = "hidden"
+    if not have_previous:
+        ws.append([f"MRF changes as of {run_label}: no earlier table layout cached yet, changes start with the next run"])
+    else:
+        ws.append([f"MRF changes to {run_label}"])
+    ws.append([])
+    ws.append(["Table", "Row", "Previous", "As of", "Now", "Change"])
+    for delta in deltas:
+        for label, old, new in delta.rows:
+            change = None if old is None or new is None else round(new - old, 4)
+            ws.append([delta.table, label, old, delta.since, new, change])
+            if label == PLACED:
+                for c in (3, 5, 6):
+                    ws.cell(row=ws.max_row, column=c).number_format = "0.00%"
+    if have_previous and not deltas:
+        ws.append(["No MRF values changed"])
+    ws.cell(row=1, column=1).font = HEADER_FONT
+    for c in range(1, 7):
+        ws.cell(row=3, column=c).font = HEADER_FONT
+    for letter, width in zip("ABCDEF", (18, 28, 10, 12, 10, 10)):
+        ws.column_dimensions[letter].width = width
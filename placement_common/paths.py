@@ -0,0 +1,29 @@
+# Where the shared modules keep their files.
+# Both reports import placement_common, but most of what its modules read and write belongs to one report:
+#   REPORT_DIR  the folder of the report that's running (Leadership-Report/ or CareerDirector-Report/): its .env and
+#               its own state (metrics, digest history, Box manifest, month-end charts, table layouts, dry runs)
+#   REPO_DIR    the repository root: what both reports share (routing.toml, student_mirror.sqlite3, rollup.sqlite3)
+# The *_PATH / *_DIR settings of each module still override these.
+# Modules resolve their paths when they're imported, so every report script calls use_report_dir(__file__) before it
+# imports anything else from placement_common. Run on its own (python -m placement_common.rollup build), REPORT_DIR
+# comes from the environment and defaults to the repository root.
+
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+REPORT_DIR = Path(os.getenv("REPORT_DIR", str(REPO_DIR)))
+
+# Makes the folder of script_path the report folder, for this process and the ones it starts
+def use_report_dir(script_path) -> Path:
+    global REPORT_DIR
+    REPORT_DIR = Path(script_path).resolve().parent
+    os.environ["REPORT_DIR"] = str(REPORT_DIR)
+    return REPORT_DIR
+
+# Loads the report's .env, then the repository root's (a variable already set is never overridden)
+def load_env():
+    load_dotenv(REPORT_DIR / ".env")
+    load_dotenv(REPO_DIR / ".env")
@@ -0,0 +1,136 @@
+# Optional query profiler for the update scripts.
+# It wraps the prepared statements so fetch_rows doesn't change, and records for each distinct statement:
+#   how many times it ran, how long it took, how many rows came back,
+#   and (if asked for) the EXPLAIN FORMAT=JSON plan, flagging any full table scans.
+# At the end of the run it writes one JSON profile file, which is what we hand to the DB owners when asking for indexes.
+#
+# Turn it on with QUERY_PROFILE=1 in the .env. QUERY_PROFILE_EXPLAIN=1 also captures the plans.
+
+import os
+import json
+import time
+import datetime as dt
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from placement_common.cohorts import CohortQuery
+
+# Checks whether a .env flag is switched on
+def env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+# Walks an EXPLAIN FORMAT=JSON plan and returns every table MySQL reads with access_type ALL (a full scan)
+def find_full_scans(plan) -> List[str]:
+    scans = []
+    if isinstance(plan, dict):
+        if plan.get("access_type") == "ALL":
+            scans.append(str(plan.get("table_name", "<unknown>")))
+        for v in plan.values():
+            scans.extend(find_full_scans(v))
+    elif isinstance(plan, list):
+        for v in plan:
+            scans.extend(find_full_scans(v))
+    return scans
+
+class QueryProfiler:
+    """Same fetch() as PreparedStatements, but timed and (optionally) explained."""
+
+    def __init__(self, statements, explain: bool = False):
+        self.statements = statements
+        self.conn = statements.conn
+        self.explain = explain
+        self.started = dt.datetime.now()
+        self.stats: Dict[str, Dict] = {}
+
+    def fetch(self, query: CohortQuery, params: Tuple = ()) -> List[Tuple]:
+        t0 = time.perf_counter()
+        rows = self.statements.fetch(query, params)
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        self._record(query, params, elapsed_ms, len(rows))
+        return rows
+
+    # Streams like the wrapped statements; the time counted is the time spent waiting on the server, not the caller
+    def stream(self, query: CohortQuery, params: Tuple = (), batch_size: int = 500) -> Iterator[Tuple]:
+        elapsed_ms, count = 0.0, 0
+        rows = self.statements.stream(query, params, batch_size)
+        try:
+            while True:
+                t0 = time.perf_counter()
+                row = next(rows, None)
+                elapsed_ms += (time.perf_counter() - t0) * 1000.0
+                if row is None:
+                    break
+                count += 1
+                yield row
+        finally:
+            rows.close()
+            self._record(query, params, elapsed_ms, count)
+
+    def _record(self, query: CohortQuery, params: Tuple, elapsed_ms: float, row_count: int):
+        stat = self.stats.get(query.sql)
+        if stat is None:
+            stat = {
+                "name": query.name or "<unnamed>",
+                "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0,
+                "plan": None, "full_scans": [],
+            }
+            self.stats[query.sql] = stat
+            # only explain the first time we see a statement; the plan doesn't change with the program parameter
+            if self.explain:
+                stat["plan"], stat["full_scans"] = self.explain_plan(query, params)
+
+        stat["calls"] += 1
+        stat["total_ms"] += elapsed_ms
+        stat["max_ms"] = max(stat["max_ms"], elapsed_ms)
+        stat["rows"] += row_count
+
+    # Runs EXPLAIN FORMAT=JSON on a plain cursor. A failed EXPLAIN shouldn't stop the report, so errors are recorded instead.
+    def explain_plan(self, query: CohortQuery, params: Tuple):
+        cur = self.conn.cursor()
+        try:
+            cur.execute("EXPLAIN FORMAT=JSON " + query.sql.strip().rstrip(";"), query.params + tuple(params))
+            raw = cur.fetchone()[0]
+            if isinstance(raw, (bytes, bytearray)):
+                raw = raw.decode("utf-8")
+            plan = json.loads(raw)
+            return plan, find_full_scans(plan)
+        except Exception as e:
+            return {"error": str(e)}, []
+        finally:
+            cur.close()
+
+    def is_connected(self) -> bool:
+        return self.statements.is_connected()
+
+    def close(self):
+        self.statements.close()
+
+    # Writes the run's profile to out_dir/query-profile-<timestamp>.json and prints a short summary
+    def write_profile(self, out_dir: Path) -> Path:
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        path = out_dir / f"query-profile-{self.started:%Y%m%d-%H%M%S}.json"
+
+        queries = []
+        for sql, stat in sorted(self.stats.items(), key=lambda kv: kv[1]["total_ms"], reverse=True):
+            entry = dict(stat)
+            entry["avg_ms"] = round(stat["total_ms"] / stat["calls"], 3) if stat["calls"] else 0.0
+            entry["total_ms"] = round(stat["total_ms"], 3)
+            entry["max_ms"] = round(stat["max_ms"], 3)
+            entry["sql"] = sql.strip()
+            queries.append(entry)
+
+        profile = {
+            "started": self.started.isoformat(timespec="seconds"),
+            "explain": self.explain,
+            "total_ms": round(sum(q["total_ms"] for q in queries), 3),
+            "queries": queries,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(profile, f, indent=2, default=str)
+
+        for q in queries:
+            flag = f"  FULL SCAN: {', '.join(q['full_scans'])}" if q["full_scans"] else ""
+            print(f"{q['name']:<22} calls={q['calls']:<3} total={q['total_ms']:.1f}ms rows={q['rows']}{flag}")
+        print(f"Query profile written: {path}")
+        return path
@@ -0,0 +1,241 @@
+# Nightly placement rollup.
+# The Friday run normally does all of its aggregation against bcc_student_view at send time, so how fast the report goes
+# depends on how busy the DB is at 10am. This job runs the same cohort logic once a night (from cron) and stores a
+# compact rollup -- one row per (snapshot_date, cohort, program, status_kind, status) with its count -- in a local
+# SQLite file. With PLACEMENT_SOURCE=rollup the update scripts read that instead: programs x statuses rows, no view scans.
+# Every day also gets a snapshot for free, which later tooling (backfills, charts, anomaly checks) reads from.
+#
+# Nightly build (cron):   python -m placement_common.rollup build [--date YYYY-MM-DD]   (from the repository root)
+#
+# Cohorts stored:
+#   FT          full time cohort (cohorts.full_time_where), status_kind "job"
+#   INT:<year>  one internship class (cohorts.internship_where), status_kind "internship"
+#   FT          with status_kind "summary": the summary sheet's columns (offer_accepted, ..., total)
+
+import os
+import sys
+import sqlite3
+import argparse
+import datetime as dt
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from placement_common.cohorts import INT_CLASSES, compile_query, full_time_where, internship_where
+from placement_common.paths import REPO_DIR, load_env
+
+# ----------------------------
+# 1) Global Variables
+# ----------------------------
+
+load_env()
+
+ROLLUP_PATH = Path(os.getenv("ROLLUP_PATH", str(REPO_DIR / "rollup.sqlite3")))
+
+# A Friday run won't use a rollup older than this (fail instead of sending stale numbers)
+ROLLUP_MAX_AGE_DAYS = int(os.getenv("ROLLUP_MAX_AGE_DAYS", "1"))
+
+COHORT_FT = "FT"
+KIND_JOB = "job"
+KIND_INTERNSHIP = "internship"
+KIND_SUMMARY = "summary"
+
+# Column order of the summary sheet query (matches SQL_SUMMARY in update-leadership-report.py)
+SUMMARY_FIELDS = ("offer_accepted", "still_seeking", "no_info", "not_seeking", "intl_all", "total")
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS placement_rollup (
+    snapshot_date TEXT NOT NULL,
+    cohort TEXT NOT NULL,
+    program TEXT NOT NULL,
+    status_kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (snapshot_date, cohort, program, status_kind, status)
+);
+"""
+
+def internship_cohort(class_of) -> str:
+    return f"INT:{class_of}"
+
+# ----------------------------
+# 2) SQL (one grouped query per cohort instead of one query per program)
+# ----------------------------
+
+ROLLUP_FT_TEMPLATE = """
+SELECT
+    program,
+    COALESCE(job_search_status, 'Not Reported') AS job_search_status,
+    COUNT(*) AS count
+FROM msmdatabase.bcc_student_view
+{COHORT}GROUP BY program, COALESCE(job_search_status, 'Not Reported');
+"""
+
+ROLLUP_INT_TEMPLATE = """
+SELECT
+    program,
+    class_of,
+    COALESCE(internship_search_status, 'Not Reported') AS internship_search_status,
+    COUNT(*) AS count
+FROM msmdatabase.bcc_student_view
+{COHORT}GROUP BY program, class_of, COALESCE(internship_search_status, 'Not Reported');
+"""
+
+ROLLUP_SUMMARY_TEMPLATE = """
+SELECT
+    program,
+    SUM(job_search_status = 'Accepted an offer') AS offer_accepted,
+    SUM(job_search_status = 'Actively seeking') AS still_seeking,
+    SUM(CASE WHEN COALESCE(job_search_status,'') IN ('Not Reported','No Recent Information Available','') THEN 1 ELSE 0 END) AS no_info,
+    SUM(job_search_status LIKE 'Not seeking%') AS not_seeking,
+    SUM(CASE WHEN is_international = 1 AND (work_authorization NOT IN ('U.S. Permanent Resident', 'U.S. Citizen') OR work_authorization IS NULL) THEN 1 ELSE 0 END) AS intl_all,
+    COUNT(*) AS total
+FROM msmdatabase.bcc_student_view
+{COHORT}GROUP BY program;
+"""
+
+ROLLUP_FT = compile_query(ROLLUP_FT_TEMPLATE, full_time_where(), "ROLLUP_FT")
+ROLLUP_INT = compile_query(ROLLUP_INT_TEMPLATE, internship_where(), "ROLLUP_INT")
+ROLLUP_SUMMARY = compile_query(ROLLUP_SUMMARY_TEMPLATE, full_time_where(), "ROLLUP_SUMMARY")
+
+# ----------------------------
+# 3) Building a snapshot
+# ----------------------------
+
+def open_rollup_db(path: Path = ROLLUP_PATH) -> sqlite3.Connection:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(str(path))
+    db.executescript(SCHEMA_SQL)
+    return db
+
+# Runs the three grouped queries and returns rollup rows (cohort, program, status_kind, status, count)
+def collect_rollup(statements) -> List[Tuple[str, str, str, str, int]]:
+    rows = []
+    for program, status, count in statements.fetch(ROLLUP_FT):
+        rows.append((COHORT_FT, str(program), KIND_JOB, str(status), int(count)))
+    for program, class_of, status, count in statements.fetch(ROLLUP_INT):
+        rows.append((internship_cohort(class_of), str(program), KIND_INTERNSHIP, str(status), int(count)))
+    for program, *values in statements.fetch(ROLLUP_SUMMARY):
+        for field, value in zip(SUMMARY_FIELDS, values):
+            rows.append((COHORT_FT, str(program), KIND_SUMMARY, field, int(value or 0)))
+    return rows
+
+# Replaces the snapshot for snapshot_date (re-running the job on the same day just overwrites it)
+def write_snapshot(db: sqlite3.Connection, snapshot_date: dt.date, rows: Iterable[Tuple]):
+    day = snapshot_date.isoformat()
+    with db:
+        db.execute("DELETE FROM placement_rollup WHERE snapshot_date = ?", (day,))
+        db.executemany(
+            "INSERT INTO placement_rollup (snapshot_date, cohort, program, status_kind, status, count) VALUES (?, ?, ?, ?, ?, ?)",
+            [(day,) + tuple(r) for r in rows],
+        )
+
+# ----------------------------
+# 4) Reading a snapshot
+# ----------------------------
+
+# Most recent snapshot on or before the given day (None if there isn't one)
+def latest_snapshot(db: sqlite3.Connection, on_or_before: dt.date) -> Optional[dt.date]:
+    row = db.execute(
+        "SELECT MAX(snapshot_date) FROM placement_rollup WHERE snapshot_date <= ?", (on_or_before.isoformat(),)
+    ).fetchone()
+    return dt.date.fromisoformat(row[0]) if row and row[0] else None
+
+# Every snapshot date in [start, end], oldest first
+def snapshot_dates(db: sqlite3.Connection, start: dt.date, end: dt.date) -> List[dt.date]:
+    rows = db.execute(
+        "SELECT DISTINCT snapshot_date FROM placement_rollup WHERE snapshot_date BETWEEN ? AND ? ORDER BY snapshot_date",
+        (start.isoformat(), end.isoformat()),
+    )
+    return [dt.date.fromisoformat(r[0]) for r in rows]
+
+# (status, count) rows for a set of cohorts, summed over the given programs (all programs if None).
+# Same shape as the report queries, so the workbook updaters don't know the difference.
+def status_counts(db: sqlite3.Connection, snapshot_date: dt.date, cohorts: Sequence[str], status_kind: str,
+                  programs: Optional[Sequence[str]] = None) -> List[Tuple[str, int]]:
+    sql = (
+        "SELECT status, SUM(count) FROM placement_rollup WHERE snapshot_date = ? AND status_kind = ?"
+        f" AND cohort IN ({','.join(['?'] * len(cohorts))})"
+    )
+    params: List = [snapshot_date.isoformat(), status_kind] + list(cohorts)
+    if programs is not None:
+        sql += f" AND program IN ({','.join(['?'] * len(programs))})"
+        params += list(programs)
+    sql += " GROUP BY status ORDER BY status"
+    return [(s, int(c)) for s, c in db.execute(sql, params)]
+
+def full_time_counts(db, snapshot_date, programs=None):
+    return status_counts(db, snapshot_date, [COHORT_FT], KIND_JOB, programs)
+
+def internship_counts(db, snapshot_date, programs=None, classes: Sequence[int] = INT_CLASSES):
+    return status_counts(db, snapshot_date, [internship_cohort(c) for c in classes], KIND_INTERNSHIP, programs)
+
+# Summary sheet rows: (program, offer_accepted, still_seeking, no_info, not_seeking, intl_all, total)
+def summary_rows(db: sqlite3.Connection, snapshot_date: dt.date, programs: Sequence[str]) -> List[Tuple]:
+    by_prog: Dict[str, Dict[str, int]] = {}
+    for program, field, count in db.execute(
+        "SELECT program, status, count FROM placement_rollup WHERE snapshot_date = ? AND status_kind = ?",
+        (snapshot_date.isoformat(), KIND_SUMMARY),
+    ):
+        by_prog.setdefault(program, {})[field] = int(count)
+    return [
+        (p,) + tuple(by_prog[p].get(f, 0) for f in SUMMARY_FIELDS)
+        for p in sorted(programs) if p in by_prog
+    ]
+
+# Opens the rollup for a Friday run and picks today's snapshot. Fails if it's missing or too old.
+def open_for_run(today: dt.date, path: Path = ROLLUP_PATH) -> Tuple[sqlite3.Connection, dt.date]:
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Rollup not found at: {path} (run 'python -m placement_common.rollup build' first)")
+    db = sqlite3.connect(str(path))
+    snap = latest_snapshot(db, today)
+    if snap is None or (today - snap).days > ROLLUP_MAX_AGE_DAYS:
+        db.close()
+        raise RuntimeError(f"No rollup snapshot within {ROLLUP_MAX_AGE_DAYS} day(s) of {today} (latest: {snap}).")
+    return db, snap
+
+# ----------------------------
+# 5) Command line
+# ----------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the nightly placement rollup.")
+    parser.add_argument("command", choices=["build"], help="build: aggregate the view into a snapshot for --date")
+    parser.add_argument("--date", default=None, help="snapshot date, YYYY-MM-DD (default: today)")
+    parser.add_argument("--path", default=str(ROLLUP_PATH), help="rollup file (default: ROLLUP_PATH or rollup.sqlite3)")
+    args = parser.parse_args(argv)
+    snapshot_date = dt.date.fromisoformat(args.date) if args.date else dt.date.today()
+
+    # Same sources as the update scripts: the live view, or the local mirror with PLACEMENT_SOURCE=mirror
+    if os.getenv("PLACEMENT_SOURCE", "mysql").strip().lower() == "mirror":
+        from placement_common.student_mirror import open_mirror
+        statements = open_mirror()
+    else:
+        import mysql.connector
+        from placement_common.cohorts import PreparedStatements
+        statements = PreparedStatements(mysql.connector.connect(
+            host=os.environ["DB_HOST"], user=os.environ["DB_USER"], password=os.environ["DB_PASSWORD"],
+            database=os.environ["DB_NAME"], autocommit=False,
+        ))
+
+    try:
+        rows = collect_rollup(statements)
+    finally:
+        statements.close()
+        statements.conn.close()
+
+    db = open_rollup_db(Path(args.path))
+    try:
+        write_snapshot(db, snapshot_date, rows)
+    finally:
+        db.close()
+    print(f"Rollup snapshot {snapshot_date}: {len(rows)} rows written to {args.path}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        sys.stderr.write(f"[ERROR] {e}\n")
+        sys.exit(1)
@@ -0,0 +1,181 @@
+# Programs, career directors and table names from routing.toml (ROUTING_CONFIG), compiled into lookup tables.
+# The program list, the director -> programs/emails dictionary and the table naming rules used to be hardcoded in the
+# scripts, so every roster change was a code edit. Now they live in one TOML file that is validated as a whole (every
+# problem is reported at once, before anything runs) and compiled into a Routing:
+#   programs            the program order (leadership summary and program sheets)
+#   directors           {director: Director(programs, emails, file label, subject label)}
+#   director_of         {program: director}
+#   tables              {program: its sheet's table names}, plus "Class" for the director workbooks' overall sheet
+#   internship_tables   {program: (MRF, WH)} on the leadership "By Program - Internships" sheet
+# so a run only does dictionary lookups.
+#
+# current_routing() re-reads the file when its modification time changes, so a long-running process picks up an edit
+# on its next run without a restart. If the edited file doesn't validate, the last good routing is kept (with a
+# warning); there has to be a good one to start from.
+#
+# Both reports read the same file, routing.toml at the repository root (ROUTING_CONFIG overrides the path).
+# tomllib is in the standard library from Python 3.11; older Pythons (the Pi's) need `pip install tomli`.
+
+import os
+import sys
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    import tomli as tomllib
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from placement_common.paths import REPO_DIR
+
+ROUTING_PATH = Path(os.getenv("ROUTING_CONFIG", str(REPO_DIR / "routing.toml")))
+
+# Tables per program sheet; BSFin's internships are split by class into two more
+TABLE_COUNT = 4
+TABLE_COUNTS = {"BSFin": 6}
+CLASS_TABLES = ("Class1", "Class2", "Class3", "Class4")
+
+TOP_LEVEL_KEYS = {"programs", "tables", "directors"}
+TABLE_KEYS = {"pattern", "internship_pattern", "overrides"}
+DIRECTOR_KEYS = {"name", "programs", "emails"}
+
+class Director(NamedTuple):
+    name: str
+    programs: Tuple[str, ...]
+    emails: Tuple[str, ...]
+    file_label: str     # BSAcc-MAcc, as in WeeklyPlacement-BSAcc-MAcc.xlsx
+    subject_label: str  # BSAcc, MAcc
+
+class Routing(NamedTuple):
+    programs: Tuple[str, ...]
+    directors: Dict[str, Director]
+    director_of: Dict[str, str]
+    tables: Dict[str, Tuple[str, ...]]
+    internship_tables: Dict[str, Tuple[str, str]]
+
+    # The table names a director workbook with these programs uses: "Class" plus one entry per program
+    def table_names(self, programs: Sequence[str]) -> Dict[str, Tuple[str, ...]]:
+        unknown = [p for p in programs if p not in self.tables]
+        if unknown:
+            raise RuntimeError(f"Programs not in {ROUTING_PATH.name}: {', '.join(unknown)}")
+        return {"Class": self.tables["Class"], **{p: self.tables[p] for p in programs}}
+
+def file_label(programs: Sequence[str]) -> str:
+    return "-".join(programs)
+
+def _strings(value, what: str, problems: List[str]) -> List[str]:
+    if not isinstance(value, list) or not value or not all(isinstance(v, str) and v.strip() for v in value):
+        problems.append(f"{what} must be a non-empty list of names")
+        return []
+    return [v.strip() for v in value]
+
+def _pattern(value, what: str, problems: List[str]) -> Optional[str]:
+    if not isinstance(value, str) or "{program}" not in value or "{n}" not in value:
+        problems.append(f"{what} must be a string with {{program}} and {{n}} in it")
+        return None
+    try:
+        value.format(program="X", n=1)
+    except (KeyError, IndexError, ValueError):
+        problems.append(f"{what} may only use {{program}} and {{n}}")
+        return None
+    return value
+
+# Validates the parsed TOML and compiles it. Raises RuntimeError listing every problem.
+def compile_routing(raw: Dict, source: str = "routing") -> Routing:
+    problems: List[str] = []
+    for key in sorted(set(raw) - TOP_LEVEL_KEYS):
+        problems.append(f"unknown setting '{key}'")
+
+    programs = _strings(raw.get("programs"), "programs", problems)
+    for p in sorted({p for p in programs if programs.count(p) > 1}):
+        problems.append(f"program '{p}' is listed twice")
+
+    tables_raw = raw.get("tables", {})
+    if not isinstance(tables_raw, dict):
+        problems.append("[tables] must be a table")
+        tables_raw = {}
+    for key in sorted(set(tables_raw) - TABLE_KEYS):
+        problems.append(f"unknown setting 'tables.{key}'")
+    pattern = _pattern(tables_raw.get("pattern", "{program}{n}"), "tables.pattern", problems)
+    int_pattern = _pattern(tables_raw.get("internship_pattern", "{program}_int{n}"), "tables.internship_pattern", problems)
+    overrides = {}
+    for prog, value in (tables_raw.get("overrides") or {}).items():
+        if prog not in programs:
+            problems.append(f"tables.overrides: '{prog}' is not in programs")
+        overrides[prog] = _pattern(value, f"tables.overrides.{prog}", problems)
+
+    directors: Dict[str, Director] = {}
+    director_of: Dict[str, str] = {}
+    entries = raw.get("directors", [])
+    if not isinstance(entries, list):
+        problems.append("directors must be a list of [[directors]] entries")
+        entries = []
+    for i, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict):
+            problems.append(f"director #{i} must be a table")
+            continue
+        name = entry.get("name")
+        if not isinstance(name, str) or not name.strip():
+            problems.append(f"director #{i} has no name")
+            continue
+        name = name.strip()
+        label = f"director '{name}'"
+        for key in sorted(set(entry) - DIRECTOR_KEYS):
+            problems.append(f"{label}: unknown setting '{key}'")
+        if name in directors:
+            problems.append(f"{label} is listed twice")
+        progs = _strings(entry.get("programs"), f"{label}: programs", problems)
+        emails = _strings(entry.get("emails"), f"{label}: emails", problems)
+        for e in emails:
+            if "@" not in e:
+                problems.append(f"{label}: '{e}' is not an email address")
+        for p in progs:
+            if p not in programs:
+                problems.append(f"{label}: program '{p}' is not in programs")
+            elif p in director_of:
+                problems.append(f"{label}: program '{p}' already goes to '{director_of[p]}'")
+            else:
+                director_of[p] = name
+        directors[name] = Director(name, tuple(progs), tuple(emails), file_label(progs), ", ".join(progs))
+
+    if problems:
+        raise RuntimeError(f"Invalid {source}:\n  " + "\n  ".join(problems))
+
+    tables: Dict[str, Tuple[str, ...]] = {"Class": CLASS_TABLES}
+    internship_tables: Dict[str, Tuple[str, str]] = {}
+    for p in programs:
+        fmt = overrides.get(p) or pattern
+        tables[p] = tuple(fmt.format(program=p, n=n) for n in range(1, TABLE_COUNTS.get(p, TABLE_COUNT) + 1))
+        internship_tables[p] = (int_pattern.format(program=p, n=1), int_pattern.format(program=p, n=2))
+    return Routing(tuple(programs), directors, director_of, tables, internship_tables)
+
+def load_routing(path: Path = ROUTING_PATH) -> Routing:
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Routing config not found at: {path}")
+    try:
+        with open(path, "rb") as f:
+            raw = tomllib.load(f)
+    except tomllib.TOMLDecodeError as e:
+        raise RuntimeError(f"Invalid {path.name}: {e}") from e
+    return compile_routing(raw, path.name)
+
+# path -> (mtime, routing) of the last good load
+_LOADED: Dict[str, Tuple[float, Routing]] = {}
+
+# The compiled routing, re-read only when the file changed since the last call
+def current_routing(path: Path = ROUTING_PATH) -> Routing:
+    path = Path(path)
+    key = str(path)
+    mtime = path.stat().st_mtime if path.exists() else None
+    loaded = _LOADED.get(key)
+    if loaded is not None and loaded[0] == mtime:
+        return loaded[1]
+    try:
+        routing = load_routing(path)
+    except (RuntimeError, FileNotFoundError) as e:
+        if loaded is None:
+            raise
+        sys.stderr.write(f"[WARN] {e}\n[WARN] Keeping the routing loaded before the edit\n")
+        return loaded[1]
+    _LOADED[key] = (mtime, routing)
+    return routing
@@ -0,0 +1,168 @@
+# Per-stage run metrics.
+# Every interesting step of a run (schedule check, DB connect, each query, workbook load, each table update, save,
+# attachment encode, each SMTP send) is wrapped in a stage() block that records wall time, CPU time and RSS delta.
+# At the end of the run the stages are appended to a JSON-lines run log and written out as a Prometheus textfile
+# (for node_exporter's textfile collector), so regressions like "load_workbook doubled since October" show up.
+#
+# The update and email scripts run in the same process, so they share the one METRICS object in this module.
+#
+# Low-memory mode (LOW_MEMORY=1, for the Pi): every stage also records its top allocators from tracemalloc, and after
+# each stage the RSS is checked against RSS_BUDGET_MB -- over budget, we collect garbage and warn if that didn't help.
+
+import os
+import gc
+import sys
+import json
+import time
+import resource
+import tracemalloc
+import datetime as dt
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from placement_common.paths import REPORT_DIR
+
+# Where the run log and the Prometheus textfile go
+METRICS_DIR = Path(os.getenv("METRICS_DIR", str(REPORT_DIR / "metrics")))
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Low-memory mode settings
+LOW_MEMORY = os.getenv("LOW_MEMORY", "").strip().lower() in ("1", "true", "yes", "on")
+RSS_BUDGET_BYTES = int(float(os.getenv("RSS_BUDGET_MB", "0")) * 1024 * 1024)  # 0 = no budget
+TRACEMALLOC_TOP = int(os.getenv("TRACEMALLOC_TOP", "5"))  # 0 = skip tracemalloc (it makes the run ~10x slower)
+
+# Current resident set size in bytes. /proc is there on the Pi; elsewhere fall back to the peak RSS.
+def current_rss() -> int:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class RunMetrics:
+    def __init__(self):
+        self.run = "placement"
+        self.started = dt.datetime.now()
+        self.stages: List[Dict] = []
+
+    # Names the run ("leadership", "career-director") and starts the clock over
+    def start(self, run: str):
+        self.run = run
+        self.started = dt.datetime.now()
+        self.stages = []
+        if LOW_MEMORY and TRACEMALLOC_TOP > 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(1)  # one frame is all the "lineno" grouping needs, and keeps snapshots cheap
+
+    # Top allocators between two tracemalloc snapshots, as "file:line +N KiB" strings
+    @staticmethod
+    def top_allocators(before, after) -> List[str]:
+        stats = after.compare_to(before, "lineno")
+        out = []
+        for st in stats[:TRACEMALLOC_TOP]:
+            frame = st.traceback[0]
+            out.append(f"{os.path.basename(frame.filename)}:{frame.lineno} {st.size_diff / 1024:+.1f} KiB")
+        return out
+
+    # Over budget: collect garbage, and warn if that wasn't enough. Returns True if still over.
+    def check_budget(self, name: str, detail: str) -> bool:
+        if not RSS_BUDGET_BYTES:
+            return False
+        rss = current_rss()
+        if rss <= RSS_BUDGET_BYTES:
+            return False
+        gc.collect()
+        rss = current_rss()
+        if rss <= RSS_BUDGET_BYTES:
+            return False
+        sys.stderr.write(
+            f"[WARN] RSS {rss / 2**20:.1f} MiB over budget {RSS_BUDGET_BYTES / 2**20:.1f} MiB after {name} {detail}\n"
+        )
+        return True
+
+    @contextmanager
+    def stage(self, name: str, detail: str = ""):
+        tracing = tracemalloc.is_tracing()
+        snap0 = tracemalloc.take_snapshot() if tracing else None
+        wall0, cpu0, rss0 = time.perf_counter(), time.process_time(), current_rss()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            record = {
+                "stage": name,
+                "detail": detail,
+                "wall_s": round(time.perf_counter() - wall0, 6),
+                "cpu_s": round(time.process_time() - cpu0, 6),
+                "rss_delta_bytes": current_rss() - rss0,
+                "ok": ok,
+            }
+            if tracing:
+                record["top_allocators"] = self.top_allocators(snap0, tracemalloc.take_snapshot())
+            if LOW_MEMORY:
+                record["over_budget"] = self.check_budget(name, detail)
+            self.stages.append(record)
+
+    # Appends one JSON line per stage to run-log.jsonl and rewrites the run's .prom textfile
+    def write(self, status: str = "ok", out_dir: Optional[Path] = None) -> Tuple[Path, Path]:
+        out_dir = Path(out_dir or METRICS_DIR)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        run_id = f"{self.run}-{self.started:%Y%m%dT%H%M%S}"
+
+        log_path = out_dir / "run-log.jsonl"
+        with open(log_path, "a", encoding="utf-8") as f:
+            for s in self.stages:
+                f.write(json.dumps({"run_id": run_id, "run": self.run, **s}) + "\n")
+            f.write(json.dumps({
+                "run_id": run_id, "run": self.run, "stage": "run", "detail": status,
+                "wall_s": round((dt.datetime.now() - self.started).total_seconds(), 6),
+                "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+            }) + "\n")
+
+        prom_path = out_dir / f"placement_{self.run.replace('-', '_')}.prom"
+        tmp = prom_path.with_name(prom_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text(status))
+        os.replace(tmp, prom_path)  # the collector never sees a half-written file
+        return log_path, prom_path
+
+    # Totals per stage. The detail (file names, email subjects, dates) only goes to the run log: as a label it would
+    # start a new time series every run.
+    def prometheus_text(self, status: str) -> str:
+        totals: Dict[str, List[float]] = {}
+        for s in self.stages:
+            t = totals.setdefault(s["stage"], [0.0, 0.0, 0.0, 0])
+            t[0] += s["wall_s"]; t[1] += s["cpu_s"]; t[2] += s["rss_delta_bytes"]; t[3] += 1
+
+        def esc(v: str) -> str:
+            return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+        lines = []
+        for metric, idx, help_text in (
+            ("placement_stage_wall_seconds", 0, "Wall time spent in each run stage."),
+            ("placement_stage_cpu_seconds", 1, "CPU time spent in each run stage."),
+            ("placement_stage_rss_delta_bytes", 2, "Change in resident memory across each run stage."),
+            ("placement_stage_count", 3, "How many times each run stage ran."),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for stage_name, vals in totals.items():
+                value = f"{vals[idx]:.6f}" if idx < 3 else str(vals[idx])
+                lines.append(f'{metric}{{run="{esc(self.run)}",stage="{esc(stage_name)}"}} {value}')
+        lines.append("# HELP placement_run_last_timestamp_seconds When the run finished.")
+        lines.append("# TYPE placement_run_last_timestamp_seconds gauge")
+        lines.append(f'placement_run_last_timestamp_seconds{{run="{esc(self.run)}",status="{esc(status)}"}} {time.time():.0f}')
+        lines.append("# HELP placement_run_peak_rss_bytes Peak resident memory of the run.")
+        lines.append("# TYPE placement_run_peak_rss_bytes gauge")
+        lines.append(f'placement_run_peak_rss_bytes{{run="{esc(self.run)}"}} {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024}')
+        return "\n".join(lines) + "\n"
+
+# The one shared instance for the process
+METRICS = RunMetrics()
+
+def stage(name: str, detail: str = ""):
+    return METRICS.stage(name, detail)
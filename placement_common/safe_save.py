@@ -0,0 +1,87 @@
+# Crash-safe workbook saves.
+# wb.save(path) rewrote the only copy of a workbook in place, so a crash or power cut mid-save (an SD card on the Pi)
+# could leave a truncated file and lose months of WH (Weekly History) columns. safe_save() instead:
+#  - writes the workbook straight to a temp file in the same directory (never into memory: on the Pi the finished
+#    file next to the loaded workbook is the peak LOW_MEMORY is there to cut) and hashes it the way box_manifest.py
+#    does (every zip member but the save timestamp);
+#  - if the workbook on disk already has that content (e.g. a rerun the same day with the same numbers, which
+#    rewrites that day's WH column rather than adding one), drops the temp file and leaves the workbook alone;
+#  - otherwise fsyncs the temp file,
+#  - keeps the current file as backups/<name>.1.xlsx (a hard link, so no copy; older ones shift to .2, .3...,
+#    WORKBOOK_BACKUPS of them, 0 for none) -- once per run date: a file already saved today isn't backed up, so
+#    reruns can't push the previous run's workbook (the one to restore after a bad run) out of backups/,
+#  - and renames the temp file over the workbook (atomic on the same filesystem), then fsyncs the directory.
+# At any moment the workbook path holds either the old file or the new one, never a partial one.
+
+import os
+import shutil
+import datetime as dt
+from pathlib import Path
+from typing import Callable, Optional
+
+from placement_common.box_manifest import content_hash, xlsx_hash
+
+WORKBOOK_BACKUPS = int(os.getenv("WORKBOOK_BACKUPS", "3"))
+BACKUP_DIR_NAME = "backups"
+
+def _fsync_dir(path: Path):
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return  # not supported here (Windows); the rename is still atomic
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _backup_path(path: Path, n: int) -> Path:
+    return path.parent / BACKUP_DIR_NAME / f"{path.stem}.{n}{path.suffix}"
+
+# Shifts backups/<name>.1 -> .2 ... (dropping the oldest) and keeps the current file as .1, unless the current file
+# was saved today (by an earlier run today), in which case the backups from before today stay as they are
+def rotate_backups(path: Path, keep: int = WORKBOOK_BACKUPS, today: Optional[dt.date] = None):
+    if keep <= 0 or not path.exists():
+        return
+    if dt.date.fromtimestamp(path.stat().st_mtime) == (today or dt.date.today()):
+        return
+    backup_dir = _backup_path(path, 1).parent
+    backup_dir.mkdir(parents=True, exist_ok=True)
+    # The oldest kept one makes room, and so does anything left from a larger WORKBOOK_BACKUPS
+    for old in backup_dir.glob(f"{path.stem}.*{path.suffix}"):
+        n = old.name[len(path.stem) + 1:len(old.name) - len(path.suffix)]
+        if n.isdigit() and int(n) >= keep:
+            old.unlink()
+    for n in range(keep - 1, 0, -1):
+        if _backup_path(path, n).exists():
+            os.replace(_backup_path(path, n), _backup_path(path, n + 1))
+    try:
+        os.link(path, _backup_path(path, 1))
+    except OSError:
+        shutil.copy2(path, _backup_path(path, 1))  # filesystems without hard links
+
+# Saves a workbook through write(target) (wb.save, or parallel_sheets.save_rendered) without ever leaving a partial
+# file at path. Returns False if the file already had this content and was left alone.
+def safe_save(write: Callable[[object], None], path, backups: int = WORKBOOK_BACKUPS) -> bool:
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            write(f)
+            f.flush()
+            unchanged = path.exists() and xlsx_hash(tmp) == content_hash(path)
+            if not unchanged:
+                os.fsync(f.fileno())
+        if unchanged:
+            tmp.unlink()
+            print(f"{path.name} unchanged; not rewritten")
+            return False
+        rotate_backups(path, backups)
+        os.replace(tmp, path)
+    except BaseException:
+        if tmp.exists():
+            tmp.unlink()
+        raise
+    _fsync_dir(path.parent)
+    return True
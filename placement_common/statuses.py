@@ -0,0 +1,17 @@
+# Placement status names and the % placed formula of the workbooks, for the modules that turn a report's data snapshot
+# into something other than the workbook (the leadership dashboard and BI export).
+
+from typing import Dict
+
+# Status labels used for placement calculation (must match SQL result strings exactly)
+STATUS_ACCEPTED = "Accepted an offer"
+STATUS_SEEKING = "Actively seeking"
+STATUS_NOT_REPORTED = "Not Reported"
+
+# The summary query's columns after the program (the summary sheet's columns)
+SUMMARY_FIELDS = ("offer_accepted", "still_seeking", "no_info", "not_seeking", "intl_all", "total")
+
+# Same formula as the workbook: accepted / (accepted + seeking + not reported), 0-100
+def placed_percent(counts: Dict[str, int]) -> float:
+    denom = counts.get(STATUS_ACCEPTED, 0) + counts.get(STATUS_SEEKING, 0) + counts.get(STATUS_NOT_REPORTED, 0)
+    return round(counts.get(STATUS_ACCEPTED, 0) * 100.0 / denom, 2) if denom else 0.0
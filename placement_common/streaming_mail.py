@@ -0,0 +1,93 @@
+# Streamed attachments for low-memory mode (LOW_MEMORY=1).
+# EmailMessage.add_attachment needs the whole file in memory, and flattening the message for smtplib keeps another
+# base64 copy on top of that. On the Pi that's the biggest memory spike of the run after openpyxl.
+# In low-memory mode attach_file only records the path. At send time the message is written to a spool file in
+# small base64 chunks, and that file is streamed to the SMTP server line by line.
+
+import os
+import uuid
+import base64
+import tempfile
+import mimetypes
+from email import message_from_bytes, policy
+from email.message import EmailMessage
+from typing import Iterable, List
+
+# 57 raw bytes -> one 76 character base64 line; read the file a few hundred lines at a time
+_B64_LINE = 57
+_READ_SIZE = _B64_LINE * 512
+
+# Headers that describe the body; everything else is an envelope header that stays on the outer message
+_CONTENT_HEADERS = ("content-type", "content-transfer-encoding", "mime-version", "content-disposition")
+
+def defer_attachment(msg: EmailMessage, path: str):
+    pending: List[str] = getattr(msg, "pending_attachments", [])
+    pending.append(str(path))
+    msg.pending_attachments = pending
+
+def pending_attachments(msg: EmailMessage) -> List[str]:
+    return list(getattr(msg, "pending_attachments", []))
+
+# Writes msg plus its deferred attachments as a multipart/mixed message with CRLF line endings.
+# Headers are folded and RFC 2047 encoded the way send_message would send them (long To/Cc lists, non-ASCII names).
+def write_spool(msg: EmailMessage, out) -> None:
+    boundary = f"=_placement_{uuid.uuid4().hex}"
+    for name, value in msg.items():
+        if name.lower() not in _CONTENT_HEADERS:
+            out.write(policy.SMTP.fold_binary(name, value))
+    out.write(b"MIME-Version: 1.0\r\n")
+    out.write(f'Content-Type: multipart/mixed; boundary="{boundary}"\r\n\r\n'.encode("ascii"))
+
+    # The body part is the original message without its envelope headers (it has no attachments, so it's small)
+    body = message_from_bytes(msg.as_bytes(policy=policy.SMTP), policy=policy.SMTP)
+    for name in {k.lower() for k in body.keys()}:
+        if name not in _CONTENT_HEADERS:
+            del body[name]
+    out.write(f"--{boundary}\r\n".encode("ascii"))
+    out.write(body.as_bytes(policy=policy.SMTP))
+    out.write(b"\r\n")
+
+    for path in pending_attachments(msg):
+        ctype, _ = mimetypes.guess_type(path)
+        ctype = ctype or "application/octet-stream"
+        filename = os.path.basename(path)
+        out.write(f"--{boundary}\r\n".encode("ascii"))
+        out.write(f"Content-Type: {ctype}\r\n".encode("ascii"))
+        out.write(b"Content-Transfer-Encoding: base64\r\n")
+        out.write(policy.SMTP.fold_binary("Content-Disposition", f'attachment; filename="{filename}"'))
+        out.write(b"\r\n")
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(_READ_SIZE)
+                if not chunk:
+                    break
+                for i in range(0, len(chunk), _B64_LINE):
+                    out.write(base64.b64encode(chunk[i:i + _B64_LINE]) + b"\r\n")
+    out.write(f"--{boundary}--\r\n".encode("ascii"))
+
+# Sends msg through an open smtplib.SMTP connection without ever holding the encoded message in memory
+def send_streamed(smtp, msg: EmailMessage, from_addr: str, to_addrs: Iterable[str]) -> None:
+    with tempfile.TemporaryFile() as spool:
+        write_spool(msg, spool)
+        spool.seek(0)
+
+        smtp.ehlo_or_helo_if_needed()
+        code, resp = smtp.mail(from_addr)
+        if code != 250:
+            raise RuntimeError(f"SMTP MAIL FROM refused: {code} {resp!r}")
+        for rcpt in to_addrs:
+            code, resp = smtp.rcpt(rcpt)
+            if code not in (250, 251):
+                raise RuntimeError(f"SMTP RCPT TO {rcpt} refused: {code} {resp!r}")
+        smtp.putcmd("data")
+        code, resp = smtp.getreply()
+        if code != 354:
+            raise RuntimeError(f"SMTP DATA refused: {code} {resp!r}")
+        for line in spool:
+            if line.startswith(b"."):
+                line = b"." + line  # dot-stuffing (RFC 5321 4.5.2)
+            smtp.send(line)
+        smtp.send(b".\r\n")
+        code, resp = smtp.getreply()
+        if code != 250:
+            raise RuntimeError(f"SMTP message not accepted: {code} {resp!r}")
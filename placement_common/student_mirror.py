@@ -0,0 +1,288 @@
+# Local SQLite mirror of bcc_student_view.
+# The update scripts normally read the live view over the network. This keeps a local copy of just the columns and
+# classes the reports use, so a run can read from the mirror instead (PLACEMENT_SOURCE=mirror in the .env).
+# That keeps the reports working during DB maintenance windows and gives tests/benchmarks a database to read from.
+#
+# Sync (run from cron before the reports, or by hand):   python -m placement_common.student_mirror sync   (from the repository root)
+# The sync is incremental: it compares a row count + checksum per program with the server, and for the programs that
+# changed it only pulls the rows whose per-row checksum moved (keyed by the student key column).
+# The mirror keeps one row per student, so the sync checks the key column really is unique in the mirrored classes
+# and stops (without touching the mirror) if it isn't: a repeated key would otherwise overwrite another row silently.
+
+import os
+import sys
+import sqlite3
+import argparse
+import datetime as dt
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from placement_common.cohorts import CohortQuery, mirror_where, placeholders
+from placement_common.paths import REPO_DIR, load_env
+
+# ----------------------------
+# 1) Global Variables
+# ----------------------------
+
+load_env()
+
+MIRROR_PATH = Path(os.getenv("MIRROR_PATH", str(REPO_DIR / "student_mirror.sqlite3")))
+
+# Unique key for a student row in the view (checked on every sync)
+KEY_COLUMN = os.getenv("MIRROR_KEY_COLUMN", "student_id")
+
+# Columns the reports use (besides the key). Order matters: it's the order of the checksum and of the INSERT.
+MIRROR_COLUMNS = (
+    "program", "class_of", "enroll_status", "record_status", "semester_byu",
+    "job_search_status", "internship_search_status", "is_international", "work_authorization",
+)
+
+# The view name the report SQL uses. The mirror file is attached under the same schema name so the SQL runs unchanged.
+VIEW_SCHEMA = "msmdatabase"
+VIEW_NAME = "bcc_student_view"
+
+# How many keys go into one "WHERE key IN (...)" when pulling changed rows
+FETCH_CHUNK = 500
+
+# How many repeated keys a failed uniqueness check lists
+DUPLICATE_SAMPLE = 5
+
+SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS {VIEW_NAME} (
+    student_key TEXT PRIMARY KEY,
+    program TEXT NOT NULL,
+    class_of TEXT,
+    enroll_status TEXT,
+    record_status TEXT,
+    semester_byu INTEGER,
+    job_search_status TEXT,
+    internship_search_status TEXT,
+    is_international INTEGER,
+    work_authorization TEXT,
+    row_crc INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_{VIEW_NAME}_program_class ON {VIEW_NAME} (program, class_of);
+CREATE TABLE IF NOT EXISTS sync_state (
+    program TEXT PRIMARY KEY,
+    row_count INTEGER NOT NULL,
+    checksum INTEGER NOT NULL,
+    synced_at TEXT NOT NULL
+);
+"""
+
+# ----------------------------
+# 2) SQL (server side)
+# ----------------------------
+
+# Per-row checksum expression. NULLs are swapped for a marker so "NULL" and "" don't hash the same.
+def row_crc_sql() -> str:
+    cols = ", ".join(f"IFNULL({c}, '~')" for c in (KEY_COLUMN,) + MIRROR_COLUMNS)
+    return f"CRC32(CONCAT_WS('|', {cols}))"
+
+def program_checksums_query() -> CohortQuery:
+    where_sql, where_params = mirror_where()
+    sql = (
+        f"SELECT program, COUNT(*) AS row_count, BIT_XOR({row_crc_sql()}) AS checksum\n"
+        f"FROM {VIEW_SCHEMA}.{VIEW_NAME}\n{where_sql}GROUP BY program;"
+    )
+    return CohortQuery(sql, where_params, "MIRROR_CHECKSUMS")
+
+# Keys that appear on more than one row of the mirrored classes (at most DUPLICATE_SAMPLE of them)
+def duplicate_keys_query() -> CohortQuery:
+    where_sql, where_params = mirror_where()
+    sql = (
+        f"SELECT {KEY_COLUMN}, COUNT(*) AS row_count, GROUP_CONCAT(DISTINCT program) AS programs\n"
+        f"FROM {VIEW_SCHEMA}.{VIEW_NAME}\n{where_sql}GROUP BY {KEY_COLUMN}\nHAVING COUNT(*) > 1\n"
+        f"LIMIT {DUPLICATE_SAMPLE};"
+    )
+    return CohortQuery(sql, where_params, "MIRROR_DUPLICATE_KEYS")
+
+def program_keys_query() -> CohortQuery:
+    where_sql, where_params = mirror_where()
+    sql = (
+        f"SELECT {KEY_COLUMN}, {row_crc_sql()} AS row_crc\n"
+        f"FROM {VIEW_SCHEMA}.{VIEW_NAME}\n{where_sql}  AND program = %s;"
+    )
+    return CohortQuery(sql, where_params, "MIRROR_KEYS")
+
+def program_rows_query(key_count: int) -> CohortQuery:
+    where_sql, where_params = mirror_where()
+    cols = ", ".join((KEY_COLUMN,) + MIRROR_COLUMNS)
+    sql = (
+        f"SELECT {cols}, {row_crc_sql()} AS row_crc\n"
+        f"FROM {VIEW_SCHEMA}.{VIEW_NAME}\n{where_sql}  AND program = %s\n"
+        f"  AND {KEY_COLUMN} IN {placeholders(key_count)};"
+    )
+    return CohortQuery(sql, where_params, "MIRROR_ROWS")
+
+# ----------------------------
+# 3) Mirror file
+# ----------------------------
+
+def open_mirror_db(path: Path = MIRROR_PATH) -> sqlite3.Connection:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(str(path))
+    db.executescript(SCHEMA_SQL)
+    return db
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+# Brings one program's rows in line with the server. Returns (rows_upserted, rows_deleted).
+def _sync_program(statements, db: sqlite3.Connection, program: str) -> Tuple[int, int]:
+    keys = statements.fetch(program_keys_query(), (program,))
+    remote = {str(k): int(crc) for k, crc in keys}
+    # The view changed between the uniqueness check and this read
+    if len(remote) != len(keys):
+        raise RuntimeError(f"{KEY_COLUMN} is not unique within {program} in {VIEW_NAME}; mirror not changed.")
+    local = {k: crc for k, crc in db.execute(
+        f"SELECT student_key, row_crc FROM {VIEW_NAME} WHERE program = ?", (program,)
+    )}
+
+    changed = [k for k, crc in remote.items() if local.get(k) != crc]
+    removed = [k for k in local if k not in remote]
+
+    insert_sql = (
+        f"INSERT OR REPLACE INTO {VIEW_NAME} (student_key, {', '.join(MIRROR_COLUMNS)}, row_crc) "
+        f"VALUES ({', '.join(['?'] * (len(MIRROR_COLUMNS) + 2))})"
+    )
+    for chunk in _chunks(changed, FETCH_CHUNK):
+        # pad the last chunk with a repeated key so every chunk uses the same prepared statement
+        chunk = chunk + [chunk[-1]] * (FETCH_CHUNK - len(chunk))
+        for row in statements.fetch(program_rows_query(FETCH_CHUNK), (program,) + tuple(chunk)):
+            key, *values, crc = row
+            record = dict(zip(MIRROR_COLUMNS, values))
+            if record["class_of"] is not None:
+                record["class_of"] = str(record["class_of"])  # same literal type the report queries bind
+            db.execute(insert_sql, [str(key)] + [record[c] for c in MIRROR_COLUMNS] + [int(crc)])
+    for chunk in _chunks(removed, FETCH_CHUNK):
+        db.execute(f"DELETE FROM {VIEW_NAME} WHERE student_key IN ({','.join(['?'] * len(chunk))})", chunk)
+    return len(changed), len(removed)
+
+# Fails before anything is synced if the key column isn't unique in the mirrored classes
+def check_unique_keys(statements):
+    dupes = statements.fetch(duplicate_keys_query())
+    if dupes:
+        sample = ", ".join(f"{key} ({n} rows: {programs})" for key, n, programs in dupes)
+        raise RuntimeError(
+            f"{KEY_COLUMN} is not unique in {VIEW_NAME}: {sample}. The mirror keeps one row per student; "
+            f"set MIRROR_KEY_COLUMN to a column that is. Mirror not changed."
+        )
+
+# Incremental sync: only programs whose (row_count, checksum) differ from the last sync are touched
+def sync(statements, db: sqlite3.Connection) -> Dict[str, Tuple[int, int]]:
+    check_unique_keys(statements)
+    remote = {str(p): (int(n), int(crc)) for p, n, crc in statements.fetch(program_checksums_query())}
+    local = {p: (n, crc) for p, n, crc in db.execute("SELECT program, row_count, checksum FROM sync_state")}
+    now = dt.datetime.now().isoformat(timespec="seconds")
+
+    changes: Dict[str, Tuple[int, int]] = {}
+    with db:
+        for program, state in sorted(remote.items()):
+            if local.get(program) == state:
+                continue
+            changes[program] = _sync_program(statements, db, program)
+            db.execute(
+                "INSERT OR REPLACE INTO sync_state (program, row_count, checksum, synced_at) VALUES (?, ?, ?, ?)",
+                (program, state[0], state[1], now),
+            )
+        # programs that no longer have any students in the mirrored classes
+        for program in set(local) - set(remote):
+            deleted = db.execute(f"DELETE FROM {VIEW_NAME} WHERE program = ?", (program,)).rowcount
+            db.execute("DELETE FROM sync_state WHERE program = ?", (program,))
+            changes[program] = (0, deleted)
+    return changes
+
+# ----------------------------
+# 4) Reading from the mirror
+# ----------------------------
+
+class MirrorStatements:
+    """Same fetch() as PreparedStatements, but runs the compiled report SQL against the local mirror."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._sql: Dict[str, str] = {}
+
+    # MySQL placeholders (%s) become SQLite placeholders (?). The view keeps its schema-qualified name via ATTACH.
+    def _convert(self, sql: str) -> str:
+        converted = self._sql.get(sql)
+        if converted is None:
+            converted = sql.replace("%s", "?")
+            self._sql[sql] = converted
+        return converted
+
+    def is_connected(self) -> bool:
+        try:
+            self.conn.execute("SELECT 1")
+            return True
+        except sqlite3.ProgrammingError:
+            return False
+
+    def fetch(self, query: CohortQuery, params: Tuple = ()) -> List[Tuple]:
+        return list(self.conn.execute(self._convert(query.sql), query.params + tuple(params)))
+
+    # SQLite cursors already step through the result lazily; fetchmany just keeps the same shape as PreparedStatements
+    def stream(self, query: CohortQuery, params: Tuple = (), batch_size: int = 500) -> Iterator[Tuple]:
+        cur = self.conn.execute(self._convert(query.sql), query.params + tuple(params))
+        try:
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cur.close()
+
+    def close(self):
+        self._sql.clear()
+
+# Opens the mirror for a report run. Fails if it was never synced.
+def open_mirror(path: Path = MIRROR_PATH) -> MirrorStatements:
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Student mirror not found at: {path} (run 'python -m placement_common.student_mirror sync' first)")
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"ATTACH DATABASE ? AS {VIEW_SCHEMA}", (str(path),))
+    return MirrorStatements(conn)
+
+# ----------------------------
+# 5) Command line
+# ----------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep a local SQLite mirror of bcc_student_view.")
+    parser.add_argument("command", choices=["sync"], help="sync: pull changes from the live view into the mirror")
+    parser.add_argument("--path", default=str(MIRROR_PATH), help="mirror file (default: MIRROR_PATH or student_mirror.sqlite3)")
+    args = parser.parse_args(argv)
+
+    import mysql.connector
+    from placement_common.cohorts import PreparedStatements
+
+    conn = mysql.connector.connect(
+        host=os.environ["DB_HOST"], user=os.environ["DB_USER"], password=os.environ["DB_PASSWORD"],
+        database=os.environ["DB_NAME"], autocommit=False,
+    )
+    statements = PreparedStatements(conn)
+    db = open_mirror_db(Path(args.path))
+    try:
+        changes = sync(statements, db)
+    finally:
+        statements.close()
+        conn.close()
+        db.close()
+
+    if not changes:
+        print("Mirror already up to date.")
+    for program, (upserted, deleted) in sorted(changes.items()):
+        print(f"{program}: {upserted} rows updated, {deleted} removed")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        sys.stderr.write(f"[ERROR] {e}\n")
+        sys.exit(1)
@@ -0,0 +1,160 @@
+# Rebuilding WH (Weekly History) columns from stored rollup snapshots.
+# A normal run can only append today's column. When a week was missed (the cron host was down) or a column came out
+# wrong, the backfill scripts call rebuild_wh_table() once per WH table with the counts for every week in the range:
+#  - a week that already has a column gets its counts rewritten in place;
+#  - a missing week gets a new column at its place in date order (later columns move right, keeping their styles);
+#  - then totals and % Placed are recomputed for the weeks that were written.
+# All writes for a table go through one CellWriteBuffer, so the table is rewritten in a single pass no matter how
+# many weeks are backfilled.
+#
+# Week columns are recognized by their header (the RUN_DATE_LABEL format, "%m/%d/%Y", or a real date). Columns with
+# any other header stay in front, in their current order.
+
+import datetime as dt
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.cell import range_boundaries
+from openpyxl.worksheet.table import Table, TableColumn
+from openpyxl.worksheet.worksheet import Worksheet
+
+from placement_common.cell_writes import CellWriteBuffer
+from placement_common import rollup
+
+WEEK_LABEL_FORMAT = "%m/%d/%Y"
+
+def week_label(day: dt.date) -> str:
+    return day.strftime(WEEK_LABEL_FORMAT)
+
+# The week a WH header stands for, or None if it isn't a week header
+def parse_week_label(value) -> Optional[dt.date]:
+    if isinstance(value, dt.datetime):
+        return value.date()
+    if isinstance(value, dt.date):
+        return value
+    if isinstance(value, str):
+        try:
+            return dt.datetime.strptime(value.strip(), WEEK_LABEL_FORMAT).date()
+        except ValueError:
+            return None
+    return None
+
+# Every given weekday (Friday by default) in [start, end]
+def backfill_weeks(start: dt.date, end: dt.date, weekday: int = 4) -> List[dt.date]:
+    first = start + dt.timedelta(days=(weekday - start.weekday()) % 7)
+    return [first + dt.timedelta(weeks=k) for k in range((end - first).days // 7 + 1)] if first <= end else []
+
+# Which rollup snapshot stands in for each week: the latest one on or before it, at most max_age_days older.
+# One query for the whole range; weeks without a usable snapshot are left out.
+def pick_snapshots(db, weeks: Sequence[dt.date], max_age_days: int) -> Dict[dt.date, dt.date]:
+    if not weeks:
+        return {}
+    available = rollup.snapshot_dates(db, min(weeks) - dt.timedelta(days=max_age_days), max(weeks))
+    picked = {}
+    for week in weeks:
+        usable = [d for d in available if d <= week and (week - d).days <= max_age_days]
+        if usable:
+            picked[week] = usable[-1]
+    return picked
+
+def _bounds(ref: str) -> Tuple[int, int, int, int]:
+    min_col, min_row, max_col, max_row = range_boundaries(ref)
+    return min_row, max_row, min_col, max_col
+
+def _table_columns(tbl: Table) -> List[TableColumn]:
+    tc_container = getattr(tbl, "tableColumns", None)
+    tc_list = getattr(tc_container, "tableColumn", None)
+    if tc_list is None:
+        tc_list = tc_container
+    if tc_list is None:
+        raise RuntimeError(f"Table '{tbl.displayName}' has no tableColumns list; cannot adjust metadata.")
+    return tc_list
+
+# Widens the table to max_col and renames its data columns after the (possibly reordered) header cells
+def _sync_table(ws: Worksheet, tbl: Table, header_row: int, min_row: int, max_row: int, min_col: int, max_col: int):
+    new_ref = f"{get_column_letter(min_col)}{min_row}:{get_column_letter(max_col)}{max_row}"
+    tbl.ref = new_ref
+    if getattr(tbl, "autoFilter", None) is not None:
+        tbl.autoFilter.ref = new_ref
+
+    tc_list = _table_columns(tbl)
+    width = max_col - min_col + 1
+    next_id = max((tc.id for tc in tc_list), default=0) + 1
+    while len(tc_list) < width:
+        tc_list.append(TableColumn(id=next_id, name=f"Column{len(tc_list) + 1}"))
+        next_id += 1
+
+    names = {tc_list[0].name}
+    for offset in range(1, width):
+        raw = ws.cell(row=header_row, column=min_col + offset).value
+        base = str(raw).strip() if raw not in (None, "") else f"Column{offset + 1}"
+        name, k = base, 1
+        while name in names:
+            k += 1
+            name = f"{base}_{k}"
+        names.add(name)
+        tc_list[offset].name = name
+
+# Rebuilds one WH table with the counts for the given weeks. Returns (columns rewritten, columns inserted).
+#   weeks:      {week: [(status, count), ...]} -- same rows the report queries return
+#   is_ignored: the family's "Class Size / % Placed / Total" label check
+#   recompute:  recompute(cols, buf) writes totals and % Placed for those columns through buf
+def rebuild_wh_table(ws: Worksheet, tbl: Table, header_row: int, weeks: Dict[dt.date, List[Tuple[str, int]]],
+                     is_ignored: Callable[[str], bool],
+                     recompute: Callable[[List[int], CellWriteBuffer], None]) -> Tuple[int, int]:
+    min_row, max_row, min_col, max_col = _bounds(tbl.ref)
+    label_col = min_col
+    existing = list(range(min_col + 1, max_col + 1))
+    if not existing:
+        raise RuntimeError(f"WH table '{tbl.displayName}' has no data columns to model new weeks on.")
+
+    # New column order: undated columns first, then every week (old and new) in date order
+    dated = {c: parse_week_label(ws.cell(row=header_row, column=c).value) for c in existing}
+    undated = [("old", c, None) for c in existing if dated[c] is None]
+    by_week = [("old", c, dated[c]) for c in existing if dated[c] is not None]
+    have = {d for d in dated.values() if d is not None}
+    by_week += [("new", None, week) for week in weeks if week not in have]
+    by_week.sort(key=lambda e: e[2])
+    order = undated + by_week
+
+    # Styles for new columns come from the newest existing column (it has this year's formats)
+    model_col = existing[-1]
+    labels = {r: ws.cell(row=r, column=label_col).value for r in range(header_row + 1, max_row + 1)}
+    old_cells = {(r, c): ws.cell(row=r, column=c) for r in range(min_row, max_row + 1) for c in existing}
+    old_values = {key: cell.value for key, cell in old_cells.items()}
+
+    rewritten = inserted = 0
+    written_cols: List[int] = []
+    with CellWriteBuffer(ws) as buf:
+        for idx, (kind, src, week) in enumerate(order):
+            col = min_col + 1 + idx
+            style_src = src if kind == "old" else model_col
+            for r in range(min_row, max_row + 1):
+                buf.copy_style(r, col, old_cells[(r, style_src)])
+                buf.value(r, col, old_values[(r, src)] if kind == "old" else None)
+
+            if week is None or week not in weeks:
+                continue
+            if kind == "new":
+                buf.value(header_row, col, week_label(week))
+                inserted += 1
+            else:
+                rewritten += 1
+            counts = {str(status).strip(): int(count) for status, count in weeks[week]}
+            for r, label in labels.items():
+                if label is None:
+                    continue
+                lstr = str(label).strip()
+                if is_ignored(lstr):
+                    continue
+                if lstr in counts:
+                    buf.value(r, col, counts[lstr])
+                else:
+                    buf.dash(r, col)
+            written_cols.append(col)
+
+        if written_cols:
+            recompute(written_cols, buf)
+
+    _sync_table(ws, tbl, header_row, min_row, max_row, min_col, min_col + len(order))
+    return rewritten, inserted
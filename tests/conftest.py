@@ -0,0 +1,9 @@
+# The tests import placement_common from the repository root, the leadership report's own modules from its folder,
+# and the synthetic fixtures from benchmarks/.
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT, ROOT / "Leadership-Report", ROOT / "benchmarks"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
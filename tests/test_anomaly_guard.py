@@ -0,0 +1,56 @@
+# find_anomalies() over a hand-built cube: (table, label, trailing counts oldest first, this run's count)
+import pytest
+
+from placement_common import anomaly_guard
+from placement_common.anomaly_guard import find_anomalies
+
+@pytest.fixture(autouse=True)
+def thresholds(monkeypatch):
+    monkeypatch.setattr(anomaly_guard, "ANOMALY_MAX_CHANGE", 0.5)
+    monkeypatch.setattr(anomaly_guard, "ANOMALY_Z", 4.0)
+    monkeypatch.setattr(anomaly_guard, "ANOMALY_MIN_COUNT", 10)
+
+def _one(history, current):
+    found = find_anomalies([("WH", "Actively seeking", history, current)])
+    assert len(found) <= 1
+    return found[0] if found else None
+
+def test_percent_change_over_the_limit():
+    a = _one([100, 100, 100, 100], 40)
+    assert (a.last, a.current, a.change, a.z) == (100, 40, -0.6, None)
+
+def test_percent_change_under_the_limit():
+    assert _one([100, 100, 100, 100], 60) is None
+
+def test_z_score_of_a_move_against_the_trend():
+    # Week-over-week changes 2, -1, 2, -1, 2: mean 0.8, sd sqrt(2.16). A +30 week is only +29% but z ~ 19.9.
+    a = _one([100, 102, 101, 103, 102, 104], 134)
+    assert a.change == pytest.approx(30 / 104)
+    assert a.z == pytest.approx((30 - 0.8) / 2.16 ** 0.5)
+
+def test_steady_growth_is_not_flagged():
+    assert _one([100, 110, 120, 130], 140) is None
+
+def test_short_history_uses_percent_change_only():
+    # Fewer than three week-over-week changes: no z-score
+    assert _one([100, 100], 140) is None
+    a = _one([100, 100], 160)
+    assert a.z is None and a.change == pytest.approx(0.6)
+
+def test_zero_baseline():
+    a = _one([0, 0, 0, 0], 25)
+    assert (a.last, a.current, a.change) == (0, 25, None)
+    assert _one([0, 0, 0, 0], 5) is None
+
+def test_small_counts_and_moves_are_ignored():
+    assert _one([4, 4, 4, 4], 12) is None       # move below ANOMALY_MIN_COUNT
+    assert _one([6, 6, 6, 6], 0) is None        # never reaches ANOMALY_MIN_COUNT
+    assert _one([], 500) is None                # no history yet
+
+def test_every_anomaly_in_the_cube_is_reported():
+    cube = [
+        ("FT_total_wh", "Class Size", [300, 300, 301, 300], 150),
+        ("FT_total_wh", "Accepted an offer", [50, 52, 54, 56], 58),
+        ("MBA_2", "Not Reported", [0, 0, 0, 0], 40),
+    ]
+    assert [(a.table, a.label) for a in find_anomalies(cube)] == [("FT_total_wh", "Class Size"), ("MBA_2", "Not Reported")]
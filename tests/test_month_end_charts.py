@@ -0,0 +1,33 @@
+# prune_chart_runs: only earlier runs' chart folders (and stray chart PNGs) are deleted.
+from placement_common.month_end_charts import prune_chart_runs
+
+PNG = "MSB-0123456789abcdef.png"
+
+def test_prune_keeps_current_run_and_removes_earlier_ones(tmp_path):
+    current = tmp_path / "2026-10-31"
+    earlier = tmp_path / "2026-09-30"
+    for d in (current, earlier):
+        d.mkdir()
+        (d / PNG).write_bytes(b"png")
+    (earlier / "MBA-fedcba9876543210.png.tmp.png").write_bytes(b"partial")
+    (tmp_path / PNG).write_bytes(b"old flat layout")
+
+    assert prune_chart_runs(tmp_path, current) == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["2026-10-31"]
+    assert (current / PNG).exists()
+
+def test_prune_leaves_files_it_did_not_make(tmp_path, capsys):
+    current = tmp_path / "2026-10-31"
+    current.mkdir()
+    earlier = tmp_path / "2026-09-30"
+    earlier.mkdir()
+    (earlier / PNG).write_bytes(b"png")
+    (earlier / "notes.txt").write_text("keep me")
+    (tmp_path / "logo.png").write_bytes(b"png")
+    (tmp_path / "archive").mkdir()
+
+    assert prune_chart_runs(tmp_path, current) == 1
+    assert (earlier / "notes.txt").exists()
+    assert (tmp_path / "logo.png").exists()
+    assert (tmp_path / "archive").is_dir()
+    assert "Left" in capsys.readouterr().out
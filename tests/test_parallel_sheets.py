@@ -0,0 +1,87 @@
+# The parallel sheet rendering (RENDER_WORKERS > 1) has to write the same workbook as the serial path. Both are run
+# end to end on the same synthetic workbook and mirror, and the saved files are compared cell by cell.
+import os
+import shutil
+import subprocess
+import sys
+import datetime as dt
+import multiprocessing as mp
+from pathlib import Path
+
+import pytest
+from openpyxl import load_workbook
+
+import parallel_sheets
+import synthetic
+from placement_common import student_mirror
+
+ROOT = Path(__file__).resolve().parent.parent
+REPORT = ROOT / "Leadership-Report"
+WORKBOOK = "weekly_placement_report.xlsx"
+
+STYLE_ATTRS = ("font", "fill", "border", "alignment", "number_format", "protection")
+
+def _run_update(tmp: Path, name: str, mirror: Path, template: Path, workers: int) -> Path:
+    workdir = tmp / name
+    workdir.mkdir()
+    for py in REPORT.glob("*.py"):
+        shutil.copy2(py, workdir / py.name)
+    shutil.copy2(template, workdir / WORKBOOK)
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": str(ROOT),
+        "DB_HOST": "test", "DB_USER": "test", "DB_PASSWORD": "test", "DB_NAME": "test",
+        "PLACEMENT_SOURCE": "mirror", "MIRROR_PATH": str(mirror), "FORCE_FULL_UPDATE": "1",
+        "ANOMALY_GUARD": "off", "BI_EXPORT": "off", "WORKBOOK_BACKUPS": "0",
+        "METRICS_DIR": str(workdir / "metrics"), "ROUTING_CONFIG": str(ROOT / "routing.toml"),
+        "RENDER_WORKERS": str(workers),
+    })
+    env.pop("OUTPUT_PATH", None)
+    proc = subprocess.run([sys.executable, "update-leadership-report.py"], cwd=str(workdir), env=env,
+                          capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    return workdir / WORKBOOK
+
+def _snapshot(path: Path):
+    wb = load_workbook(path)
+    sheets = {}
+    for ws in wb.worksheets:
+        cells = {
+            c.coordinate: (c.value, tuple(repr(getattr(c, a)) for a in STYLE_ATTRS))
+            for row in ws.iter_rows() for c in row
+        }
+        tables = {t.displayName: (t.ref, [col.name for col in t.tableColumns]) for t in ws.tables.values()}
+        sheets[ws.title] = (ws.dimensions, cells, tables, sorted(str(r) for r in ws.merged_cells.ranges))
+    return wb.sheetnames, sheets
+
+@pytest.mark.skipif("fork" not in mp.get_all_start_methods(), reason="parallel rendering needs fork")
+@pytest.mark.skipif(not parallel_sheets.openpyxl_tested(), reason="parallel rendering is off on this openpyxl")
+def test_parallel_and_serial_write_the_same_workbook(tmp_path):
+    mirror = synthetic.seed_population(student_mirror, tmp_path / "mirror.sqlite3", 400)
+    template = synthetic.make_leadership_workbook(tmp_path / "template.xlsx", 10, dt.date.today())
+
+    serial = _snapshot(_run_update(tmp_path, "serial", mirror, template, 0))
+    parallel_path = _run_update(tmp_path, "parallel", mirror, template, 3)
+    assert '"stage": "sheet_render"' in (parallel_path.parent / "metrics" / "run-log.jsonl").read_text()
+    parallel = _snapshot(parallel_path)
+
+    assert serial[0] == parallel[0]
+    for title in serial[0]:
+        s_dims, s_cells, s_tables, s_merged = serial[1][title]
+        p_dims, p_cells, p_tables, p_merged = parallel[1][title]
+        assert s_dims == p_dims, title
+        assert s_tables == p_tables, title
+        assert s_merged == p_merged, title
+        assert s_cells.keys() == p_cells.keys(), title
+        for coord in s_cells:
+            assert s_cells[coord] == p_cells[coord], f"{title}!{coord}"
+
+def test_untested_openpyxl_falls_back_to_serial(monkeypatch, capsys):
+    assert parallel_sheets.openpyxl_tested("3.1.5") == parallel_sheets._WRITER_INTERNALS
+    assert not parallel_sheets.openpyxl_tested("3.2.0")
+    assert not parallel_sheets.openpyxl_tested("4.0")
+
+    monkeypatch.setattr(parallel_sheets, "openpyxl_tested", lambda *a: False)
+    assert not parallel_sheets.parallel_available(4)
+    assert "RENDER_WORKERS ignored" in capsys.readouterr().out
+    assert not parallel_sheets.parallel_available(1)
@@ -0,0 +1,90 @@
+# routing.toml validation and compilation (placement_common/routing.py)
+import os
+
+import pytest
+
+from placement_common.routing import compile_routing, current_routing
+
+def _raw(**changes):
+    raw = {
+        "programs": ["BSAcc", "BSFin", "MAcc", "MBA"],
+        "tables": {"pattern": "{program}{n}", "internship_pattern": "{program}_int{n}",
+                   "overrides": {"MBA": "{program}_{n}"}},
+        "directors": [
+            {"name": "Accounting", "programs": ["BSAcc", "MAcc"], "emails": ["acc@example.edu"]},
+            {"name": "Finance", "programs": ["BSFin"], "emails": ["fin@example.edu", "fin2@example.edu"]},
+        ],
+    }
+    raw.update(changes)
+    return raw
+
+def _problems(raw):
+    with pytest.raises(RuntimeError) as e:
+        compile_routing(raw)
+    return str(e.value)
+
+def test_compiles_lookup_tables():
+    r = compile_routing(_raw())
+    assert r.programs == ("BSAcc", "BSFin", "MAcc", "MBA")
+    assert r.tables["BSAcc"] == ("BSAcc1", "BSAcc2", "BSAcc3", "BSAcc4")
+    assert r.tables["BSFin"] == tuple(f"BSFin{n}" for n in range(1, 7))
+    assert r.tables["MBA"] == ("MBA_1", "MBA_2", "MBA_3", "MBA_4")
+    assert r.internship_tables["MAcc"] == ("MAcc_int1", "MAcc_int2")
+    assert r.director_of == {"BSAcc": "Accounting", "MAcc": "Accounting", "BSFin": "Finance"}
+    acc = r.directors["Accounting"]
+    assert (acc.file_label, acc.subject_label) == ("BSAcc-MAcc", "BSAcc, MAcc")
+    assert r.table_names(["BSFin"]) == {"Class": r.tables["Class"], "BSFin": r.tables["BSFin"]}
+
+def test_duplicate_program():
+    assert "program 'BSAcc' is listed twice" in _problems(_raw(programs=["BSAcc", "BSFin", "BSAcc", "MAcc", "MBA"]))
+
+def test_unknown_keys():
+    raw = _raw(colour="blue")
+    raw["tables"]["prefix"] = "x"
+    raw["directors"][0]["phone"] = "555"
+    problems = _problems(raw)
+    assert "unknown setting 'colour'" in problems
+    assert "unknown setting 'tables.prefix'" in problems
+    assert "director 'Accounting': unknown setting 'phone'" in problems
+
+def test_program_owned_by_two_directors():
+    raw = _raw()
+    raw["directors"][1]["programs"] = ["BSFin", "MAcc"]
+    assert "director 'Finance': program 'MAcc' already goes to 'Accounting'" in _problems(raw)
+
+def test_director_program_not_in_programs():
+    raw = _raw()
+    raw["directors"][1]["programs"] = ["BSMktg"]
+    assert "director 'Finance': program 'BSMktg' is not in programs" in _problems(raw)
+
+@pytest.mark.parametrize("pattern, message", [
+    ("{program}", "must be a string with {program} and {n} in it"),
+    ("{program}{n}{year}", "may only use {program} and {n}"),
+    (7, "must be a string with {program} and {n} in it"),
+])
+def test_bad_pattern(pattern, message):
+    raw = _raw()
+    raw["tables"]["pattern"] = pattern
+    assert f"tables.pattern {message}" in _problems(raw)
+
+def test_bad_override_and_email_reported_together():
+    raw = _raw()
+    raw["tables"]["overrides"] = {"MPA": "{program}_{n}"}
+    raw["directors"][0]["emails"] = ["not-an-address"]
+    problems = _problems(raw)
+    assert "tables.overrides: 'MPA' is not in programs" in problems
+    assert "'not-an-address' is not an email address" in problems
+
+def test_current_routing_rereads_edits_and_keeps_last_good(tmp_path, capsys):
+    path = tmp_path / "routing.toml"
+    path.write_text('programs = ["BSAcc"]\n')
+    assert current_routing(path).programs == ("BSAcc",)
+
+    path.write_text('programs = ["BSAcc", "MAcc"]\n')
+    os.utime(path, (1, 1))
+    assert current_routing(path).programs == ("BSAcc", "MAcc")
+
+    path.write_text('programs = ["BSAcc", "BSAcc"]\n')
+    os.utime(path, (2, 2))
+    assert current_routing(path).programs == ("BSAcc", "MAcc")
+    assert "Keeping the routing loaded before the edit" in capsys.readouterr().err
@@ -0,0 +1,79 @@
+# student_mirror.sync() against a stand-in for the live view: the key column must be unique, or nothing is synced.
+import pytest
+
+from placement_common import student_mirror
+from placement_common.student_mirror import MIRROR_COLUMNS, VIEW_NAME, open_mirror_db, sync
+
+def _row(key, program, crc, status="Actively seeking"):
+    values = dict.fromkeys(MIRROR_COLUMNS)
+    values.update(program=program, class_of="2026", job_search_status=status)
+    return (key,) + tuple(values[c] for c in MIRROR_COLUMNS) + (crc,)
+
+# Answers the mirror's server queries (by name) from a list of view rows
+class FakeView:
+    def __init__(self, rows, check_duplicates=True):
+        self.rows = rows
+        self.check_duplicates = check_duplicates
+
+    def fetch(self, query, params=()):
+        if query.name == "MIRROR_DUPLICATE_KEYS":
+            if not self.check_duplicates:
+                return []
+            by_key = {}
+            for row in self.rows:
+                by_key.setdefault(row[0], []).append(row[1])
+            return [(k, len(p), ",".join(sorted(set(p)))) for k, p in by_key.items() if len(p) > 1]
+        if query.name == "MIRROR_CHECKSUMS":
+            sums = {}
+            for row in self.rows:
+                n, crc = sums.get(row[1], (0, 0))
+                sums[row[1]] = (n + 1, crc ^ row[-1])
+            return [(p, n, crc) for p, (n, crc) in sums.items()]
+        program = params[0]
+        if query.name == "MIRROR_KEYS":
+            return [(row[0], row[-1]) for row in self.rows if row[1] == program]
+        if query.name == "MIRROR_ROWS":
+            keys = set(params[1:])
+            return [row for row in self.rows if row[1] == program and row[0] in keys]
+        raise AssertionError(query.name)
+
+def _mirror(db):
+    return sorted(db.execute(f"SELECT student_key, program, job_search_status FROM {VIEW_NAME}"))
+
+@pytest.fixture
+def db(tmp_path):
+    conn = open_mirror_db(tmp_path / "mirror.sqlite3")
+    yield conn
+    conn.close()
+
+def test_sync_then_nothing_to_do(db):
+    view = FakeView([_row("1", "MBA", 11), _row("2", "MBA", 12), _row("3", "MAcc", 13)])
+    assert sync(view, db) == {"MBA": (2, 0), "MAcc": (1, 0)}
+    assert _mirror(db) == [("1", "MBA", "Actively seeking"), ("2", "MBA", "Actively seeking"),
+                           ("3", "MAcc", "Actively seeking")]
+    assert sync(view, db) == {}
+
+def test_key_in_two_programs_fails_and_leaves_the_mirror_alone(db):
+    sync(FakeView([_row("1", "MBA", 11), _row("2", "MAcc", 12)]), db)
+    before = _mirror(db)
+
+    view = FakeView([_row("1", "MBA", 21, "Accepted an offer"), _row("2", "MAcc", 12), _row("2", "MBA", 22)])
+    with pytest.raises(RuntimeError, match=r"student_id is not unique .*2 \(2 rows: MAcc,MBA\)"):
+        sync(view, db)
+    assert _mirror(db) == before
+
+def test_key_repeated_within_a_program_rolls_back(db):
+    sync(FakeView([_row("1", "MBA", 11)]), db)
+    before = _mirror(db)
+
+    # The uniqueness check passed, then the view changed before the program's keys were read
+    view = FakeView([_row("1", "MBA", 21, "Accepted an offer"), _row("1", "MBA", 22)], check_duplicates=False)
+    with pytest.raises(RuntimeError, match="not unique within MBA"):
+        sync(view, db)
+    assert _mirror(db) == before
+
+def test_duplicate_query_groups_on_the_key_column(monkeypatch):
+    monkeypatch.setattr(student_mirror, "KEY_COLUMN", "byu_id")
+    sql = student_mirror.duplicate_keys_query().sql
+    assert "GROUP BY byu_id\nHAVING COUNT(*) > 1" in sql
+    assert sql.rstrip().endswith(f"LIMIT {student_mirror.DUPLICATE_SAMPLE};")